@@ -0,0 +1,115 @@
+"""Memory held per buffered message by ``MessageService``.
+
+Compares buffering the ``discord.Message`` objects the gateway hands out
+(what the buffer used to keep alive until a flush) with the compact
+``MessageRecord`` taken at ingest. Messages come from MESSAGE_CREATE-like
+payloads parsed by discord.py, each from a distinct guild member.
+
+    python benchmarks/bench_message_buffer.py [message_count ...]
+"""
+
+import asyncio
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+import discord
+from discord.state import ConnectionState
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "horizon_bot_project"))
+
+from hbp_types.message import MessageRecord  # noqa: E402
+
+GUILD_ID = 100000000000000000
+CHANNEL_ID = 100000000000000001
+BASE_ID = 300000000000000000
+
+
+def build_channel() -> discord.TextChannel:
+    state = ConnectionState(
+        dispatch=lambda *args: None,
+        handlers={},
+        hooks={},
+        http=None,
+        intents=discord.Intents.default(),
+    )
+    guild = discord.Guild(
+        data={"id": str(GUILD_ID), "name": "Horizon", "channels": [], "roles": []},
+        state=state,
+    )
+    channel = discord.TextChannel(
+        state=state,
+        guild=guild,
+        data={"id": str(CHANNEL_ID), "name": "general", "type": 0, "position": 0},
+    )
+    guild._add_channel(channel)
+    return channel
+
+
+def message_payload(i: int) -> dict:
+    user_id = str(BASE_ID + i)
+    return {
+        "id": str(BASE_ID * 2 + i),
+        "channel_id": str(CHANNEL_ID),
+        "guild_id": str(GUILD_ID),
+        "type": 0,
+        "content": f"gg everyone, see you in round {i % 12} of the tournament!",
+        "timestamp": "2025-05-01T18:00:00.000000+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "author": {
+            "id": user_id,
+            "username": f"player{i}",
+            "discriminator": "0",
+            "global_name": f"Player {i}",
+            "avatar": None,
+        },
+        "member": {
+            "roles": [],
+            "joined_at": "2025-01-01T00:00:00.000000+00:00",
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        },
+    }
+
+
+def measure(name: str, message_count: int, ingest) -> float:
+    channel = build_channel()
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    buffer = []
+    for i in range(message_count):
+        # payloads are dropped after parsing, as with gateway events
+        message = discord.Message(
+            state=channel._state, channel=channel, data=message_payload(i)
+        )
+        buffer.append(ingest(message))
+        del message
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_message = (current - before) / message_count
+    print(f"  {name:<16} {per_message:7.0f} B/message")
+    return per_message
+
+
+async def main() -> None:
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for message_count in counts:
+        print(f"{message_count} buffered messages")
+        before = measure("discord.Message", message_count, lambda m: m)
+        after = measure("MessageRecord", message_count, MessageRecord.from_message)
+        print(f"  {before / after:.1f}x less memory per message")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,162 @@
+"""Size and throughput of dictionary-compressed message content.
+
+Stores a synthetic tournament chat log plain and compressed with a zlib
+dictionary trained on its first messages, and reports stored content
+bytes, database size, and insert and read (decompressing) throughput.
+
+    python benchmarks/bench_message_compression.py [message_count]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "horizon_bot_project"))
+
+from hbp_types.message import MessageRecord  # noqa: E402
+from storage.compression import (  # noqa: E402
+    CREATE_DICTIONARIES_SQL,
+    MessageCompressor,
+    train_dictionary,
+)
+from storage.sqlite import INSERT_MESSAGE_SQL  # noqa: E402
+
+BATCH_SIZE = 500
+TRAINING_SAMPLES = 5000
+
+TEMPLATES = [
+    "gg {team}",
+    "gg wp everyone, see you in round {round}",
+    "when does round {round} start?",
+    "{player} can you invite me to the party",
+    "is {team} still looking for a fourth?",
+    "we need one more for {team}, dm me if you want to join",
+    "lag on {server} is crazy rn",
+    "who won {team} vs {other}?",
+    "{team} vs {other} was so close omg",
+    "/p invite {player}",
+    "anyone want to scrim before the tournament? we are {team}",
+    "signups close at {hour}:00, make sure your whole team reacted ✅",
+    "can a staff member check our signup? team {team} is still pending",
+    "my account is linked but /verify says the discord tag does not match",
+    "{player} left the party, can we get a sub?",
+    "lol",
+    "ok",
+    "ty",
+    "bro {player} just clutched that 1v3",
+    "check out my clip https://youtu.be/{clip}",
+    "is the tournament on {server} or on the hypixel main lobby?",
+    "what are the rules for {mode}?",
+]
+WORDS = "sky blaze void nether ender frost storm shadow iron gold crimson".split()
+MODES = ["bedwars", "skywars", "duels", "bridge", "sumo"]
+CLIP_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_"
+
+
+def chat_log(message_count: int) -> list:
+    rng = random.Random(1)
+    players = [
+        f"{rng.choice(WORDS)}{rng.choice(WORDS)}{rng.randrange(100)}"
+        for _ in range(500)
+    ]
+    teams = [
+        f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}s"
+        for _ in range(200)
+    ]
+    base = 300000000000000000
+    messages = []
+    for i in range(message_count):
+        content = rng.choice(TEMPLATES).format(
+            team=rng.choice(teams),
+            other=rng.choice(teams),
+            player=rng.choice(players),
+            round=rng.randrange(1, 8),
+            server=f"mc{rng.randrange(1, 20)}.horizon.gg",
+            hour=rng.randrange(12, 23),
+            clip="".join(rng.choices(CLIP_CHARS, k=11)),
+            mode=rng.choice(MODES),
+        )
+        messages.append(
+            MessageRecord(
+                str(base + i),
+                str(base + rng.randrange(2000)),
+                content,
+                f"2025-05-01T18:{i // 6000 % 60:02}:{i // 100 % 60:02}+00:00",
+            )
+        )
+    return messages
+
+
+def create_database(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path)
+    db.execute("""
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id TEXT NOT NULL,
+            author_id TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            content_dict INTEGER
+        )
+    """)
+    db.execute(CREATE_DICTIONARIES_SQL)
+    return db
+
+
+def measure(
+    name: str, directory: str, messages: list, compressor: MessageCompressor
+) -> None:
+    path = os.path.join(directory, f"{name}.db")
+    db = create_database(path)
+    start = time.perf_counter()
+    for i in range(0, len(messages), BATCH_SIZE):
+        with db:
+            db.executemany(
+                INSERT_MESSAGE_SQL, compressor.rows(messages[i : i + BATCH_SIZE])
+            )
+    insert = time.perf_counter() - start
+
+    db.create_function(
+        "message_content", 2, compressor.decompress, deterministic=True
+    )
+    start = time.perf_counter()
+    read = db.execute(
+        "SELECT message_content(content, content_dict) FROM messages"
+    ).fetchall()
+    read_time = time.perf_counter() - start
+    assert [row[0] for row in read] == [message.content for message in messages]
+
+    content_bytes = db.execute(
+        "SELECT SUM(length(CAST(content AS BLOB))) FROM messages"
+    ).fetchone()[0]
+    db.close()
+    count = len(messages)
+    print(
+        f"{name:<11} content {content_bytes / count:6.1f} B/message  "
+        f"file {os.path.getsize(path) / 2**20:6.1f} MiB  "
+        f"insert {count / insert:9.0f} msg/s  read {count / read_time:9.0f} msg/s"
+    )
+
+
+def main() -> None:
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    messages = chat_log(message_count)
+    start = time.perf_counter()
+    dictionary = train_dictionary(m.content for m in messages[:TRAINING_SAMPLES])
+    print(
+        f"{message_count} messages, dictionary of {len(dictionary)} bytes "
+        f"trained on {TRAINING_SAMPLES} in {time.perf_counter() - start:.2f}s"
+    )
+    compressor = MessageCompressor([(1, dictionary)])
+    with tempfile.TemporaryDirectory() as directory:
+        # without a dictionary the compressor stores content as is
+        measure("plain", directory, messages, MessageCompressor())
+        measure("compressed", directory, messages, compressor)
+
+
+if __name__ == "__main__":
+    main()
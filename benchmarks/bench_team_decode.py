@@ -0,0 +1,147 @@
+"""Decode cost and per-object memory of teams read from SQLite.
+
+Compares the previous decoding (plain dataclass, ``json.loads`` into a
+list) with the shared slotted ``team_row_factory``, both decoding every
+column, and a slotted variant packing member ids into an ``array('q')``.
+
+    python benchmarks/bench_team_decode.py [team_count]
+"""
+
+import json
+import sqlite3
+from array import array
+import sys
+import time
+import tracemalloc
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "horizon_bot_project"))
+
+from hbp_types.team import Team  # noqa: E402
+from storage.sqlite import CREATE_TEAMS_SQL, TEAM_COLUMNS, team_row_factory  # noqa: E402
+
+
+@dataclass
+class LegacyTeam:
+    canonical_name: str
+    team_name: str
+    members: List[int]
+    signup_message_id: int
+    denied_by: int | None = None
+    approved_at: datetime | None = None
+    signup_pending: bool = True
+    team_role_id: int | None = None
+    tournament_id: int = 0
+
+
+def legacy_row_factory(cursor, row):
+    return LegacyTeam(
+        canonical_name=row[0],
+        team_name=row[1],
+        members=json.loads(row[2]),
+        signup_message_id=row[3],
+        denied_by=row[4],
+        approved_at=datetime.fromisoformat(row[5]) if row[5] else None,
+        signup_pending=bool(row[6]),
+        team_role_id=row[7],
+        tournament_id=row[8],
+    )
+
+
+def packed_row_factory(cursor, row):
+    # team_row_factory with member ids packed as 8 byte integers
+    return Team(
+        row[0],
+        row[1],
+        array("q", json.loads(row[2])),
+        row[3],
+        row[4],
+        datetime.fromisoformat(row[5]) if row[5] else None,
+        bool(row[6]),
+        row[7],
+        row[8],
+    )
+
+
+def build_database(team_count: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute(CREATE_TEAMS_SQL)
+    base = 300000000000000000
+    conn.executemany(
+        """
+        INSERT INTO teams (
+            canonical_name, team_name, member_ids, signup_message_id,
+            approved_at, signup_pending, team_role_id
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (
+                f"team_{i}",
+                f"Team {i}",
+                json.dumps([base + i * 4 + j for j in range(4)]),
+                base + i,
+                datetime(2025, 5, 1).isoformat() if i % 2 else None,
+                not i % 2,
+                base * 2 + i if i % 2 else None,
+            )
+            for i in range(team_count)
+        ),
+    )
+    return conn
+
+
+def decode_all(conn: sqlite3.Connection, row_factory) -> list:
+    conn.row_factory = row_factory
+    try:
+        return conn.execute(f"SELECT {TEAM_COLUMNS} FROM teams").fetchall()
+    finally:
+        conn.row_factory = None
+
+
+def measure(conn: sqlite3.Connection, name: str, row_factory) -> None:
+    elapsed = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        decode_all(conn, row_factory)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    tracemalloc.start()
+    teams = decode_all(conn, row_factory)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    count = len(teams)
+    print(
+        f"{name:<12} decode {elapsed * 1000:8.1f} ms "
+        f"({elapsed / count * 1e6:5.2f} us/team)  "
+        f"memory {current / count:6.0f} B/team"
+    )
+
+
+def main() -> None:
+    team_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    conn = build_database(team_count)
+    # all variants must decode to the same values to be comparable
+    decoded = [
+        [tuple(astuple(team)) for team in decode_all(conn, row_factory)]
+        for row_factory in (legacy_row_factory, team_row_factory, packed_row_factory)
+    ]
+    normalized = [
+        [(*team[:2], tuple(team[2]), *team[3:]) for team in teams]
+        for teams in decoded
+    ]
+    assert normalized[0] == normalized[1] == normalized[2]
+    del decoded, normalized
+
+    print(f"{team_count} teams")
+    measure(conn, "legacy", legacy_row_factory)
+    measure(conn, "slotted", team_row_factory)
+    measure(conn, "packed", packed_row_factory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,723 @@
+"""Replays a gateway recording against HorizonBot with every external
+service stubbed out, and reports handler latency and REST usage.
+
+Record with ``gateway_record_path`` set in config.json, or synthesize a
+signup night:
+
+    python benchmarks/replay.py --synthesize 50 night.jsonl
+    python benchmarks/replay.py night.jsonl --speed 10
+
+Discord's REST API (including interaction responses) is answered by an
+in-process stub that counts calls per route; Mojang and Hypixel by a local
+aiohttp server. The bot runs against a fresh database in a temp directory.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote
+
+from aiohttp import web
+
+PROJECT = Path(__file__).resolve().parent.parent / "horizon_bot_project"
+sys.path.insert(0, str(PROJECT))
+
+SETUP_EVENTS = {"READY", "GUILD_CREATE"}
+
+
+def minecraft_uuid(ign: str) -> str:
+    return hashlib.md5(ign.lower().encode()).hexdigest()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+# --- payloads ---------------------------------------------------------------
+
+NOW = datetime.now(timezone.utc).isoformat()
+
+
+def user_payload(user_id: int, name: Optional[str] = None, bot: bool = False) -> dict:
+    return {
+        "id": str(user_id),
+        "username": name or f"user{user_id}",
+        "discriminator": "0",
+        "global_name": None,
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def member_payload(user: dict) -> dict:
+    return {
+        "user": user,
+        "roles": [],
+        "joined_at": NOW,
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+        "permissions": "8",
+    }
+
+
+def message_payload(
+    message_id: int,
+    channel_id: int,
+    author: dict,
+    content: str = "",
+    guild_id: Optional[int] = None,
+) -> dict:
+    payload = {
+        "id": str(message_id),
+        "channel_id": str(channel_id),
+        "author": author,
+        "content": content,
+        "timestamp": NOW,
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+    if guild_id is not None:
+        payload["guild_id"] = str(guild_id)
+    return payload
+
+
+# --- Discord stub -----------------------------------------------------------
+
+
+class StubDiscord:
+    """Answers the REST calls the bot makes with minimal valid payloads and
+    tracks just enough state (messages, reactions) for handlers that read
+    back what they wrote."""
+
+    def __init__(self, bot_user: dict, recording: List[dict]):
+        self.bot_user = bot_user
+        self.calls: Counter = Counter()
+        self.messages: Dict[int, dict] = {}
+        # (message id, emoji) -> user ids, in reaction order
+        self.reactions: Dict[tuple, List[int]] = defaultdict(list)
+        self.users: Dict[int, dict] = {}
+        self._next_id = 10**18
+        self._route_patterns: Dict[str, re.Pattern] = {}
+
+        # ids the real bot got for its own messages, so events recorded
+        # later (e.g. reactions) point at the messages created in replay
+        self._bot_messages: Dict[int, List[dict]] = defaultdict(list)
+        # set once the bot created the message in replay
+        self.created: Dict[int, asyncio.Event] = {}
+        for event in recording:
+            if event["e"] == "MESSAGE_CREATE" and event["d"]["author"]["id"] == str(
+                bot_user["id"]
+            ):
+                self._bot_messages[int(event["d"]["channel_id"])].append(event["d"])
+                self.created[int(event["d"]["id"])] = asyncio.Event()
+
+    def snowflake(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _params(self, route) -> Dict[str, str]:
+        pattern = self._route_patterns.get(route.path)
+        if pattern is None:
+            pattern = self._route_patterns[route.path] = re.compile(
+                re.sub(r"\\{(\w+)\\}", r"(?P<\1>[^/?]+)", re.escape(route.path)) + "$"
+            )
+        path = route.url[len(route.BASE) :].split("?")[0]
+        match = pattern.match(path)
+        return {k: unquote(v) for k, v in match.groupdict().items()} if match else {}
+
+    def _message(self, channel_id: int, message_id: int) -> dict:
+        message = self.messages.get(message_id)
+        if message is None:
+            message = self.messages[message_id] = message_payload(
+                message_id, channel_id, self.bot_user
+            )
+        counts = Counter()
+        for (mid, emoji), users in self.reactions.items():
+            if mid == message_id and users:
+                counts[emoji] = len(users)
+        message["reactions"] = [
+            {
+                "count": count,
+                "me": int(self.bot_user["id"]) in self.reactions[(message_id, emoji)],
+                "emoji": {"id": None, "name": emoji},
+                "count_details": {"burst": 0, "normal": count},
+                "burst_colors": [],
+                "me_burst": False,
+                "burst_me": False,
+            }
+            for emoji, count in counts.items()
+        ]
+        return message
+
+    def _create_message(self, channel_id: int, payload: dict) -> dict:
+        content = payload.get("content") or ""
+        recorded = self._bot_messages.get(channel_id)
+        message_id = None
+        if recorded:
+            match = next((m for m in recorded if m["content"] == content), recorded[0])
+            recorded.remove(match)
+            message_id = int(match["id"])
+        message = message_payload(
+            message_id or self.snowflake(), channel_id, self.bot_user, content
+        )
+        message["embeds"] = payload.get("embeds") or []
+        self.messages[int(message["id"])] = message
+        if message_id in self.created:
+            self.created[message_id].set()
+        return message
+
+    def react(self, message_id: int, emoji: str, user_id: int, add: bool) -> None:
+        users = self.reactions[(message_id, emoji)]
+        if add and user_id not in users:
+            users.append(user_id)
+        elif not add and user_id in users:
+            users.remove(user_id)
+
+    async def request(self, route, *, files=None, form=None, **kwargs) -> Any:
+        self.calls[f"{route.method} {route.path}"] += 1
+        await asyncio.sleep(0)
+        p = self._params(route)
+        payload = kwargs.get("json") or {}
+        if form:
+            for part in form:
+                if part.get("name") == "payload_json":
+                    payload = json.loads(part["value"])
+        key = (route.method, route.path)
+
+        if key == ("GET", "/channels/{channel_id}/messages/{message_id}"):
+            return self._message(int(p["channel_id"]), int(p["message_id"]))
+        if key == ("POST", "/channels/{channel_id}/messages"):
+            return self._create_message(int(p["channel_id"]), payload)
+        if key == ("PATCH", "/channels/{channel_id}/messages/{message_id}"):
+            message = self._message(int(p["channel_id"]), int(p["message_id"]))
+            message.update({k: v for k, v in payload.items() if k in message})
+            return message
+        if route.path.startswith("/channels/{channel_id}/messages/{message_id}/reactions"):
+            message_id = int(p["message_id"])
+            if route.method == "GET":
+                return [
+                    self.users.get(uid, user_payload(uid))
+                    for uid in self.reactions[(message_id, p["emoji"])]
+                ]
+            if "emoji" not in p:
+                for reaction in [k for k in self.reactions if k[0] == message_id]:
+                    del self.reactions[reaction]
+                return None
+            member_id = p.get("member_id", "@me")
+            user_id = int(self.bot_user["id"]) if member_id == "@me" else int(member_id)
+            self.react(message_id, p["emoji"], user_id, route.method == "PUT")
+            return None
+        if key == ("POST", "/users/@me/channels"):
+            recipient = int(payload["recipient_id"])
+            return {
+                "id": str(self.snowflake()),
+                "type": 1,
+                "recipients": [self.users.get(recipient, user_payload(recipient))],
+            }
+        if key == ("POST", "/guilds/{guild_id}/roles"):
+            return {
+                "id": str(self.snowflake()),
+                "name": payload.get("name", "role"),
+                "color": 0,
+                "hoist": False,
+                "position": 1,
+                "permissions": "0",
+                "managed": False,
+                "mentionable": payload.get("mentionable", False),
+                "flags": 0,
+            }
+        if key == ("GET", "/users/{user_id}"):
+            user_id = int(p["user_id"])
+            return self.users.get(user_id, user_payload(user_id))
+        if key == ("GET", "/guilds/{guild_id}/members/{user_id}"):
+            user_id = int(p["user_id"])
+            return member_payload(self.users.get(user_id, user_payload(user_id)))
+        return None
+
+
+def make_webhook_adapter(stub: StubDiscord):
+    from discord.webhook.async_ import AsyncWebhookAdapter
+
+    class StubWebhookAdapter(AsyncWebhookAdapter):
+        """Interaction callbacks and follow-ups go through webhook routes."""
+
+        async def request(self, route, session=None, *, payload=None, **kwargs):
+            stub.calls[f"{route.method} {route.path}"] += 1
+            await asyncio.sleep(0)
+            if route.path.endswith("/callback"):
+                return {"interaction": {"id": str(route.webhook_id), "type": 2}}
+            if route.method in ("POST", "PATCH"):
+                return message_payload(
+                    stub.snowflake(),
+                    0,
+                    stub.bot_user,
+                    (payload or {}).get("content") or "",
+                )
+            return None
+
+    return StubWebhookAdapter()
+
+
+# --- Mojang / Hypixel stub --------------------------------------------------
+
+
+class MinecraftStub:
+    """Local Mojang and Hypixel API. Every IGN exists; its Hypixel Discord
+    tag is whatever Discord user ran /verify for it in the recording."""
+
+    def __init__(self, recording: List[dict]):
+        self.calls: Counter = Counter()
+        self.names: Dict[str, str] = {}
+        self.discord_tags: Dict[str, str] = {}
+        for event in recording:
+            data = event["d"]
+            if event["e"] == "INTERACTION_CREATE" and data.get("data", {}).get("name") == "verify":
+                ign = data["data"]["options"][0]["value"]
+                user = (data.get("member") or {}).get("user") or data.get("user")
+                self.discord_tags[minecraft_uuid(ign)] = user["username"]
+        self._runner: Optional[web.AppRunner] = None
+
+    def _profile(self, name: str) -> dict:
+        uuid = minecraft_uuid(name)
+        self.names[uuid] = name
+        return {"id": uuid, "name": name}
+
+    async def profile(self, request: web.Request) -> web.Response:
+        self.calls["mojang profile"] += 1
+        return web.json_response(self._profile(request.match_info["name"]))
+
+    async def bulk(self, request: web.Request) -> web.Response:
+        self.calls["mojang bulk"] += 1
+        return web.json_response([self._profile(n) for n in await request.json()])
+
+    async def session(self, request: web.Request) -> web.Response:
+        self.calls["mojang session"] += 1
+        name = self.names.get(request.match_info["uuid"])
+        if name is None:
+            return web.Response(status=204)
+        return web.json_response({"id": request.match_info["uuid"], "name": name})
+
+    async def player(self, request: web.Request) -> web.Response:
+        self.calls["hypixel player"] += 1
+        tag = self.discord_tags.get(request.query["uuid"])
+        links = {"DISCORD": tag} if tag else {}
+        return web.json_response(
+            {"success": True, "player": {"socialMedia": {"links": links}}}
+        )
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/users/profiles/minecraft/{name}", self.profile)
+        app.router.add_post("/profiles/minecraft", self.bulk)
+        app.router.add_get("/session/minecraft/profile/{uuid}", self.session)
+        app.router.add_get("/player", self.player)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+
+# --- synthetic recording ----------------------------------------------------
+
+
+def synthesize(teams: int, guild_id: int, channel_id: int) -> List[dict]:
+    """A signup night: every player verifies, the team signs up, then all
+    four members react within about a second. Some chatter in between."""
+    bot = user_payload(1, "horizon", bot=True)
+    players = [user_payload(100 + i, f"player{i}") for i in range(teams * 4)]
+    events = [
+        {"t": 0, "e": "READY", "d": {"user": bot}},
+        {
+            "t": 0,
+            "e": "GUILD_CREATE",
+            "d": {
+                "id": str(guild_id),
+                "name": "Horizon",
+                "owner_id": str(players[0]["id"]),
+                "unavailable": False,
+                "member_count": len(players) + 1,
+                "roles": [
+                    {
+                        "id": str(guild_id),
+                        "name": "@everyone",
+                        "color": 0,
+                        "hoist": False,
+                        "position": 0,
+                        "permissions": "0",
+                        "managed": False,
+                        "mentionable": False,
+                        "flags": 0,
+                    }
+                ],
+                "channels": [
+                    {
+                        "id": str(channel_id),
+                        "type": 0,
+                        "name": "signups",
+                        "position": 0,
+                        "permission_overwrites": [],
+                    }
+                ],
+                "members": [member_payload(u) for u in [bot] + players],
+                "emojis": [],
+                "stickers": [],
+                "features": [],
+                "threads": [],
+                "voice_states": [],
+                "presences": [],
+                "stage_instances": [],
+                "guild_scheduled_events": [],
+            },
+        },
+    ]
+
+    def interaction(t: int, user: dict, name: str, options: list, resolved=None):
+        return {
+            "t": t,
+            "e": "INTERACTION_CREATE",
+            "d": {
+                "id": str(10**17 + len(events)),
+                "application_id": bot["id"],
+                "type": 2,
+                "token": f"token{len(events)}",
+                "version": 1,
+                "guild_id": str(guild_id),
+                "channel_id": str(channel_id),
+                "member": member_payload(user),
+                "app_permissions": "8",
+                "locale": "en-US",
+                "guild_locale": "en-US",
+                "entitlements": [],
+                "data": {
+                    "id": "1",
+                    "name": name,
+                    "type": 1,
+                    "options": options,
+                    **({"resolved": resolved} if resolved else {}),
+                },
+            },
+        }
+
+    message_ids = iter(range(5 * 10**17, 6 * 10**17))
+    for team in range(teams):
+        t = team * 2000
+        members = players[team * 4 : team * 4 + 4]
+        for i, member in enumerate(members):
+            events.append(
+                interaction(
+                    t + i * 150,
+                    member,
+                    "verify",
+                    [{"name": "username", "type": 3, "value": f"ign{member['id']}"}],
+                )
+            )
+            events.append(
+                {
+                    "t": t + i * 150 + 50,
+                    "e": "MESSAGE_CREATE",
+                    "d": {
+                        **message_payload(
+                            next(message_ids), channel_id + 1, member, "gl hf", guild_id
+                        ),
+                        "member": member_payload(member),
+                    },
+                }
+            )
+
+        leader, others = members[0], members[1:]
+        events.append(
+            interaction(
+                t + 700,
+                leader,
+                "signup",
+                [{"name": "team_name", "type": 3, "value": f"Team {team}"}]
+                + [
+                    {"name": f"p{i + 1}", "type": 6, "value": m["id"]}
+                    for i, m in enumerate(others)
+                ],
+                resolved={
+                    "users": {m["id"]: m for m in others},
+                    "members": {
+                        m["id"]: {k: v for k, v in member_payload(m).items() if k != "user"}
+                        for m in others
+                    },
+                },
+            )
+        )
+        # the signup message as the gateway echoes it back to the bot
+        signup_id = next(message_ids)
+        content = " ".join(f"<@{m['id']}>" for m in members)
+        events.append(
+            {
+                "t": t + 800,
+                "e": "MESSAGE_CREATE",
+                "d": message_payload(signup_id, channel_id, bot, content, guild_id),
+            }
+        )
+        for i, member in enumerate(members):
+            events.append(
+                {
+                    "t": t + 1000 + i * 250,
+                    "e": "MESSAGE_REACTION_ADD",
+                    "d": {
+                        "user_id": member["id"],
+                        "channel_id": str(channel_id),
+                        "message_id": str(signup_id),
+                        "guild_id": str(guild_id),
+                        "emoji": {"id": None, "name": "✅"},
+                        "type": 0,
+                        "burst": False,
+                        "burst_colors": [],
+                        "member": member_payload(member),
+                    },
+                }
+            )
+    return sorted(events, key=lambda e: e["t"])
+
+
+# --- driver -----------------------------------------------------------------
+
+
+class HandlerTimer:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.in_flight = 0
+
+    def wrap(self, name_of, func):
+        async def timed(*args, **kwargs):
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.latencies[name_of(*args, **kwargs)].append(
+                    time.perf_counter() - start
+                )
+                self.in_flight -= 1
+
+        return timed
+
+
+async def replay(recording: List[dict], speed: float) -> None:
+    import discord
+    from discord.webhook.async_ import async_context
+
+    import settings as config
+    from bot import create_bot
+    from hbp_types.tournament import Tournament
+    from storage.sqlite import SQLiteStorage
+
+    ready = next(e["d"] for e in recording if e["e"] == "READY")
+    stub = StubDiscord(ready["user"], recording)
+    minecraft = MinecraftStub(recording)
+    base_url = await minecraft.start()
+    config.settings = config.settings.model_copy(
+        update={
+            "mojang_api_url": base_url,
+            "mojang_session_url": base_url,
+            "hypixel_api_url": base_url,
+            "gateway_record_path": None,
+        }
+    )
+
+    storage = SQLiteStorage()
+    await storage.setup()
+    now = datetime.now()
+    await storage.tournament_storage.insert_tournament(
+        Tournament(-1, "Replay", now + timedelta(days=1), now + timedelta(days=2), 999, 4)
+    )
+
+    intents = discord.Intents.default()
+    intents.reactions = True
+    bot = create_bot(config.settings, intents, storage)
+    bot.http.request = stub.request
+    async_context.set(make_webhook_adapter(stub))
+    await bot._async_setup_hook()
+
+    state = bot._connection
+    for event in recording:
+        if event["e"] == "READY":
+            state.user = discord.ClientUser(state=state, data=event["d"]["user"])
+            state.application_id = int(event["d"]["user"]["id"])
+        elif event["e"] == "GUILD_CREATE":
+            for member in event["d"].get("members", []):
+                stub.users[int(member["user"]["id"])] = member["user"]
+            state._get_create_guild(event["d"])
+
+    await bot.setup_hook()
+    bot._ready.set()
+
+    timer = HandlerTimer()
+    bot._run_event = timer.wrap(lambda coro, event_name, *a, **kw: event_name, bot._run_event)
+    bot.tree._call = timer.wrap(
+        lambda interaction: f"/{interaction.data['name']}", bot.tree._call
+    )
+    signup_cog = bot.get_cog("SignupCog")
+    signup_cog.reactions._handler = timer.wrap(
+        lambda key, items: "reaction burst", signup_cog.reactions._handler
+    )
+
+    events = [e for e in recording if e["e"] not in SETUP_EVENTS]
+    counts = Counter(e["e"] for e in events)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    first = events[0]["t"] if events else 0
+    def feed(event: dict) -> None:
+        data = event["d"]
+        if event["e"] in ("MESSAGE_REACTION_ADD", "MESSAGE_REACTION_REMOVE"):
+            stub.react(
+                int(data["message_id"]),
+                data["emoji"]["name"],
+                int(data["user_id"]),
+                event["e"] == "MESSAGE_REACTION_ADD",
+            )
+        state.parsers[event["e"]](data)
+
+    async def feed_when_created(event: dict, created: asyncio.Event) -> None:
+        await created.wait()
+        feed(event)
+
+    async def settle() -> None:
+        """Waits until handlers, debounced bursts and queued REST calls are
+        done."""
+        since = loop.time()
+        idle_checks = 0
+        while idle_checks < 3 and loop.time() - since < 300:
+            await asyncio.sleep(0.1)
+            busy = (
+                timer.in_flight
+                or signup_cog.reactions._workers
+                or bot.rest_queue.depth
+                or any(c["in_flight"] for c in bot.rest_queue.stats().values())
+                or bot.embed_edits.stats()["pending"]
+            )
+            idle_checks = 0 if busy else idle_checks + 1
+
+    # events about a message the bot sends wait until replay has sent it,
+    # since at high speed they would otherwise overtake the handler
+    held: Dict[int, List[asyncio.Task]] = defaultdict(list)
+    for event in events:
+        delay = start + (event["t"] - first) / 1000 / speed - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        message_id = int(event["d"].get("message_id") or 0)
+        created = stub.created.get(message_id)
+        if created is not None and not created.is_set():
+            held[message_id].append(
+                asyncio.create_task(feed_when_created(event, created))
+            )
+        else:
+            feed(event)
+
+    await settle()
+    # once everything settled, a message still not created never will be,
+    # e.g. the post of a signup that failed in replay
+    never_created = [
+        message_id
+        for message_id, tasks in held.items()
+        if not stub.created[message_id].is_set()
+    ]
+    unsent = [task for message_id in never_created for task in held[message_id]]
+    for task in unsent:
+        task.cancel()
+    await asyncio.gather(*unsent, return_exceptions=True)
+    elapsed = loop.time() - start
+
+    teams = bot.signup_service.snapshot.teams.values()
+    approved = sum(1 for t in teams if t.status.value == "approved")
+    await bot.close()
+    await minecraft.close()
+
+    print(f"replayed {len(events)} events at {speed:g}x in {elapsed:.2f}s")
+    print("  " + ", ".join(f"{name}: {n}" for name, n in counts.most_common()))
+    print(f"  teams: {len(teams)} signed up, {approved} approved")
+    if never_created:
+        print(
+            f"  {len(never_created)} bot messages never sent (like the posts "
+            f"of failed signups), skipped {len(unsent)} events about them"
+        )
+    print()
+    print(f"{'handler latency (ms)':<28}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, values in sorted(timer.latencies.items()):
+        ms = [v * 1000 for v in values]
+        print(
+            f"{name:<28}{len(ms):>7}{percentile(ms, 0.5):>9.1f}"
+            f"{percentile(ms, 0.95):>9.1f}{percentile(ms, 0.99):>9.1f}{max(ms):>9.1f}"
+        )
+    print()
+    total = sum(stub.calls.values())
+    print(f"discord REST calls: {total} ({total / max(1, len(events)):.2f} per event)")
+    for route, n in stub.calls.most_common():
+        print(f"  {n:>6}  {route}")
+    print(f"minecraft API calls: {sum(minecraft.calls.values())}")
+    for route, n in minecraft.calls.most_common():
+        print(f"  {n:>6}  {route}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("recording", help="JSON lines file written by the recorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor")
+    parser.add_argument(
+        "--synthesize",
+        type=int,
+        metavar="TEAMS",
+        help="write a synthetic signup night with this many teams first",
+    )
+    args = parser.parse_args()
+    recording_path = os.path.abspath(args.recording)
+
+    os.environ.setdefault("DISCORD_TOKEN", "replay")
+    os.environ.setdefault("HYPIXEL_API_KEY", "replay")
+    workdir = tempfile.mkdtemp(prefix="horizon-replay-")
+    shutil.copy(PROJECT.parent / "config.json", workdir)
+    os.chdir(workdir)
+    import settings as config
+
+    if args.synthesize:
+        events = synthesize(
+            args.synthesize,
+            config.settings.allowed_guilds[0],
+            config.settings.channels.signup_channel_id,
+        )
+        with open(recording_path, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, separators=(",", ":")) + "\n")
+        print(f"wrote {len(events)} events to {recording_path}")
+
+    with open(recording_path, encoding="utf-8") as f:
+        recording = [json.loads(line) for line in f if line.strip()]
+    try:
+        asyncio.run(replay(recording, args.speed))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,28 @@
 import asyncio
 from discord import Intents
-from bot import HorizonBot
+from bot import create_bot
 from storage.sqlite import SQLiteStorage
 from settings import settings
 
-storage = SQLiteStorage()
-asyncio.run(storage.setup())
 
-intents = Intents.default()
-intents.reactions = True
+def main():
+    storage = SQLiteStorage(
+        message_writer_process=settings.message_writer_process,
+        writer_queue_batches=settings.message_writer_queue_size,
+        message_compression=settings.message_compression,
+        dictionary_size=settings.message_compression_dictionary_size,
+        training_samples=settings.message_compression_training_samples,
+    )
+    asyncio.run(storage.setup())
 
-bot = HorizonBot(settings, intents, storage)
+    intents = Intents.default()
+    intents.reactions = True
 
-bot.run(settings.discord_token)
+    bot = create_bot(settings, intents, storage)
+
+    bot.run(settings.discord_token)
+
+
+# the message writer process re-imports this module when it is spawned
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,102 @@
+from datetime import timedelta
 from pathlib import Path
+from typing import Optional
 import discord
-from discord.ext.commands import Bot
+from discord.ext.commands import AutoShardedBot, Bot
+from hbp_types.message import MessageRevision
 from services.tournament import TournamentService
 from services.signups import SignupService
+from services.team_roles import TeamRoleRegistry
+from services.hypixel import HypixelService
 from services.minecraft import MinecraftLinkService
 from services.message import MessageService
+from services.admission import AdmissionController
+from services.config import ConfigWatcher
+from services.deadlines import DeadlineScheduler
+from services.edits import EmbedEditCoalescer
+from services.link_refresh import LinkRefreshService
+from services.members import MemberCache
+from services.recorder import GatewayRecorder
+from services.rest import Priority, RestQueue
+from services.stats import RateCounter, rss_bytes
 from storage import Storage
-from settings import Settings
+from settings import MemoryProfile, Settings
 
 
 class HorizonBot(Bot):
-    def __init__(self, settings: Settings, intents: discord.Intents, storage: Storage):
-        super().__init__(command_prefix=settings.command_prefix, intents=intents)
+    def __init__(
+        self,
+        settings: Settings,
+        intents: discord.Intents,
+        storage: Storage,
+        **options,
+    ):
+        super().__init__(
+            command_prefix=settings.command_prefix, intents=intents, **options
+        )
         self.settings: Settings = settings
+        self.gateway_events = RateCounter()
+        self.recorder: Optional[GatewayRecorder] = (
+            GatewayRecorder(settings.gateway_record_path)
+            if settings.gateway_record_path
+            else None
+        )
+        self.member_cache = MemberCache(self, max_size=settings.member_lru_size)
+        self.admission = AdmissionController(lambda: self.settings.command_limits)
+        self.rest_queue = RestQueue(
+            concurrency=settings.rest_concurrency,
+            max_per_second=settings.rest_max_per_second,
+            route_budgets=settings.rest_route_budgets,
+        )
+        self.embed_edits = EmbedEditCoalescer(
+            self.rest_queue, window=settings.embed_edit_window
+        )
 
-        self.message_service = MessageService(storage.message_storage)
+        self.message_service = MessageService(
+            storage.message_storage,
+            buffer_size=settings.message_buffer_size,
+            flush_interval=settings.message_flush_interval,
+            max_buffered=settings.message_buffer_limit,
+            journal_dir=settings.message_journal_dir,
+            journal_sync_interval=settings.message_journal_sync_interval,
+        )
+        self.hypixel_service = HypixelService(
+            storage.hypixel_cache_storage,
+            ttl=timedelta(hours=settings.hypixel_cache_ttl_hours),
+            stale_for=timedelta(hours=settings.hypixel_cache_stale_hours),
+            max_entries=settings.hypixel_cache_max_entries,
+            revalidate_concurrency=settings.hypixel_revalidate_concurrency,
+            revalidate_max_per_second=settings.hypixel_revalidate_max_per_second,
+            revalidate_max_pending=settings.hypixel_revalidate_max_pending,
+        )
         self.minecraft_link_service = MinecraftLinkService(
-            storage.minecraft_link_storage
+            storage.minecraft_link_storage,
+            self.hypixel_service,
+            cache_size=settings.link_cache_size,
+            recheck_after=timedelta(seconds=settings.hypixel_recheck_seconds),
         )
-        self.signup_service = SignupService(storage.signup_storage)
+        self.signup_service = SignupService(
+            storage.signup_storage,
+            self.minecraft_link_service,
+            on_promoted=self._substitutes_promoted,
+        )
+        self.team_roles = TeamRoleRegistry(self.rest_queue, self.signup_service)
         self.tournament_service = TournamentService(storage.tournament_storage)
+        self.deadline_scheduler = DeadlineScheduler(self)
+        self.link_refresh_service = LinkRefreshService(
+            self.minecraft_link_service,
+            on_renamed=self.signup_service.update_igns,
+            batch_size=settings.link_refresh_batch_size,
+            interval=settings.link_refresh_interval,
+            max_per_second=settings.link_refresh_max_per_second,
+            min_age=timedelta(hours=settings.link_refresh_min_age_hours),
+        )
+
+        self.config_watcher = ConfigWatcher(
+            self,
+            poll_interval=settings.config_poll_interval,
+            debounce=settings.config_reload_debounce,
+        )
 
     async def setup_hook(self):
         folder = Path(__file__).resolve().parent / "cogs"
@@ -27,6 +104,56 @@ class HorizonBot(Bot):
         for cog_path in folder.glob("*.py"):
             await self.load_extension(f"cogs.{cog_path.stem}")
 
+        self.rest_queue.start()
+        await self.message_service.start()
+        await self.minecraft_link_service.warm_cache()
+        await self.tournament_service.load()
+        current = await self.tournament_service.get_current_tournament()
+        await self.signup_service.switch_tournament(
+            current.tournament_id if current else 0
+        )
+        await self.signup_service.load_signups_closed(self.settings.allowed_guilds)
+        self.deadline_scheduler.start()
+        self.config_watcher.start()
+        self.link_refresh_service.start()
+
+    async def close(self):
+        await self.config_watcher.close()
+        await self.link_refresh_service.close()
+        await self.hypixel_service.close()
+        await self.deadline_scheduler.close()
+        await self.message_service.close()
+        # cogs drain their batches through the rest queue when unloaded, so
+        # unload them while it still runs (super().close() would do it after)
+        for extension in tuple(self.extensions):
+            try:
+                await self.unload_extension(extension)
+            except Exception as e:
+                print(f"Error unloading {extension}: {e}")
+        await self.embed_edits.close()
+        await self.rest_queue.close()
+        if self.recorder:
+            self.recorder.close()
+        await super().close()
+
+    async def apply_settings(self, new_settings: Settings):
+        """Swap in a new settings snapshot. Cogs always read ``bot.settings``,
+        so a single assignment is enough to make the change visible."""
+        old_settings = self.settings
+        self.settings = new_settings
+        self.command_prefix = new_settings.command_prefix
+
+        if new_settings.discord_token != old_settings.discord_token:
+            print("Discord token changed, restart the bot to apply it.")
+
+        added_guilds = set(new_settings.allowed_guilds) - set(
+            old_settings.allowed_guilds
+        )
+        for guild in self.guilds:
+            if guild.id in added_guilds:
+                await self.tree.sync(guild=guild)
+                print(f"Synced commands for newly allowed guild {guild.name} ({guild.id})")
+
     async def on_ready(self):
         print(f"Logged in as {self.user.name} - {self.user.id}")  # type: ignore
 
@@ -51,5 +178,145 @@ class HorizonBot(Bot):
     async def on_message(self, message: discord.Message):
         await self.message_service.log_message(message)
 
+    async def on_guild_role_create(self, role: discord.Role):
+        self.team_roles.forget(role.id)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.team_roles.forget(role.id)
+
+    def _shard_of(self, guild_id: Optional[int]) -> int:
+        guild = self.get_guild(guild_id) if guild_id else None
+        return guild.shard_id if guild else 0
+
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        revision = MessageRevision.from_edit(payload)
+        if revision is not None:
+            await self.message_service.log_revisions(
+                self._shard_of(payload.guild_id), [revision]
+            )
+
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        await self.message_service.log_revisions(
+            self._shard_of(payload.guild_id),
+            MessageRevision.tombstones([payload.message_id]),
+        )
+
+    async def on_raw_bulk_message_delete(
+        self, payload: discord.RawBulkMessageDeleteEvent
+    ):
+        await self.message_service.log_revisions(
+            self._shard_of(payload.guild_id),
+            MessageRevision.tombstones(payload.message_ids),
+        )
+
+    async def on_socket_event_type(self, event_type: str):
+        self.gateway_events.add()
+
+    async def on_socket_raw_receive(self, msg: str):
+        # only dispatched with enable_debug_events, see create_bot
+        if self.recorder:
+            self.recorder.record(msg)
+
+    def shard_stats(self) -> list[dict]:
+        message_stats = self.message_service.stats()
+        shards = getattr(self, "shards", None)
+        if shards:
+            connections = [
+                (shard_id, info.is_closed(), info.latency, info.is_ws_ratelimited())
+                for shard_id, info in sorted(shards.items())
+            ]
+        else:
+            connections = [
+                (0, self.ws is None, self.latency, self.is_ws_ratelimited())
+            ]
+
+        return [
+            {
+                "shard_id": shard_id,
+                "status": "closed"
+                if closed
+                else ("ratelimited" if ratelimited else "connected"),
+                "latency_ms": latency * 1000,
+                **message_stats.get(
+                    shard_id,
+                    {
+                        "buffered": 0,
+                        "flushed": 0,
+                        "dropped": 0,
+                        "messages_per_second": 0.0,
+                    },
+                ),
+            }
+            for shard_id, closed, latency, ratelimited in connections
+        ]
+
+    def memory_stats(self) -> dict:
+        return {
+            "rss_mb": rss_bytes() / (1024 * 1024),
+            "cached_users": len(self.users),
+            "cached_members": sum(len(g.members) for g in self.guilds),
+            "cached_messages": len(self.cached_messages),
+            "member_lru": self.member_cache.stats(),
+            "link_cache": self.minecraft_link_service.cache.stats(),
+        }
+
+    def _substitutes_promoted(self, teams: list) -> None:
+        signup_cog = self.get_cog("SignupCog")
+        if signup_cog is not None:
+            signup_cog.schedule_promotions(teams)
+
+    def signups_open(self, guild_id: Optional[int]) -> bool:
+        """Whether signups are open in a guild, from in-memory state only."""
+        return (
+            guild_id is not None
+            and not self.signup_service.signups_closed(guild_id)
+            and self.tournament_service.is_signups_open()
+        )
+
+    async def followup(self, interaction: discord.Interaction, *args, **kwargs):
+        """Sends an interaction follow-up ahead of any queued REST work."""
+        return await self.rest_queue.submit(
+            lambda: interaction.followup.send(*args, **kwargs),
+            Priority.INTERACTION,
+            route="interaction",
+        )
+
     def can_view_detailed_errors(self, member: discord.Member) -> bool:
         return member.id == self.settings
+
+
+class AutoShardedHorizonBot(HorizonBot, AutoShardedBot):
+    pass
+
+
+def memory_options(settings: Settings, intents: discord.Intents) -> dict:
+    if settings.memory_profile == MemoryProfile.LOW:
+        return {
+            "max_messages": None,
+            "member_cache_flags": discord.MemberCacheFlags.none(),
+            "chunk_guilds_at_startup": False,
+        }
+    if settings.memory_profile == MemoryProfile.BALANCED:
+        return {
+            "max_messages": 200,
+            "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+            "chunk_guilds_at_startup": False,
+        }
+    return {
+        "max_messages": 1000,
+        "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+        "chunk_guilds_at_startup": intents.members,
+    }
+
+
+def create_bot(
+    settings: Settings, intents: discord.Intents, storage: Storage
+) -> HorizonBot:
+    options = memory_options(settings, intents)
+    if settings.gateway_record_path:
+        options["enable_debug_events"] = True
+    if settings.auto_sharded:
+        return AutoShardedHorizonBot(
+            settings, intents, storage, shard_count=settings.shard_count, **options
+        )
+    return HorizonBot(settings, intents, storage, **options)
@@ -1,16 +1,34 @@
+import asyncio
 import re
-from typing import List, Optional
+from typing import List, Optional, Set
 from bot import HorizonBot
 from discord import app_commands
 from discord.ext import commands
 import discord
 
 from hbp_types.team import Team
+from services.admission import admitted
+from services.debounce import KeyedBatcher
+from services.rest import Priority
 
 
 class SignupCog(commands.Cog):
     def __init__(self, bot: HorizonBot):
         self.bot: HorizonBot = bot
+        self.reactions: KeyedBatcher[int, discord.RawReactionActionEvent] = (
+            KeyedBatcher(
+                self._evaluate_reactions, window=bot.settings.reaction_debounce
+            )
+        )
+        self._promotions: Set[asyncio.Task] = set()
+
+    async def cog_unload(self) -> None:
+        await self.reactions.close()
+        # promotions are stored before their role changes, so cancelling
+        # them only skips REST calls
+        for task in self._promotions:
+            task.cancel()
+        await asyncio.gather(*self._promotions, return_exceptions=True)
 
     @app_commands.command(
         name="cancel",
@@ -20,7 +38,9 @@ class SignupCog(commands.Cog):
         self,
         interaction: discord.Interaction,
     ) -> None:
-        if not await self.bot.tournament_service.is_signups_open():
+        await interaction.response.defer(thinking=True, ephemeral=True)
+
+        if not self.bot.signups_open(interaction.guild_id):
             return await interaction.followup.send("❌ Signups are currently closed.")
 
         team: Team = await self.bot.signup_service.get_team_for_member(interaction.user)
@@ -28,21 +48,28 @@ class SignupCog(commands.Cog):
             return await interaction.followup.send("❌ You are not signed up.")
 
         try:
-            await self.bot.signup_service.deny_team(team, interaction.user)
+            denied = await self.bot.signup_service.deny_team(team, interaction.user)
         except Exception as e:
             print(f"Error denying team: {e}")
             return await interaction.followup.send(
                 "❌ An error occurred while canceling your signup."
             )
+        if not denied:
+            return await interaction.followup.send("❌ You are not signed up.")
+        # an approved team gives up its spot, and its roles with it
+        await self.revoke_team_roles(interaction.guild, team)
 
+        reason = f"Signup canceled by {interaction.user.mention}."
         for m in team.members:
-            user = self.bot.get_user(m)
-            if user is None:
-                user = await self.bot.fetch_user(m)
-            self.send_team_signup_dm(
-                user, False, f"Signup canceled by {interaction.user.mention}."
+            user = await self.bot.member_cache.get_user(m)
+            self.bot.rest_queue.submit(
+                lambda user=user: self.send_team_signup_dm(user, False, reason),
+                Priority.DM,
+                route="dm",
             )
 
+        await self.bot.followup(interaction, "✅ Your signup was canceled.")
+
     @app_commands.command(
         name="signup",
         description="Register your team",
@@ -54,6 +81,7 @@ class SignupCog(commands.Cog):
         p3="Team member 3 (must be verified)",
         p4="Team member 4 (must be verified, default: you)",
     )
+    @admitted("signup")
     async def signup(
         self,
         interaction: discord.Interaction,
@@ -65,7 +93,7 @@ class SignupCog(commands.Cog):
     ) -> None:
         await interaction.response.defer(thinking=True, ephemeral=True)
 
-        if not await self.bot.tournament_service.is_signups_open():
+        if not self.bot.signups_open(interaction.guild_id):
             return await interaction.followup.send("❌ Signups are currently closed.")
 
         if len(team_name) > 20:
@@ -73,13 +101,12 @@ class SignupCog(commands.Cog):
                 "❌ Team name must be 20 characters or less."
             )
 
-        # probably can be optimized by just getting a team with the name from the service and if it's None we are good to go
         canonical_name = self.bot.signup_service.normalize_team_name(team_name)
-        async for team in self.bot.signup_service.all_teams_generator():
-            if (not team.denied_by) and team.canonical_name == canonical_name:
-                return await interaction.followup.send(
-                    "❌ That team name is already taken."
-                )
+        existing = await self.bot.signup_service.get_team(team_name)
+        if existing and not existing.denied_by:
+            return await interaction.followup.send(
+                "❌ That team name is already taken."
+            )
 
         members: List[discord.Member | discord.User] = [
             p4 if p4 else interaction.user,
@@ -92,6 +119,9 @@ class SignupCog(commands.Cog):
                 "❌ All four members must be unique."
             )
 
+        for m in members:
+            self.bot.member_cache.remember(m)
+
         for m in members:
             if await self.bot.minecraft_link_service.get_minecraft_uuid(m) is None:
                 return await interaction.followup.send(
@@ -115,169 +145,432 @@ class SignupCog(commands.Cog):
             )
         embed = await self._create_embed(team_name, members)
         ping_content = " ".join(m.mention for m in members)
-        msg = await signup_chan.send(ping_content, embed=embed)
-        await msg.add_reaction("✅")
-        await msg.add_reaction("⛔")
-
-        for m in members:
-            try:
-                await msg.forward(m)
-                await m.send(
-                    "*Your signup message needs 4 ✅ reactions, one from each team member to be approved!*"
-                )
-            except:  # noqa: E722
-                pass
-
+        rest = self.bot.rest_queue
+        msg = await rest.submit(
+            lambda: signup_chan.send(ping_content, embed=embed), route="message_send"
+        )
+        # stored before anything else, so reactions can find the team
         await self.bot.signup_service.add_team(
             Team(
                 canonical_name=canonical_name,
                 team_name=team_name,
-                members=[member.id for member in members],
+                members=tuple(member.id for member in members),
                 signup_pending=True,
                 signup_message_id=msg.id,
             )
         )
+        await rest.submit(lambda: msg.add_reaction("✅"), route="reactions")
+        await rest.submit(lambda: msg.add_reaction("⛔"), route="reactions")
+
+        for m in members:
+            # not awaited: members get their copy once the queue reaches it
+            rest.submit(lambda m=m: self._forward_signup(msg, m), Priority.DM, "dm")
+
+        await self.bot.followup(interaction, "✅ Succesfully signed-up.")
 
-        await interaction.followup.send("✅ Succesfully signed-up.")
+    @staticmethod
+    async def _forward_signup(
+        msg: discord.Message, member: discord.Member | discord.User
+    ) -> None:
+        try:
+            await msg.forward(member)
+            await member.send(
+                "*Your signup message needs 4 ✅ reactions, one from each team member to be approved!*"
+            )
+        except:  # noqa: E722
+            pass
 
     @commands.Cog.listener(name="on_raw_reaction_add")
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
-        channel = self.bot.get_channel(payload.channel_id)
-        message = await channel.fetch_message(payload.message_id)
-        user = self.bot.get_user(payload.user_id)
-        if not user:
-            user = await self.bot.fetch_user(payload.user_id)
         if (
-            not (message.guild and message.guild.id in self.bot.settings.allowed_guilds)
-        ) or user.bot:
+            payload.guild_id not in self.bot.settings.allowed_guilds
+            or payload.user_id == self.bot.user.id
+        ):
             return
+        self.reactions.add(payload.message_id, payload)
+
+    async def _evaluate_reactions(
+        self, message_id: int, payloads: List[discord.RawReactionActionEvent]
+    ) -> None:
+        """Handles a burst of reactions on one message with a single fetch.
+        Runs at most once at a time per message (see ``KeyedBatcher``)."""
+        channel = self.bot.get_channel(payloads[0].channel_id)
+        message = await channel.fetch_message(message_id)
 
         team = await self.bot.signup_service.get_team_for_signup_message(message)
         if not team or team.signup_pending is False:
             return
+        if not self.bot.signups_open(message.guild.id):
+            return
 
-        if user.id not in team.members or team.denied_by:
-            return await message.remove_reaction(payload.emoji, user)
-
-        if str(payload.emoji) == "⛔":
-            await self.bot.signup_service.deny_team(team, user)
-
-            if message.embeds:
-                e = message.embeds[0]
-                e.color = self.bot.settings.colors.error_color
-                e.set_footer(
-                    text=f"Denied by {user.name}",
-                    icon_url=self.bot.settings.icon_url,
-                )
-                await message.edit(embed=e)
-            await message.clear_reactions()
-
-            class MockUser:
-                def __init__(self, id):
-                    self.id = id
-
-            desc_lines = []
-            for mid in team.members:
-                member = await message.guild.fetch_member(mid)
-                username = await self.bot.minecraft_link_service.get_minecraft_username(
-                    MockUser(id=mid)
-                )
-                desc_lines.append(
-                    f"<:pr_enter:1370057653606154260> `👤` {member.mention} {username}"
+        rest = self.bot.rest_queue
+        removals = []
+        denied_by = None
+        approved_by_member = False
+        for payload in payloads:
+            user = await self.bot.member_cache.get_user(payload.user_id)
+            if user.bot:
+                continue
+            if user.id not in team.members or team.denied_by:
+                removals.append((payload.emoji, user))
+            elif str(payload.emoji) == "⛔":
+                denied_by = denied_by or user
+            elif str(payload.emoji) == "✅":
+                approved_by_member = True
+
+        if denied_by:
+            await self._remove_reactions(message, removals)
+            if await self.bot.signup_service.deny_team(team, denied_by):
+                await self.apply_denial(
+                    message.guild,
+                    team,
+                    message,
+                    denied_by=denied_by.name,
+                    dm_footer="A teammate denied your signup.",
                 )
+            return
 
-            desc = "\n".join(desc_lines)
-
-            for member_id in team.members:
-                mem = message.guild.get_member(member_id)
-                if not mem:
-                    continue
-                try:
-                    dm_embed = discord.Embed(
-                        title=f"**{team.team_name}** — Signup Denied",
-                        description=desc,
-                        color=self.bot.settings.colors.error_color,
-                    )
-                    dm_embed.set_footer(
-                        text="A teammate denied your signup.",
-                        icon_url=self.bot.settings.icon_url,
-                    )
-                    await mem.send(embed=dm_embed)
-                    await mem.send(f"🔗 Signup was here: {message.jump_url}")
-                except:  # noqa: E722
-                    pass
-
-        elif str(payload.emoji) == "✅":
+        if approved_by_member:
+            raw_users = None
             for r in message.reactions:
                 if r.emoji == "✅":
                     raw_users = r.users()
                     break
 
-            users = [u async for u in raw_users if not u.bot]
+            users = [u async for u in raw_users if not u.bot] if raw_users else []
             reaction_count = len(users)
             if reaction_count == 1:
-                await message.remove_reaction(payload.emoji, self.bot.user)
+                removals.append(("✅", self.bot.user))
             for u in users:
                 if u.id not in team.members:
-                    await message.remove_reaction(payload.emoji, u)
+                    removals.append(("✅", u))
                     reaction_count -= 1
 
+            await self._remove_reactions(message, removals)
             if reaction_count == 4:
-                try:
-                    await message.clear_reactions()
-                    await message.add_reaction("🟢")
-                except Exception as e:
-                    print(f"Error updating reactions: {e}")
-
-                try:
-                    if message.embeds:
-                        new_embed = message.embeds[0]
-                        new_embed.color = self.bot.settings.colors.finished_color
-                        new_embed.set_footer(
-                            text="Team Approved!", icon_url=self.bot.settings.icon_url
-                        )
-                        await message.edit(embed=new_embed)
-                    else:
-                        await message.reply("Team Approved!")
-                except Exception as e:
-                    print("Error editing message:", e)
-
-                team_role = discord.utils.get(
-                    message.guild.roles, name=f"Team: {team.team_name}"
+                is_substitute = await self.bot.signup_service.approve_team(
+                    await self.bot.tournament_service.get_current_tournament(), team
                 )
-                if not team_role:
-                    try:
-                        team_role = await message.guild.create_role(
-                            name=f"Team: {team.team_name}", mentionable=True
-                        )
-                    except Exception as e:
-                        print("Error creating team role:", e)
+                if is_substitute is None:
+                    return  # approved elsewhere in the meantime
+                await self.apply_approval(message.guild, team, message, is_substitute)
+        else:
+            await self._remove_reactions(message, removals)
 
-                is_substitute = await self.bot.signup_service.approve_team(
-                    await self.bot.tournament_service.get_current_tournament(),
-                    team,
-                    team_role,
+    async def _remove_reactions(
+        self,
+        message: discord.Message,
+        removals: List[tuple[discord.PartialEmoji | str, discord.abc.Snowflake]],
+    ) -> None:
+        # the same user may appear twice, e.g. as a payload and in the count
+        unique = {(str(emoji), user.id): (emoji, user) for emoji, user in removals}
+        for result in await asyncio.gather(
+            *(
+                self.bot.rest_queue.submit(
+                    lambda emoji=emoji, user=user: message.remove_reaction(emoji, user),
+                    route="reactions",
+                )
+                for emoji, user in unique.values()
+            ),
+            return_exceptions=True,
+        ):
+            if isinstance(result, Exception):
+                print("Error removing reaction:", result)
+
+    async def apply_approval(
+        self,
+        guild: discord.Guild,
+        team: Team,
+        message: discord.Message | discord.PartialMessage,
+        is_substitute: bool,
+        team_role: Optional[discord.Role] = None,
+    ) -> Optional[discord.Role]:
+        """Discord side of an approval: marks the signup message, grants the
+        team role (``team_role`` if it was already provisioned, see
+        ``TeamRoleRegistry``) and DMs the members. Every REST call goes
+        through the bot's rest queue. Returns the team role, if any."""
+        rest = self.bot.rest_queue
+        embed = await self._team_embed(
+            team, self.bot.settings.colors.finished_color, "Team Approved!"
+        )
+        for result in await asyncio.gather(
+            rest.submit(
+                lambda: self._replace_reactions(message, "🟢"), route="reactions"
+            ),
+            self.bot.embed_edits.edit(message, embed=embed),
+            return_exceptions=True,
+        ):
+            if isinstance(result, Exception):
+                print("Error updating signup message:", result)
+
+        if team_role is None:
+            team_role = await self.bot.team_roles.resolve(guild, team)
+        if team_role is None:
+            return None
+
+        dm = (
+            f"Your team **{team.team_name}** has been **accepted**!\n"
+            f"You now have the role {team_role.mention}."
+        )
+        roles = [team_role]
+        if is_substitute:
+            dm += "\nBecause the maximum number of teams has been reached, you are now a **substitute**. We will contact you if you will play!\n"
+            substitute_role = self._substitute_role(guild)
+            if substitute_role:
+                roles.append(substitute_role)
+
+        await asyncio.gather(
+            *(
+                self._grant_team_role(guild, member_id, roles, dm)
+                for member_id in team.members
+            )
+        )
+        return team_role
+
+    def _substitute_role(self, guild: discord.Guild) -> Optional[discord.Role]:
+        role_id = self.bot.settings.substitute_role_id
+        return guild.get_role(role_id) if role_id else None
+
+    async def _grant_team_role(
+        self,
+        guild: discord.Guild,
+        member_id: int,
+        roles: List[discord.Role],
+        dm: str,
+    ) -> None:
+        mem = await self.bot.member_cache.get_member(guild, member_id)
+        if mem is None:
+            return
+        try:
+            await self.bot.rest_queue.submit(
+                lambda: mem.add_roles(*roles), route="roles"
+            )
+        except Exception as e:
+            print("Error adding role:", e)
+        try:
+            await self.bot.rest_queue.submit(
+                lambda: mem.send(dm), Priority.DM, route="dm"
+            )
+        except Exception as e:
+            print("Error sending DM:", e)
+
+    async def apply_denial(
+        self,
+        guild: discord.Guild,
+        team: Team,
+        message: discord.Message | discord.PartialMessage,
+        denied_by: str,
+        dm_footer: str,
+    ) -> None:
+        """Discord side of a denial: marks the signup message, takes away
+        the team role of an approved team and DMs the members, all through
+        the bot's rest queue."""
+        rest = self.bot.rest_queue
+        embed = await self._team_embed(
+            team, self.bot.settings.colors.error_color, f"Denied by {denied_by}"
+        )
+        for result in await asyncio.gather(
+            self.bot.embed_edits.edit(message, embed=embed),
+            rest.submit(message.clear_reactions, route="reactions"),
+            return_exceptions=True,
+        ):
+            if isinstance(result, Exception):
+                print("Error updating signup message:", result)
+
+        desc_lines = [
+            f"<:pr_enter:1370057653606154260> `👤` <@{mid}> {await self._ign(mid)}"
+            for mid in team.members
+        ]
+        dm_embed = discord.Embed(
+            title=f"**{team.team_name}** — Signup Denied",
+            description="\n".join(desc_lines),
+            color=self.bot.settings.colors.error_color,
+        )
+        dm_embed.set_footer(text=dm_footer, icon_url=self.bot.settings.icon_url)
+
+        await asyncio.gather(
+            self.revoke_team_roles(guild, team),
+            *(
+                self._send_denial(guild, member_id, dm_embed, message.jump_url)
+                for member_id in team.members
+            ),
+        )
+
+    async def revoke_team_roles(self, guild: discord.Guild, team: Team) -> None:
+        """Takes the team role and the substitute role away from the members
+        of a team that is no longer approved."""
+        if team.approved_at is None:
+            # never approved, so never given the roles
+            return
+        roles = [
+            role
+            for role in (
+                self.bot.team_roles.get(guild, team),
+                self._substitute_role(guild),
+            )
+            if role is not None
+        ]
+        if roles:
+            await asyncio.gather(
+                *(
+                    self._revoke_member_roles(guild, member_id, roles)
+                    for member_id in team.members
                 )
+            )
 
-                for member_id in team.members:
-                    mem = message.guild.get_member(member_id)
-                    if mem is None:
-                        mem = await message.guild.fetch_member(member_id)
-                    if team_role:
-                        try:
-                            await mem.add_roles(team_role)
-                        except Exception as e:
-                            print("Error adding role:", e)
-                        try:
-                            await mem.send(
-                                f"Your team **{team.team_name}** has been **accepted**!\n"
-                                f"You now have the role {team_role.mention}."
-                                f"\nBecause the maximum number of teams has been reached, you are now a **substitute**. We will contact you if you will play!\n"
-                                if is_substitute
-                                else ""
-                            )
-                        except Exception as e:
-                            print("Error sending DM:", e)
+    async def _revoke_member_roles(
+        self, guild: discord.Guild, member_id: int, roles: List[discord.Role]
+    ) -> None:
+        mem = await self.bot.member_cache.get_member(guild, member_id)
+        if mem is None:
+            return
+        # cached members do not see roles added since they were fetched, so
+        # remove all of them; Discord ignores roles the member does not have
+        try:
+            await self.bot.rest_queue.submit(
+                lambda: mem.remove_roles(*roles), route="roles"
+            )
+        except Exception as e:
+            print("Error removing team role:", e)
+
+    async def _send_denial(
+        self,
+        guild: discord.Guild,
+        member_id: int,
+        dm_embed: discord.Embed,
+        jump_url: str,
+    ) -> None:
+        mem = await self.bot.member_cache.get_member(guild, member_id)
+        if not mem:
+            return
+
+        async def send():
+            await mem.send(embed=dm_embed)
+            await mem.send(f"🔗 Signup was here: {jump_url}")
+
+        try:
+            await self.bot.rest_queue.submit(send, Priority.DM, route="dm")
+        except:  # noqa: E722
+            pass
+
+    def schedule_promotions(self, teams: List[Team]) -> None:
+        """Runs ``apply_promotion`` for each team in the background; the
+        promotion itself is already stored when this is called."""
+        for team in teams:
+            task = asyncio.create_task(self.apply_promotion(team))
+            self._promotions.add(task)
+            task.add_done_callback(self._promotions.discard)
+
+    async def apply_promotion(self, team: Team) -> None:
+        """Discord side of promoting a substitute: swaps the substitute
+        role, DMs the members and announces it in the subs channel."""
+        channels = self.bot.settings.channels
+        signup_chan = self.bot.get_channel(channels.signup_channel_id)
+        if signup_chan is None:
+            return
+        guild = signup_chan.guild
+        substitute_role = self._substitute_role(guild)
+        dm = (
+            f"A spot opened up: your team **{team.team_name}** has been promoted "
+            "from substitute and is now **playing** in the tournament!"
+        )
+        await asyncio.gather(
+            *(
+                self._promote_member(guild, member_id, substitute_role, dm)
+                for member_id in team.members
+            )
+        )
+
+        subs_chan = self.bot.get_channel(channels.subs_channel_id)
+        if subs_chan is None:
+            return
+        embed = await self._team_embed(
+            team, self.bot.settings.colors.finished_color, "Promoted from substitute"
+        )
+        embed.add_field(
+            name="Signup",
+            value=signup_chan.get_partial_message(team.signup_message_id).jump_url,
+        )
+        try:
+            await self.bot.rest_queue.submit(
+                lambda: subs_chan.send(embed=embed), route="message_send"
+            )
+        except discord.HTTPException as e:
+            print(f"Error announcing promotion of {team.team_name}: {e}")
+
+    async def _promote_member(
+        self,
+        guild: discord.Guild,
+        member_id: int,
+        substitute_role: Optional[discord.Role],
+        dm: str,
+    ) -> None:
+        mem = await self.bot.member_cache.get_member(guild, member_id)
+        if mem is None:
+            return
+        if substitute_role:
+            try:
+                await self.bot.rest_queue.submit(
+                    lambda: mem.remove_roles(substitute_role), route="roles"
+                )
+            except Exception as e:
+                print("Error removing substitute role:", e)
+        try:
+            await self.bot.rest_queue.submit(
+                lambda: mem.send(dm), Priority.DM, route="dm"
+            )
+        except Exception as e:
+            print("Error sending DM:", e)
+
+    async def apply_lock(
+        self, team: Team, message: discord.Message | discord.PartialMessage
+    ) -> None:
+        """Freezes a signup message that was still pending when signups
+        closed. The team stays pending so admins can still review it."""
+        embed = await self._team_embed(
+            team,
+            self.bot.settings.colors.error_color,
+            "Signups closed before this team was approved",
+        )
+        for result in await asyncio.gather(
+            self.bot.embed_edits.edit(message, embed=embed),
+            self.bot.rest_queue.submit(message.clear_reactions, route="reactions"),
+            return_exceptions=True,
+        ):
+            if isinstance(result, Exception):
+                print("Error locking signup message:", result)
+
+    @staticmethod
+    async def _replace_reactions(
+        message: discord.Message | discord.PartialMessage, emoji: str
+    ) -> None:
+        await message.clear_reactions()
+        await message.add_reaction(emoji)
+
+    async def _ign(self, member_id: int) -> Optional[str]:
+        ign = self.bot.signup_service.snapshot.igns.get(member_id)
+        if ign is None:
+            ign = await self.bot.minecraft_link_service.get_minecraft_username(
+                discord.Object(id=member_id)
+            )
+        return ign
+
+    async def _team_embed(
+        self, team: Team, color: discord.Color, footer: str
+    ) -> discord.Embed:
+        """Rebuilds a team's signup embed, so it can be edited without
+        fetching the signup message first."""
+        lines = [
+            f"<:pr_enter:1361851517942104085> `👤` <@{m}> {await self._ign(m)}"
+            for m in team.members
+        ]
+        embed = discord.Embed(
+            title=f"**{team.team_name}**",
+            description="\n".join(lines),
+            color=color,
+        )
+        embed.set_footer(text=footer, icon_url=self.bot.settings.icon_url)
+        return embed
 
     @commands.Cog.listener(name="on_raw_reaction_remove")
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
@@ -297,6 +590,8 @@ class SignupCog(commands.Cog):
         team = await self.bot.signup_service.get_team_for_signup_message(message)
         if not team or team.signup_pending is False:
             return
+        if not self.bot.signups_open(payload.guild_id):
+            return
 
         emoji = payload.emoji
         found = False
@@ -339,6 +634,7 @@ class SignupCog(commands.Cog):
 
         return embed
 
+    @staticmethod
     async def send_team_signup_dm(
         user: discord.User, approved: bool, reason: str = None
     ):
@@ -0,0 +1,104 @@
+from bot import HorizonBot
+from discord import app_commands
+from discord.ext import commands
+import discord
+
+
+class StatsCog(commands.Cog):
+    def __init__(self, bot: HorizonBot):
+        self.bot: HorizonBot = bot
+
+    @app_commands.command(
+        name="stats",
+        description="Show bot health and throughput",
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def stats(self, interaction: discord.Interaction) -> None:
+        embed = discord.Embed(
+            title="**Bot Stats**",
+            description=f"Gateway events: **{self.bot.gateway_events.rate():.1f}/s**",
+            color=self.bot.settings.colors.default_color,
+        )
+
+        for shard in self.bot.shard_stats():
+            embed.add_field(
+                name=f"Shard {shard['shard_id']}",
+                value=(
+                    f"Status: {shard['status']}\n"
+                    f"Latency: {shard['latency_ms']:.0f} ms\n"
+                    f"Messages: {shard['messages_per_second']:.1f}/s\n"
+                    f"Buffered: {shard['buffered']} | Flushed: {shard['flushed']}"
+                    + (f" | Dropped: {shard['dropped']}" if shard["dropped"] else "")
+                ),
+            )
+
+        writer = self.bot.message_service.storage_stats()
+        if writer:
+            embed.add_field(
+                name="Message Writer",
+                value="\n".join(f"{key}: {value}" for key, value in writer.items()),
+                inline=False,
+            )
+
+        edits = self.bot.embed_edits.stats()
+        embed.add_field(
+            name="REST Queue",
+            value="\n".join(
+                [
+                    f"{name}: {c['queued']} queued, {c['in_flight']} running, "
+                    f"wait {c['avg_wait_ms']:.0f}/{c['p95_wait_ms']:.0f} ms (avg/p95)"
+                    for name, c in self.bot.rest_queue.stats().items()
+                ]
+                + [f"embed edits: {edits['sent']} sent for {edits['requested']}"]
+            ),
+            inline=False,
+        )
+
+        admission = self.bot.admission.stats()
+        if admission:
+            embed.add_field(
+                name="Admission",
+                value="\n".join(
+                    f"/{command}: {c['in_flight']} running, {c['queued']} queued, "
+                    f"wait {c['p95_wait_ms']:.0f} ms (p95), rejected "
+                    + ", ".join(f"{n} {reason}" for reason, n in c["rejected"].items())
+                    for command, c in admission.items()
+                ),
+                inline=False,
+            )
+
+        refresh = self.bot.link_refresh_service.stats()
+        hypixel = self.bot.hypixel_service.stats()
+        embed.add_field(
+            name="Linked Accounts",
+            value=(
+                f"Refreshed: {refresh['refreshed']} | Renamed: {refresh['renamed']}\n"
+                f"Hypixel cache: {hypixel['hit_rate']:.0%} hits | "
+                f"Fetches: {hypixel['fetches']}"
+            ),
+            inline=False,
+        )
+
+        memory = self.bot.memory_stats()
+        member_lru = memory["member_lru"]
+        link_cache = memory["link_cache"]
+        embed.add_field(
+            name="Memory",
+            value=(
+                f"RSS: {memory['rss_mb']:.1f} MB\n"
+                f"Users: {memory['cached_users']} | Members: {memory['cached_members']}\n"
+                f"Messages: {memory['cached_messages']}\n"
+                f"Member LRU: {member_lru['size']}/{member_lru['max_size']} "
+                f"({member_lru['hit_rate']:.0%} hits)\n"
+                f"Link cache: {link_cache['size']}/{link_cache['max_size']} "
+                f"({link_cache['hit_rate']:.0%} hits)"
+            ),
+            inline=False,
+        )
+
+        embed.set_footer(text="Horizon Bot", icon_url=self.bot.settings.icon_url)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot: HorizonBot):
+    await bot.add_cog(StatsCog(bot))
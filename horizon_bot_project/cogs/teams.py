@@ -0,0 +1,271 @@
+import asyncio
+from enum import Enum
+from typing import Awaitable, Dict, List, Optional, Tuple
+from bot import HorizonBot
+from discord import app_commands
+from discord.ext import commands
+import discord
+
+from hbp_types.team import Team, TeamStatus
+from services.rest import Priority
+
+TEAMS_PER_PAGE = 10
+PROGRESS_INTERVAL = 2.0
+
+STATUS_ICONS = {
+    TeamStatus.PENDING: "🕒",
+    TeamStatus.APPROVED: "🟢",
+    TeamStatus.DENIED: "⛔",
+}
+
+
+class ReviewAction(str, Enum):
+    APPROVE = "approve"
+    DENY = "deny"
+
+
+# statuses a team must have for the action to apply
+REVIEWABLE = {
+    ReviewAction.APPROVE: {TeamStatus.PENDING},
+    ReviewAction.DENY: {TeamStatus.PENDING, TeamStatus.APPROVED},
+}
+
+
+class TeamsPaginator(discord.ui.View):
+    def __init__(self, cog: "TeamsCog", status: Optional[TeamStatus], page: int = 0):
+        super().__init__(timeout=300)
+        self.cog = cog
+        self.status = status
+        self.page = page
+
+    def render(self) -> discord.Embed:
+        embed, page_count = self.cog.get_page(self.status, self.page)
+        self.page = min(self.page, page_count - 1)
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= page_count - 1
+        return embed
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        self.page += 1
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+
+class TeamsCog(commands.Cog):
+    def __init__(self, bot: HorizonBot):
+        self.bot: HorizonBot = bot
+        # rendered pages, valid for one snapshot version
+        self._pages: Dict[
+            Tuple[Optional[TeamStatus], int], Tuple[discord.Embed, int]
+        ] = {}
+        self._pages_version = -1
+
+    @app_commands.command(
+        name="teams",
+        description="List signed-up teams",
+    )
+    @app_commands.describe(status="Only show teams with this status")
+    @app_commands.default_permissions(administrator=True)
+    async def teams(
+        self,
+        interaction: discord.Interaction,
+        status: Optional[TeamStatus] = None,
+    ) -> None:
+        view = TeamsPaginator(self, status)
+        await interaction.response.send_message(
+            embed=view.render(), view=view, ephemeral=True
+        )
+
+    @app_commands.command(
+        name="review_teams",
+        description="Approve or deny several teams at once",
+    )
+    @app_commands.describe(
+        action="What to do with the selected teams",
+        teams="Comma-separated team names (default: every team with the given status)",
+        status="Status of the teams to select when no names are given (default: pending)",
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def review_teams(
+        self,
+        interaction: discord.Interaction,
+        action: ReviewAction,
+        teams: Optional[str] = None,
+        status: Optional[TeamStatus] = None,
+    ) -> None:
+        await interaction.response.defer(thinking=True, ephemeral=True)
+
+        signup_service = self.bot.signup_service
+        if teams:
+            selected = []
+            for name in teams.split(","):
+                team = signup_service.snapshot.teams.get(
+                    signup_service.normalize_team_name(name.strip())
+                )
+                if team is None:
+                    return await interaction.followup.send(
+                        f"❌ No team named **{name.strip()}**."
+                    )
+                selected.append(team)
+        else:
+            selected = signup_service.snapshot.teams_with_status(
+                status or TeamStatus.PENDING
+            )
+        # a team listed twice is reviewed once
+        selected = list({t.canonical_name: t for t in selected}.values())
+        selected = [t for t in selected if t.status in REVIEWABLE[action]]
+        if not selected:
+            return await interaction.followup.send("❌ No matching teams to review.")
+
+        signup_chan = interaction.guild.get_channel(
+            self.bot.settings.channels.signup_channel_id
+        )
+        if not signup_chan:
+            return await interaction.followup.send("❌ Signup channel not found.")
+        signup_cog = self.bot.get_cog("SignupCog")
+
+        if action == ReviewAction.APPROVE:
+            results = await signup_service.bulk_approve_teams(
+                await self.bot.tournament_service.get_current_tournament(), selected
+            )
+            # teams approved concurrently (e.g. by reactions) are skipped
+            approved = [(t, sub) for t, sub in zip(selected, results) if sub is not None]
+            selected = [team for team, _ in approved]
+            substitutes = [is_substitute for _, is_substitute in approved]
+            # one batch of role requests and a single write for their ids
+            roles = await self.bot.team_roles.provision(interaction.guild, selected)
+            await self._run_with_progress(
+                interaction,
+                "Approving",
+                [
+                    signup_cog.apply_approval(
+                        interaction.guild,
+                        team,
+                        signup_chan.get_partial_message(team.signup_message_id),
+                        is_substitute,
+                        roles.get(team.canonical_name),
+                    )
+                    for team, is_substitute in zip(selected, substitutes)
+                ],
+            )
+            summary = f"✅ Approved **{len(selected)}** teams"
+            if any(substitutes):
+                summary += f" ({sum(substitutes)} substitutes)"
+        else:
+            applied = await signup_service.bulk_deny_teams(selected, interaction.user)
+            selected = [team for team, denied in zip(selected, applied) if denied]
+            await self._run_with_progress(
+                interaction,
+                "Denying",
+                [
+                    signup_cog.apply_denial(
+                        interaction.guild,
+                        team,
+                        signup_chan.get_partial_message(team.signup_message_id),
+                        denied_by=interaction.user.name,
+                        dm_footer="An admin denied your signup.",
+                    )
+                    for team in selected
+                ],
+            )
+            summary = f"✅ Denied **{len(selected)}** teams"
+
+        await self.bot.rest_queue.submit(
+            lambda: interaction.edit_original_response(content=summary + "."),
+            Priority.INTERACTION,
+            route="interaction",
+        )
+
+    async def _run_with_progress(
+        self,
+        interaction: discord.Interaction,
+        label: str,
+        jobs: List[Awaitable],
+    ) -> list:
+        done = 0
+
+        async def track(job: Awaitable):
+            nonlocal done
+            try:
+                return await job
+            except Exception as e:
+                print(f"Error while {label.lower()} team: {e}")
+                return None
+            finally:
+                done += 1
+
+        task = asyncio.gather(*(track(job) for job in jobs))
+        while not task.done():
+            await asyncio.wait({task}, timeout=PROGRESS_INTERVAL)
+            if not task.done():
+                try:
+                    await self.bot.rest_queue.submit(
+                        lambda: interaction.edit_original_response(
+                            content=f"⏳ {label} teams… {done}/{len(jobs)}"
+                        ),
+                        Priority.INTERACTION,
+                        route="interaction",
+                    )
+                except discord.HTTPException:
+                    pass
+        return task.result()
+
+    def get_page(
+        self, status: Optional[TeamStatus], page: int
+    ) -> Tuple[discord.Embed, int]:
+        snapshot = self.bot.signup_service.snapshot
+        if self._pages_version != snapshot.version:
+            self._pages.clear()
+            self._pages_version = snapshot.version
+
+        key = (status, page)
+        cached = self._pages.get(key)
+        if cached is None:
+            teams = snapshot.teams_with_status(status)
+            page_count = max(1, -(-len(teams) // TEAMS_PER_PAGE))
+            embed = self._render_page(
+                status, teams, min(page, page_count - 1), page_count
+            )
+            cached = self._pages[key] = (embed, page_count)
+        return cached
+
+    def _render_page(
+        self,
+        status: Optional[TeamStatus],
+        teams: List[Team],
+        page: int,
+        page_count: int,
+    ) -> discord.Embed:
+        igns = self.bot.signup_service.snapshot.igns
+        start = page * TEAMS_PER_PAGE
+        lines = []
+        for team in teams[start : start + TEAMS_PER_PAGE]:
+            members = ", ".join(igns.get(m, f"<@{m}>") for m in team.members)
+            lines.append(
+                f"{STATUS_ICONS[team.status]} **{team.team_name}** — {members}"
+            )
+
+        title = f"{status.value.capitalize()} Teams" if status else "Teams"
+        embed = discord.Embed(
+            title=f"**{title}** ({len(teams)})",
+            description="\n".join(lines) or "No teams found.",
+            color=self.bot.settings.colors.default_color,
+        )
+        embed.set_footer(
+            text=f"Page {page + 1}/{page_count}",
+            icon_url=self.bot.settings.icon_url,
+        )
+        return embed
+
+
+async def setup(bot: HorizonBot):
+    await bot.add_cog(TeamsCog(bot))
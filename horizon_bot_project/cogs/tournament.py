@@ -52,17 +52,19 @@ class TournamentCog(commands.Cog):
         tournament_start_date = datetime(*struct_time[:6])
 
         try:
-            await self.bot.tournament_service.create_tournament(
-                Tournament(
-                    tournament_id=-1,  # Placeholder, will be set by the database
-                    tournament_name=name,
-                    signups_close_date=signups_close_date,
-                    tournament_start_date=tournament_start_date,
-                    team_count=team_count,
-                    team_size=team_size,
-                )
+            tournament = Tournament(
+                tournament_id=-1,  # Placeholder, will be set by the database
+                tournament_name=name,
+                signups_close_date=signups_close_date,
+                tournament_start_date=tournament_start_date,
+                team_count=team_count,
+                team_size=team_size,
             )
-            await self.bot.signup_service.clear_and_backup()
+            await self.bot.tournament_service.create_tournament(tournament)
+            await self.bot.signup_service.switch_tournament(tournament.tournament_id)
+            for guild_id in self.bot.settings.allowed_guilds:
+                await self.bot.signup_service.set_signups_closed(guild_id, False)
+            await self.bot.deadline_scheduler.reschedule()
             return await interaction.response.send_message(
                 f"✅ Tournament **{name}** created successfully! Sign-ups close on <t:{int(signups_close_date.timestamp())}:F> and the tournament starts on <t:{int(tournament_start_date.timestamp())}:F>.",
                 ephemeral=True,
@@ -1,11 +1,20 @@
+import asyncio
+from collections import Counter
+import csv
+import io
+from typing import List
 from bot import HorizonBot
 from discord import app_commands
 from discord.ext import commands
 import discord
 
+from services.admission import admitted
+from services.rest import Priority
 from services.minecraft import (
     DiscordTagMismatch,
     DiscordTagNotFound,
+    ImportRow,
+    ImportStatus,
 )
 from minecraft import mojang
 
@@ -19,6 +28,7 @@ class VerifyCog(commands.Cog):
         description="Link your Minecraft account to your Discord account.",
     )
     @app_commands.describe(username="Minecraft username")
+    @admitted("verify")
     async def verify(self, interaction: discord.Interaction, username: str) -> None:
         await interaction.response.defer(thinking=True, ephemeral=True)
 
@@ -59,6 +69,110 @@ class VerifyCog(commands.Cog):
                 f"✅ Successfully linked your account to **{username}**!"
             )
 
+    @app_commands.command(
+        name="verify_import",
+        description="Link many accounts at once from a CSV of Discord IDs and IGNs.",
+    )
+    @app_commands.describe(file="CSV file with one `discord_id,ign` pair per line")
+    @app_commands.default_permissions(administrator=True)
+    @admitted("verify_import")
+    async def verify_import(
+        self, interaction: discord.Interaction, file: discord.Attachment
+    ) -> None:
+        await interaction.response.defer(thinking=True, ephemeral=True)
+
+        try:
+            text = (await file.read()).decode("utf-8-sig")
+        except (discord.HTTPException, UnicodeDecodeError):
+            return await interaction.followup.send("❌ Could not read that file.")
+
+        rows = await self._parse_import(interaction.guild, text)
+        if not rows:
+            return await interaction.followup.send("❌ The file has no rows.")
+
+        settings = self.bot.settings
+        await self.bot.minecraft_link_service.import_links(
+            rows,
+            concurrency=settings.link_import_concurrency,
+            max_per_second=settings.link_import_max_per_second,
+        )
+
+        report = io.StringIO()
+        writer = csv.writer(report)
+        writer.writerow(["line", "discord_id", "ign", "status", "detail"])
+        for row in rows:
+            writer.writerow(
+                [
+                    row.line,
+                    row.discord_id,
+                    row.canonical_ign or row.ign,
+                    row.status.value,
+                    row.detail,
+                ]
+            )
+
+        counts = Counter(row.status for row in rows)
+        summary = ", ".join(
+            f"{status.value}: **{count}**" for status, count in counts.most_common()
+        )
+        await self.bot.followup(
+            interaction,
+            f"✅ Processed **{len(rows)}** rows — {summary}",
+            file=discord.File(
+                io.BytesIO(report.getvalue().encode()), filename="verify_import.csv"
+            ),
+        )
+
+    async def _parse_import(self, guild: discord.Guild, text: str) -> List[ImportRow]:
+        rows: List[ImportRow] = []
+        seen_ids, seen_igns = set(), set()
+        for line, fields in enumerate(csv.reader(io.StringIO(text)), start=1):
+            fields = [f.strip() for f in fields]
+            if not any(fields):
+                continue
+            if line == 1 and fields and not fields[0].isdigit():
+                continue  # header
+
+            row = ImportRow(
+                line=line,
+                discord_id=fields[0],
+                ign=fields[1] if len(fields) > 1 else "",
+            )
+            rows.append(row)
+            if len(fields) != 2 or not row.discord_id.isdigit() or not row.ign:
+                row.status = ImportStatus.INVALID_ROW
+            elif row.discord_id in seen_ids or row.ign.lower() in seen_igns:
+                row.status = ImportStatus.DUPLICATE
+            else:
+                seen_ids.add(row.discord_id)
+                seen_igns.add(row.ign.lower())
+
+        await asyncio.gather(
+            *(self._resolve_member(guild, row) for row in rows if row.status is None)
+        )
+        return rows
+
+    async def _resolve_member(self, guild: discord.Guild, row: ImportRow) -> None:
+        member_cache = self.bot.member_cache
+        member_id = int(row.discord_id)
+        row.member = member_cache.cached_member(guild, member_id)
+        if row.member is not None:
+            return
+        # uncached members are fetched concurrently, within the "members"
+        # route budget so a large import does not hold up other REST calls
+        try:
+            row.member = await self.bot.rest_queue.submit(
+                lambda: member_cache.get_member(guild, member_id),
+                Priority.UPDATE,
+                route="members",
+            )
+        except discord.HTTPException as e:
+            row.status = ImportStatus.ERROR
+            row.detail = f"could not fetch member: {e}"
+            return
+        if row.member is None:
+            row.status = ImportStatus.MEMBER_NOT_FOUND
+
 
 async def setup(bot: HorizonBot):
     await bot.add_cog(VerifyCog(bot))
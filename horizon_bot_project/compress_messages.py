@@ -0,0 +1,139 @@
+"""Compresses the content of stored messages and message edits with a
+trained zlib dictionary.
+
+Rows are rewritten in chunks of one transaction each, so this can run next
+to the bot. Rows already compressed with the newest dictionary are skipped;
+``--retrain`` trains a new dictionary first and recompresses everything.
+Set ``message_compression`` in config.json to compress new messages too.
+
+    python horizon_bot_project/compress_messages.py [--db messages.db] [--retrain]
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import time
+from datetime import datetime
+
+from storage.compression import (
+    INSERT_DICTIONARY_SQL,
+    MIN_TRAINING_MESSAGES,
+    SELECT_DICTIONARIES_SQL,
+    MessageCompressor,
+    train_dictionary,
+)
+from storage.sqlite import SQLiteMessageStorage
+
+
+def train(
+    db: sqlite3.Connection,
+    compressor: MessageCompressor,
+    dictionary_size: int,
+    samples: int,
+) -> bool:
+    rows = db.execute(
+        "SELECT content, content_dict FROM messages ORDER BY id DESC LIMIT ?",
+        (samples,),
+    ).fetchall()
+    if len(rows) < MIN_TRAINING_MESSAGES:
+        print(
+            f"Only {len(rows)} messages stored, "
+            f"at least {MIN_TRAINING_MESSAGES} are needed to train a dictionary."
+        )
+        return False
+    dictionary = train_dictionary(
+        (compressor.decompress(*row) for row in rows), dictionary_size
+    )
+    with db:
+        db.execute(
+            INSERT_DICTIONARY_SQL, (dictionary, len(rows), datetime.now().isoformat())
+        )
+    compressor.add_dictionaries(
+        db.execute(SELECT_DICTIONARIES_SQL, (compressor.newest_dict_id,))
+    )
+    print(f"Trained dictionary {compressor.dict_id} ({len(dictionary)} bytes).")
+    return True
+
+
+def stored_size(content) -> int:
+    return len(content.encode()) if isinstance(content, str) else len(content)
+
+
+def compress_table(
+    db: sqlite3.Connection, table: str, compressor: MessageCompressor, chunk_size: int
+) -> None:
+    total = db.execute(
+        f"SELECT COUNT(*) FROM {table} "
+        "WHERE content IS NOT NULL AND content_dict IS NOT ?",
+        (compressor.dict_id,),
+    ).fetchone()[0]
+    done = before = after = 0
+    last_id = 0
+    start = time.perf_counter()
+    while True:
+        rows = db.execute(
+            f"""
+            SELECT id, content, content_dict FROM {table}
+            WHERE id > ? AND content IS NOT NULL AND content_dict IS NOT ?
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, compressor.dict_id, chunk_size),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row_id, content, content_dict in rows:
+            text = compressor.decompress(content, content_dict)
+            compressed, new_dict = compressor.compress(text)
+            before += stored_size(content)
+            after += stored_size(compressed)
+            updates.append((compressed, new_dict, row_id))
+        with db:
+            db.executemany(
+                f"UPDATE {table} SET content = ?, content_dict = ? WHERE id = ?",
+                updates,
+            )
+        last_id = rows[-1][0]
+        done += len(rows)
+        print(f"{table}: {done}/{total} rows, {before} -> {after} bytes")
+
+    elapsed = time.perf_counter() - start
+    ratio = before / after if after else 1.0
+    print(f"Compressed {done} rows of {table} in {elapsed:.1f}s ({ratio:.2f}x).")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default="messages.db", help="messages database")
+    parser.add_argument(
+        "--chunk-size", type=int, default=2000, help="rows per transaction"
+    )
+    parser.add_argument("--dictionary-size", type=int, default=32768)
+    parser.add_argument(
+        "--samples", type=int, default=5000, help="messages to train on"
+    )
+    parser.add_argument(
+        "--retrain", action="store_true", help="train a new dictionary first"
+    )
+    parser.add_argument(
+        "--vacuum", action="store_true", help="give the freed space back to the OS"
+    )
+    args = parser.parse_args()
+
+    # adds the compression column and dictionary table to older databases
+    asyncio.run(SQLiteMessageStorage(args.db)._initialize_database())
+    db = sqlite3.connect(args.db)
+    compressor = MessageCompressor(db.execute(SELECT_DICTIONARIES_SQL, (0,)))
+    if compressor.dict_id is None or args.retrain:
+        if not train(db, compressor, args.dictionary_size, args.samples):
+            return
+    for table in ("messages", "message_revisions"):
+        compress_table(db, table, compressor, args.chunk_size)
+    if args.vacuum:
+        db.execute("VACUUM")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
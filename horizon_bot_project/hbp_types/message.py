@@ -0,0 +1,69 @@
+from typing import Iterable, List, NamedTuple, Optional
+
+import discord
+
+
+class MessageRecord(NamedTuple):
+    """The stored fields of a message, taken at ingest so buffers do not
+    keep ``discord.Message`` objects (and their author, embeds, ...) alive.
+    Being a tuple, it is also the row inserted into the messages table."""
+
+    message_id: str
+    author_id: str
+    content: str
+    timestamp: str
+
+    @classmethod
+    def from_message(cls, message: discord.Message) -> "MessageRecord":
+        return cls(
+            str(message.id),
+            str(message.author.id),
+            message.content,
+            message.created_at.isoformat(),
+        )
+
+
+class MessageRevision(NamedTuple):
+    """An edit (``content`` is the new text) or a deletion (a tombstone,
+    ``content`` is ``None``) of a message, stored in its history."""
+
+    message_id: str
+    kind: str
+    content: Optional[str]
+    timestamp: str
+
+    @classmethod
+    def from_edit(
+        cls, payload: discord.RawMessageUpdateEvent
+    ) -> Optional["MessageRevision"]:
+        """``None`` for updates that did not change the text, like embeds
+        being resolved or the message being pinned.
+
+        Such an update of an edited message still carries the time of that
+        edit, so without a cached copy to compare to, the edit is returned
+        again with the same timestamp and storage skips it as already
+        stored."""
+        edited = payload.data.get("edited_timestamp")
+        if not edited:
+            return None
+        edited_at = discord.utils.parse_time(edited)
+        cached = payload.cached_message
+        if cached is not None and (
+            cached.edited_at == edited_at
+            or cached.content == payload.message.content
+        ):
+            return None
+        return cls(
+            str(payload.message_id),
+            "edit",
+            payload.message.content,
+            edited_at.isoformat(),
+        )
+
+    @classmethod
+    def tombstones(cls, message_ids: Iterable[int]) -> List["MessageRevision"]:
+        deleted_at = discord.utils.utcnow().isoformat()
+        return [
+            cls(str(message_id), "delete", None, deleted_at)
+            for message_id in message_ids
+        ]
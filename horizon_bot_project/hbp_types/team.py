@@ -1,14 +1,31 @@
 from dataclasses import dataclass
-from typing import List
+from typing import Tuple
 from datetime import datetime
+from enum import Enum
 
 
-@dataclass
+@dataclass(slots=True)
 class Team:
     canonical_name: str
     team_name: str
-    members: List[int]
+    members: Tuple[int, ...]
     signup_message_id: int
     denied_by: int | None = None
     approved_at: datetime | None = None
     signup_pending: bool = True
+    team_role_id: int | None = None
+    tournament_id: int = 0
+
+    @property
+    def status(self) -> "TeamStatus":
+        if self.denied_by:
+            return TeamStatus.DENIED
+        if self.signup_pending:
+            return TeamStatus.PENDING
+        return TeamStatus.APPROVED
+
+
+class TeamStatus(str, Enum):
+    PENDING = "pending"
+    APPROVED = "approved"
+    DENIED = "denied"
@@ -1,24 +1,35 @@
-from typing import Optional
+from typing import Dict, Optional
 from aiohttp import ClientTimeout
 import aiohttp
-from settings import settings
+import settings as config
 
 
-async def fetch_hypixel_discord_tag(uuid: str) -> Optional[str]:
-    api_key = settings.hypixel_api_key
-    hypixel_url = f"https://api.hypixel.net/player?key={api_key}&uuid={uuid}"
-    fetched_discord_tag = None
+async def fetch_hypixel_social_links(
+    uuid: str, session: Optional[aiohttp.ClientSession] = None
+) -> Dict[str, str]:
+    """The social links of a player, empty if the player has none or has
+    never joined Hypixel."""
+    if session is None:
+        async with aiohttp.ClientSession(timeout=ClientTimeout(total=10)) as session:
+            return await fetch_hypixel_social_links(uuid, session)
 
-    async with aiohttp.ClientSession(timeout=ClientTimeout(total=10)) as sess:
-        async with sess.get(hypixel_url) as resp:
-            if resp.status == 200:
-                result = await resp.json()
-                if result.get("success") and result.get("player"):
-                    links = result["player"].get("socialMedia", {}).get("links", {})
-                    fetched_discord_tag = links.get("DISCORD")
-            else:
-                raise Exception(
-                    f"Failed to fetch data from Hypixel API. Status code: {resp.status}"
-                )
+    api_key = config.settings.hypixel_api_key
+    hypixel_url = f"{config.settings.hypixel_api_url}/player?key={api_key}&uuid={uuid}"
 
-    return fetched_discord_tag
+    async with session.get(hypixel_url) as resp:
+        if resp.status == 200:
+            result = await resp.json()
+            if result.get("success") and result.get("player"):
+                return result["player"].get("socialMedia", {}).get("links", {})
+        else:
+            raise Exception(
+                f"Failed to fetch data from Hypixel API. Status code: {resp.status}"
+            )
+
+    return {}
+
+
+async def fetch_hypixel_discord_tag(
+    uuid: str, session: Optional[aiohttp.ClientSession] = None
+) -> Optional[str]:
+    return (await fetch_hypixel_social_links(uuid, session)).get("DISCORD")
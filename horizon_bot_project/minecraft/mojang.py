@@ -1,8 +1,12 @@
+from typing import Dict, List, Optional
 import aiohttp
+import settings as config
+
+MOJANG_BULK_LIMIT = 10
 
 
 async def is_valid_minecraft_ign(ign: str) -> bool:
-    url = f"https://api.mojang.com/users/profiles/minecraft/{ign}"
+    url = f"{config.settings.mojang_api_url}/users/profiles/minecraft/{ign}"
     timeout = aiohttp.ClientTimeout(total=10)
     async with aiohttp.ClientSession(timeout=timeout) as session:
         try:
@@ -15,7 +19,7 @@ async def is_valid_minecraft_ign(ign: str) -> bool:
 async def fetch_mojang_profile(ign: str) -> tuple[str, str]:
     uuid = None
     canonical_ign = ign
-    mojang_url = f"https://api.mojang.com/users/profiles/minecraft/{ign}"
+    mojang_url = f"{config.settings.mojang_api_url}/users/profiles/minecraft/{ign}"
 
     try:
         timeout = aiohttp.ClientTimeout(total=10)
@@ -36,3 +40,46 @@ async def fetch_mojang_profile(ign: str) -> tuple[str, str]:
         print(f"Error fetching Mojang data for {ign}: {e}")
 
     return uuid, canonical_ign
+
+
+async def fetch_mojang_profiles(
+    igns: List[str], session: Optional[aiohttp.ClientSession] = None
+) -> Dict[str, tuple[str, str]]:
+    """Looks up to ``MOJANG_BULK_LIMIT`` IGNs with one request. Returns
+    ``{ign.lower(): (uuid, canonical_ign)}``; unknown names are left out."""
+    if len(igns) > MOJANG_BULK_LIMIT:
+        raise ValueError(f"At most {MOJANG_BULK_LIMIT} names per request")
+
+    if session is None:
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            return await fetch_mojang_profiles(igns, session)
+
+    bulk_url = f"{config.settings.mojang_api_url}/profiles/minecraft"
+    async with session.post(bulk_url, json=igns) as response:
+        if response.status != 200:
+            raise Exception(
+                f"Failed to fetch profiles from Mojang API. Status code: {response.status}"
+            )
+        profiles = await response.json()
+    return {p["name"].lower(): (p["id"], p["name"]) for p in profiles}
+
+
+async def fetch_mojang_username(
+    uuid: str, session: Optional[aiohttp.ClientSession] = None
+) -> Optional[str]:
+    """Current name of a profile, or None if the profile no longer exists."""
+    if session is None:
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            return await fetch_mojang_username(uuid, session)
+
+    profile_url = f"{config.settings.mojang_session_url}/session/minecraft/profile/{uuid}"
+    async with session.get(profile_url) as response:
+        if response.status in (204, 404):
+            return None
+        if response.status != 200:
+            raise Exception(
+                f"Failed to fetch profile from Mojang API. Status code: {response.status}"
+            )
+        return (await response.json()).get("name")
@@ -0,0 +1,165 @@
+import asyncio
+import functools
+import math
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Set
+
+import discord
+
+from services.stats import WaitStats
+from settings import CommandLimit
+
+
+class AdmissionRejected(Exception):
+    """Raised by ``AdmissionController.admit``; the message is meant for
+    the user."""
+
+
+class _Gate:
+    """Admission state of one command."""
+
+    def __init__(self):
+        self.running = 0
+        self.waiting = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.active_users: Set[int] = set()
+        # user id -> loop time of their last admitted invocation
+        self.last_started: Dict[int, float] = {}
+        self.stats = WaitStats()
+        self.rejected = {"busy": 0, "cooldown": 0, "duplicate": 0}
+
+    def has_slot(self, limit: CommandLimit) -> bool:
+        return self.running < limit.concurrency and not self.waiting
+
+    async def acquire(self, limit: CommandLimit) -> None:
+        if self.has_slot(limit):
+            self.running += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.waiting += 1
+        try:
+            # ``release`` hands its slot over by resolving the waiter
+            await asyncio.wait_for(waiter, limit.max_wait)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # got the slot just as we gave up, pass it on
+                self.release(limit)
+            raise
+        finally:
+            self.waiting -= 1
+
+    def release(self, limit: CommandLimit) -> None:
+        self.running -= 1
+        while self.waiters and self.running < limit.concurrency:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.running += 1
+                waiter.set_result(None)
+
+    def prune(self, now: float, cooldown: float) -> None:
+        self.last_started = {
+            user_id: started
+            for user_id, started in self.last_started.items()
+            if now - started < cooldown
+        }
+
+
+class AdmissionController:
+    """Admission control for expensive commands, configured per command by
+    ``limits()`` (read on every call, so config reloads apply right away).
+
+    A user may run one invocation of a command at a time and has to wait
+    ``cooldown`` seconds between invocations. At most ``concurrency``
+    invocations run at once; others wait in FIFO order for up to
+    ``max_wait`` seconds. Once ``max_queue`` are waiting, or the wait runs
+    out, invocations are rejected as busy, which keeps latency bounded
+    during spikes.
+    """
+
+    def __init__(self, limits: Callable[[], Dict[str, CommandLimit]]):
+        self._limits = limits
+        self._gates: Dict[str, _Gate] = {}
+
+    @asynccontextmanager
+    async def admit(self, command: str, user_id: int) -> AsyncIterator[None]:
+        limit = self._limits().get(command)
+        if limit is None:
+            yield
+            return
+
+        gate = self._gates.setdefault(command, _Gate())
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if user_id in gate.active_users:
+            gate.rejected["duplicate"] += 1
+            raise AdmissionRejected(
+                f"⏳ Your previous `/{command}` is still running."
+            )
+        started = gate.last_started.get(user_id)
+        if started is not None and now - started < limit.cooldown:
+            gate.rejected["cooldown"] += 1
+            raise AdmissionRejected(
+                f"⏳ Please wait {math.ceil(limit.cooldown - (now - started))}s "
+                f"before using `/{command}` again."
+            )
+        if not gate.has_slot(limit) and gate.waiting >= limit.max_queue:
+            gate.rejected["busy"] += 1
+            raise AdmissionRejected(
+                "⚠️ The bot is busy, please try again in a moment."
+            )
+
+        gate.active_users.add(user_id)
+        try:
+            try:
+                await gate.acquire(limit)
+            except asyncio.TimeoutError:
+                gate.rejected["busy"] += 1
+                raise AdmissionRejected(
+                    "⚠️ The bot is busy, please try again in a moment."
+                ) from None
+
+            gate.stats.waits.append(loop.time() - now)
+            if len(gate.last_started) > 1000:
+                gate.prune(now, limit.cooldown)
+            gate.last_started[user_id] = now
+            try:
+                yield
+            finally:
+                gate.stats.completed += 1
+                gate.release(self._limits().get(command, limit))
+        finally:
+            gate.active_users.discard(user_id)
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            command: {
+                **gate.stats.summary(gate.waiting, gate.running),
+                "rejected": dict(gate.rejected),
+            }
+            for command, gate in self._gates.items()
+        }
+
+
+def admitted(command: str):
+    """Runs an app command callback under ``bot.admission`` and answers
+    rejected invocations itself. Must wrap the callback directly, below
+    ``app_commands.command``."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            try:
+                async with self.bot.admission.admit(command, interaction.user.id):
+                    return await func(self, interaction, *args, **kwargs)
+            except AdmissionRejected as e:
+                if interaction.response.is_done():
+                    await interaction.followup.send(str(e), ephemeral=True)
+                else:
+                    await interaction.response.send_message(str(e), ephemeral=True)
+
+        return wrapper
+
+    return decorator
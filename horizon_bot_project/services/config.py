@@ -0,0 +1,78 @@
+import asyncio
+import os
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import settings as config
+
+if TYPE_CHECKING:
+    from bot import HorizonBot
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ConfigWatcher:
+    """Polls the config file and swaps a validated snapshot into the bot.
+
+    Every file change restarts the debounce window, so editors that write
+    in several steps only trigger a single reload once the file settles.
+    """
+
+    def __init__(
+        self,
+        bot: "HorizonBot",
+        path: str = config.CONFIG_PATH,
+        poll_interval: float = 1.0,
+        debounce: float = 2.0,
+    ):
+        self._bot = bot
+        self._path = path
+        self._poll_interval = poll_interval
+        self._debounce = debounce
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_seen = await asyncio.to_thread(_file_signature, self._path)
+        changed_at: Optional[float] = None
+
+        while True:
+            await asyncio.sleep(self._poll_interval)
+            signature = await asyncio.to_thread(_file_signature, self._path)
+            if signature != last_seen:
+                last_seen = signature
+                changed_at = loop.time()
+                continue
+
+            if changed_at is not None and loop.time() - changed_at >= self._debounce:
+                changed_at = None
+                await self.reload()
+
+    async def reload(self) -> bool:
+        new_settings = await asyncio.to_thread(config.reload_config, self._path)
+        if new_settings is None:
+            return False
+        try:
+            await self._bot.apply_settings(new_settings)
+        except Exception as e:
+            print(f"Error applying reloaded config: {e}")
+            return False
+        return True
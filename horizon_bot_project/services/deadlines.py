@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional
+
+import discord
+
+from hbp_types.team import TeamStatus
+from hbp_types.tournament import Tournament
+
+if TYPE_CHECKING:
+    from bot import HorizonBot
+
+# upper bound for one sleep, so wall clock changes are picked up eventually
+MAX_SLEEP = 300.0
+
+
+class DeadlineScheduler:
+    """Closes signups when the current tournament's deadline passes.
+
+    Deadlines live in the tournaments table and the per-guild closed flags in
+    the settings table, so a deadline missed while the bot was offline is
+    handled right after startup.
+    """
+
+    def __init__(self, bot: "HorizonBot"):
+        self._bot = bot
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def reschedule(self) -> None:
+        """Picks up a changed tournament or reopened guilds."""
+        await self.close()
+        self.start()
+
+    async def _run(self) -> None:
+        await self._bot.wait_until_ready()
+        while True:
+            tournament = await self._bot.tournament_service.get_current_tournament()
+            guild_ids = [
+                guild_id
+                for guild_id in self._bot.settings.allowed_guilds
+                if not self._bot.signup_service.signups_closed(guild_id)
+            ]
+            if tournament is None or not guild_ids:
+                return
+
+            delay = (tournament.signups_close_date - datetime.now()).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(min(delay, MAX_SLEEP))
+                continue
+
+            try:
+                await self.close_signups(tournament, guild_ids)
+            except Exception as e:
+                print(f"Error closing signups: {e}")
+                await asyncio.sleep(MAX_SLEEP)
+
+    async def close_signups(self, tournament: Tournament, guild_ids: List[int]) -> None:
+        signup_service = self._bot.signup_service
+        for guild_id in guild_ids:
+            await signup_service.set_signups_closed(guild_id, True)
+
+        signup_chan = self._bot.get_channel(
+            self._bot.settings.channels.signup_channel_id
+        )
+        pending = signup_service.snapshot.teams_with_status(TeamStatus.PENDING)
+        if signup_chan is not None and pending:
+            signup_cog = self._bot.get_cog("SignupCog")
+            await asyncio.gather(
+                *(
+                    signup_cog.apply_lock(
+                        team, signup_chan.get_partial_message(team.signup_message_id)
+                    )
+                    for team in pending
+                ),
+                return_exceptions=True,
+            )
+
+        print(
+            f"Signups for {tournament.tournament_name} closed, "
+            f"locked {len(pending)} pending signups."
+        )
+        if signup_chan is not None:
+            try:
+                await self._bot.rest_queue.submit(
+                    lambda: signup_chan.send(
+                        embed=self._summary_embed(tournament, len(pending))
+                    ),
+                    route="message_send",
+                )
+            except discord.HTTPException as e:
+                print(f"Error posting signup summary: {e}")
+
+    def _summary_embed(self, tournament: Tournament, locked: int) -> discord.Embed:
+        snapshot = self._bot.signup_service.snapshot
+        approved = len(snapshot.teams_with_status(TeamStatus.APPROVED))
+        denied = len(snapshot.teams_with_status(TeamStatus.DENIED))
+        substitutes = len(self._bot.signup_service.substitutes)
+
+        embed = discord.Embed(
+            title=f"**Signups closed — {tournament.tournament_name}**",
+            description=(
+                f"Approved teams: **{approved - substitutes}/{tournament.team_count}**\n"
+                f"Substitutes: **{substitutes}**\n"
+                f"Pending (locked): **{locked}**\n"
+                f"Denied: **{denied}**"
+            ),
+            color=self._bot.settings.colors.default_color,
+        )
+        embed.set_footer(
+            text=f"Tournament starts on {tournament.tournament_start_date:%Y-%m-%d %H:%M}",
+            icon_url=self._bot.settings.icon_url,
+        )
+        return embed
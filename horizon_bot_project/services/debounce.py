@@ -0,0 +1,49 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class KeyedBatcher(Generic[K, T]):
+    """Collects items per key and hands each burst to ``handler`` at once.
+
+    The first item for a key starts a worker that waits ``window`` seconds
+    and then calls ``handler(key, items)`` with everything collected so far.
+    Items arriving while the handler runs form the next burst. Because every
+    key has a single worker, handlers for the same key never overlap.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[K, List[T]], Awaitable[None]],
+        window: float = 0.75,
+    ):
+        self._handler = handler
+        self._window = window
+        self._pending: Dict[K, List[T]] = {}
+        self._workers: Dict[K, asyncio.Task] = {}
+        self.received = 0
+        self.handled = 0
+
+    def add(self, key: K, item: T) -> None:
+        self._pending.setdefault(key, []).append(item)
+        self.received += 1
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._work(key))
+
+    async def _work(self, key: K) -> None:
+        try:
+            while key in self._pending:
+                await asyncio.sleep(self._window)
+                items = self._pending.pop(key)
+                self.handled += 1
+                try:
+                    await self._handler(key, items)
+                except Exception as e:
+                    print(f"Error handling batch for {key}: {e}")
+        finally:
+            del self._workers[key]
+
+    async def close(self) -> None:
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, Dict, List
+
+import discord
+
+from services.rest import Priority, RestQueue
+
+
+class _PendingEdit:
+    __slots__ = ("message", "fields", "futures")
+
+    def __init__(self, message: discord.Message | discord.PartialMessage):
+        self.message = message
+        self.fields: Dict[str, Any] = {}
+        self.futures: List[asyncio.Future] = []
+
+
+class EmbedEditCoalescer:
+    """Merges edits to the same message into as few REST calls as possible.
+
+    Edits requested within ``window`` seconds of each other are sent as one
+    ``message.edit``, where later values replace earlier ones field by field.
+    Each message has at most one edit in flight, so a newer state can never
+    land before an older one.
+    """
+
+    def __init__(self, rest_queue: RestQueue, window: float = 0.5):
+        self._rest_queue = rest_queue
+        self._window = window
+        self._pending: Dict[int, _PendingEdit] = {}
+        self._senders: Dict[int, asyncio.Task] = {}
+        self.requested = 0
+        self.sent = 0
+
+    def edit(
+        self, message: discord.Message | discord.PartialMessage, **fields
+    ) -> "asyncio.Future[discord.Message]":
+        """Queues ``fields`` (as accepted by ``message.edit``) for the message.
+        The returned future resolves once an edit including them is sent."""
+        pending = self._pending.get(message.id)
+        if pending is None:
+            pending = self._pending[message.id] = _PendingEdit(message)
+        pending.message = message
+        pending.fields.update(fields)
+        future = asyncio.get_running_loop().create_future()
+        pending.futures.append(future)
+        self.requested += 1
+
+        if message.id not in self._senders:
+            self._senders[message.id] = asyncio.create_task(self._send(message.id))
+        return future
+
+    async def _send(self, message_id: int) -> None:
+        try:
+            while message_id in self._pending:
+                await asyncio.sleep(self._window)
+                pending = self._pending.pop(message_id)
+                self.sent += 1
+                try:
+                    result = await self._rest_queue.submit(
+                        lambda: pending.message.edit(**pending.fields),
+                        Priority.UPDATE,
+                        route="message_edit",
+                    )
+                except Exception as e:
+                    for future in pending.futures:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for future in pending.futures:
+                        if not future.done():
+                            future.set_result(result)
+        finally:
+            del self._senders[message_id]
+
+    async def close(self) -> None:
+        await asyncio.gather(*self._senders.values(), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "requested": self.requested,
+            "sent": self.sent,
+            "pending": len(self._pending),
+        }
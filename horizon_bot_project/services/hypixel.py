@@ -0,0 +1,160 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+
+import aiohttp
+
+from minecraft import hypixel
+from services.rest import RateLimiter
+from storage import HypixelCacheStorage
+
+
+class HypixelService:
+    """Hypixel player lookups through a persistent cache.
+
+    Entries younger than ``ttl`` are served as is. Entries younger than
+    ``ttl + stale_for`` are served too, but refetched in the background;
+    anything older is fetched before returning. Concurrent lookups of the
+    same player share one request.
+
+    Background refetches share one session and rate limiter, run at most
+    ``revalidate_concurrency`` at a time, and are not scheduled while
+    ``revalidate_max_pending`` are already waiting, so a burst of stale
+    hits cannot flood the Hypixel API.
+    """
+
+    def __init__(
+        self,
+        storage: HypixelCacheStorage,
+        ttl: timedelta = timedelta(hours=24),
+        stale_for: timedelta = timedelta(days=6),
+        max_entries: int = 50000,
+        revalidate_concurrency: int = 2,
+        revalidate_max_per_second: float = 2.0,
+        revalidate_max_pending: int = 500,
+    ):
+        self._storage = storage
+        self._ttl = ttl
+        self._stale_for = stale_for
+        self._max_entries = max_entries
+        self._fetches: Dict[str, asyncio.Future] = {}
+        self._revalidations: Set[asyncio.Task] = set()
+        self._revalidate_slots = asyncio.Semaphore(revalidate_concurrency)
+        self._revalidate_limiter = RateLimiter(revalidate_max_per_second)
+        self._revalidate_max_pending = revalidate_max_pending
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.fetches = 0
+
+    async def close(self) -> None:
+        for task in self._revalidations:
+            task.cancel()
+        await asyncio.gather(*self._revalidations, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_social_links(
+        self,
+        minecraft_uuid: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_age: Optional[timedelta] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> Dict[str, str]:
+        """``max_age`` overrides the TTL for this lookup, without serving
+        stale entries. ``limiter`` is only waited on when a request is made."""
+        now = datetime.now()
+        cached = await self._storage.get_player(minecraft_uuid, now)
+        if cached is not None:
+            links, fetched_at = cached
+            age = now - fetched_at
+            if age < (self._ttl if max_age is None else max_age):
+                self.hits += 1
+                return links
+            if max_age is None and age < self._ttl + self._stale_for:
+                self.stale_hits += 1
+                self._revalidate(minecraft_uuid)
+                return links
+        return await self._fetch(minecraft_uuid, session, limiter)
+
+    async def get_discord_tag(
+        self,
+        minecraft_uuid: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_age: Optional[timedelta] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> Optional[str]:
+        links = await self.get_social_links(minecraft_uuid, session, max_age, limiter)
+        return links.get("DISCORD")
+
+    async def _fetch(
+        self,
+        minecraft_uuid: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> Dict[str, str]:
+        fetch = self._fetches.get(minecraft_uuid)
+        if fetch is not None:
+            return await asyncio.shield(fetch)
+
+        fetch = self._fetches[minecraft_uuid] = (
+            asyncio.get_running_loop().create_future()
+        )
+        try:
+            if limiter:
+                await limiter.wait()
+            self.fetches += 1
+            links = await hypixel.fetch_hypixel_social_links(minecraft_uuid, session)
+            await self._storage.put_player(
+                minecraft_uuid, links, datetime.now(), self._max_entries
+            )
+            fetch.set_result(links)
+        except asyncio.CancelledError:
+            fetch.cancel()
+            raise
+        except Exception as e:
+            fetch.set_exception(e)
+            # only raised to waiting callers, if there are any
+            fetch.exception()
+            raise
+        finally:
+            del self._fetches[minecraft_uuid]
+        return links
+
+    def _revalidate(self, minecraft_uuid: str) -> None:
+        if minecraft_uuid in self._fetches:
+            return
+        if len(self._revalidations) >= self._revalidate_max_pending:
+            # still served stale; a later lookup schedules it again
+            return
+
+        async def revalidate():
+            async with self._revalidate_slots:
+                try:
+                    await self._fetch(
+                        minecraft_uuid,
+                        self._revalidate_session(),
+                        self._revalidate_limiter,
+                    )
+                except Exception as e:
+                    print(f"Error revalidating Hypixel player {minecraft_uuid}: {e}")
+
+        task = asyncio.create_task(revalidate())
+        self._revalidations.add(task)
+        task.add_done_callback(self._revalidations.discard)
+
+    def _revalidate_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._session
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.fetches
+        return {
+            "fetches": self.fetches,
+            "revalidations": len(self._revalidations),
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+from hbp_types.message import MessageRecord, MessageRevision
+
+# shard-<shard id>.<segment>.journal
+_SUFFIX = ".journal"
+
+
+class ShardJournal:
+    """Append-only journal of one shard's buffered messages and revisions.
+
+    Messages are written to the current segment as JSON lines with a single
+    ``os.write`` each, so they survive a crash of the bot as soon as they are
+    appended; ``sync`` makes them survive a crash of the machine and is called
+    for many messages at once. A flush ``rotate``s to a new segment before
+    writing its batch and ``discard``s the sealed segments once the batch is
+    stored.
+    """
+
+    def __init__(self, directory: str, shard_id: int):
+        self._directory = Path(directory)
+        self._shard_id = shard_id
+        self._segment = 0
+        self._sealed: List[Tuple[int, Path]] = []
+        self._fd = self._open()
+        self._dirty = False
+        # an fsync running in a thread must not see its fd closed by rotate
+        self._lock = asyncio.Lock()
+        self.appended = 0
+
+    def _path(self, segment: int) -> Path:
+        return self._directory / f"shard-{self._shard_id}.{segment}{_SUFFIX}"
+
+    def _open(self) -> int:
+        return os.open(
+            self._path(self._segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+        )
+
+    def append(self, record: MessageRecord) -> None:
+        self._write([json.dumps(record)])
+
+    def append_revisions(self, revisions: List[MessageRevision]) -> None:
+        # revisions are objects, telling them apart from message arrays
+        self._write([json.dumps({"revision": revision}) for revision in revisions])
+
+    def _write(self, lines: List[str]) -> None:
+        os.write(self._fd, "".join(line + "\n" for line in lines).encode())
+        self._dirty = True
+        self.appended += len(lines)
+
+    async def sync(self) -> None:
+        async with self._lock:
+            if self._dirty:
+                self._dirty = False
+                await asyncio.to_thread(os.fsync, self._fd)
+
+    async def rotate(self) -> int:
+        """Seals the current segment and returns its number. Messages appended
+        from the moment this is called go to the next segment."""
+        fd, dirty, segment = self._fd, self._dirty, self._segment
+        self._sealed.append((segment, self._path(segment)))
+        self._segment += 1
+        self._fd = self._open()
+        self._dirty = False
+
+        async with self._lock:
+            if dirty:
+                await asyncio.to_thread(os.fsync, fd)
+            os.close(fd)
+        return segment
+
+    def discard(self, up_to: int) -> None:
+        """Deletes sealed segments up to ``up_to``, whose messages are stored."""
+        kept = []
+        for segment, path in self._sealed:
+            if segment <= up_to:
+                path.unlink(missing_ok=True)
+            else:
+                kept.append((segment, path))
+        self._sealed = kept
+
+    async def close(self) -> None:
+        await self.sync()
+        async with self._lock:
+            os.close(self._fd)
+        path = self._path(self._segment)
+        if not self._sealed and path.stat().st_size == 0:
+            path.unlink()
+
+
+def read_journals(
+    directory: str,
+) -> Tuple[List[MessageRecord], List[MessageRevision], List[Path]]:
+    """Messages and revisions of every journal segment left in
+    ``directory``, oldest first, and the segment files they came from."""
+    paths = sorted(
+        Path(directory).glob(f"shard-*{_SUFFIX}"),
+        key=lambda p: tuple(int(part) for part in p.name[6:-len(_SUFFIX)].split(".")),
+    )
+    records = []
+    revisions = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if isinstance(entry, dict):
+                        revisions.append(MessageRevision(*entry["revision"]))
+                    else:
+                        records.append(MessageRecord(*entry))
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    # a line torn by the crash was never acknowledged anyway
+                    pass
+    return records, revisions, paths
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from minecraft import mojang
+from services.minecraft import MinecraftLinkService
+from services.rest import RateLimiter
+
+
+class LinkRefreshService:
+    """Keeps linked Minecraft usernames current in the background.
+
+    Each tick walks the next ``batch_size`` links after a persisted cursor,
+    skipping links refreshed within ``min_age``, and looks their UUIDs up at
+    no more than ``max_per_second``. When the end of the table is reached
+    the cursor wraps around.
+    """
+
+    def __init__(
+        self,
+        link_service: MinecraftLinkService,
+        on_renamed: Optional[Callable[[Dict[int, str]], None]] = None,
+        batch_size: int = 200,
+        interval: float = 60.0,
+        max_per_second: float = 2.0,
+        min_age: timedelta = timedelta(hours=24),
+        cache_ttl: float = 3600.0,
+    ):
+        self._link_service = link_service
+        self._on_renamed = on_renamed
+        self._batch_size = batch_size
+        self._interval = interval
+        self._limiter = RateLimiter(max_per_second)
+        self._min_age = min_age
+        self._cache_ttl = cache_ttl
+        # uuid -> (name, expires at)
+        self._names: Dict[str, Tuple[Optional[str], float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.refreshed = 0
+        self.renamed = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh_batch()
+            except Exception as e:
+                print(f"Error refreshing linked accounts: {e}")
+            await asyncio.sleep(self._interval)
+
+    async def refresh_batch(self) -> int:
+        """Refreshes the next batch of links and returns how many were
+        checked."""
+        cursor = await self._link_service.load_refresh_cursor()
+        links = await self._link_service.get_links_to_refresh(
+            cursor, self._batch_size, datetime.now() - self._min_age
+        )
+
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            names = await asyncio.gather(
+                *(self._lookup(uuid, session) for _, uuid, _ in links),
+                return_exceptions=True,
+            )
+
+        usernames: List[tuple[int, str]] = []
+        renamed: Dict[int, str] = {}
+        for (user_id, _, old_name), name in zip(links, names):
+            if isinstance(name, Exception) or name is None:
+                # failed lookups are retried on the next pass
+                continue
+            usernames.append((user_id, name))
+            if name != old_name:
+                renamed[user_id] = name
+
+        await self._link_service.set_refreshed_usernames(usernames, datetime.now())
+        await self._link_service.save_refresh_cursor(
+            links[-1][0] if len(links) == self._batch_size else None
+        )
+        self.refreshed += len(usernames)
+        self.renamed += len(renamed)
+        if renamed and self._on_renamed:
+            self._on_renamed(renamed)
+        return len(links)
+
+    async def _lookup(
+        self, uuid: str, session: aiohttp.ClientSession
+    ) -> Optional[str]:
+        now = asyncio.get_running_loop().time()
+        cached = self._names.get(uuid)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        await self._limiter.wait()
+        name = await mojang.fetch_mojang_username(uuid, session)
+        if len(self._names) >= 4 * self._batch_size:
+            # drop expired entries, then the oldest ones if that is not enough
+            self._names = {k: v for k, v in self._names.items() if v[1] > now}
+            for key in list(self._names)[: len(self._names) - 2 * self._batch_size]:
+                del self._names[key]
+        self._names[uuid] = (name, now + self._cache_ttl)
+        return name
+
+    def stats(self) -> dict:
+        return {"refreshed": self.refreshed, "renamed": self.renamed}
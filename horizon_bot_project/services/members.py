@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+import discord
+
+if TYPE_CHECKING:
+    from bot import HorizonBot
+
+
+class MemberCache:
+    """Small LRU of members the bot recently needed (e.g. team members of
+    pending signups), so lookups stay O(1) without caching whole guilds.
+
+    Entries are keyed by user id; a cached member also serves user lookups.
+    """
+
+    def __init__(self, bot: "HorizonBot", max_size: int = 512):
+        self._bot = bot
+        self._max_size = max_size
+        self._entries: "OrderedDict[int, discord.abc.User]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def remember(self, member: discord.abc.User) -> None:
+        self._entries[member.id] = member
+        self._entries.move_to_end(member.id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def _lookup(
+        self, user_id: int, guild: Optional[discord.Guild] = None
+    ) -> Optional[discord.abc.User]:
+        user = self._entries.get(user_id)
+        if user is None:
+            return None
+        if guild is not None and getattr(user, "guild", None) != guild:
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def cached_member(
+        self, guild: discord.Guild, member_id: int
+    ) -> Optional[discord.Member]:
+        return guild.get_member(member_id) or self._lookup(member_id, guild)
+
+    async def get_member(
+        self, guild: discord.Guild, member_id: int
+    ) -> Optional[discord.Member]:
+        """``None`` if the user is not in ``guild``; other REST errors
+        propagate."""
+        member = self.cached_member(guild, member_id)
+        if member is not None:
+            return member
+
+        self.misses += 1
+        try:
+            member = await guild.fetch_member(member_id)
+        except discord.NotFound:
+            return None
+        self.remember(member)
+        return member
+
+    async def get_user(self, user_id: int) -> discord.abc.User:
+        user = self._bot.get_user(user_id) or self._lookup(user_id)
+        if user is not None:
+            return user
+
+        self.misses += 1
+        user = await self._bot.fetch_user(user_id)
+        self.remember(user)
+        return user
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,21 +1,205 @@
-from typing import List
+import asyncio
+import os
+from typing import Dict, List, Optional
 import discord
+from hbp_types.message import MessageRecord, MessageRevision
+from services.journal import ShardJournal, read_journals
+from services.stats import RateCounter
 from storage import MessageStorage
 
 
+class ShardMessageBuffer:
+    """Message buffer of a single shard, flushed when full or on an interval."""
+
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.messages: List[MessageRecord] = []
+        self.revisions: List[MessageRevision] = []
+        self.rate = RateCounter()
+        self.flushed = 0
+        self.dropped = 0
+        self.flusher: Optional[asyncio.Task] = None
+        # a flush started because the buffer filled up
+        self.flushing: Optional[asyncio.Task] = None
+        # one flush at a time, so batches are stored in order
+        self.lock = asyncio.Lock()
+        self.journal: Optional[ShardJournal] = None
+
+
 class MessageService:
-    def __init__(self, message_storage: MessageStorage, buffer_size: int = 20):
-        self._buffer: List[discord.Message] = []
+    """Buffers messages, edits and deletions per shard and stores them in
+    batches.
+
+    With ``journal_dir`` set, every buffered message is also appended to a
+    per-shard journal (see ``ShardJournal``) that is fsynced every
+    ``journal_sync_interval`` seconds, and journals left over from a crash
+    are stored on ``start``.
+
+    A full buffer is flushed in the background. While storage keeps failing
+    the buffer grows up to ``max_buffered`` entries, past that the oldest
+    are dropped.
+    """
+
+    def __init__(
+        self,
+        message_storage: MessageStorage,
+        buffer_size: int = 20,
+        flush_interval: float = 5.0,
+        journal_dir: Optional[str] = None,
+        journal_sync_interval: float = 0.2,
+        max_buffered: int = 10000,
+    ):
+        self._buffers: Dict[int, ShardMessageBuffer] = {}
         self._buffer_size = buffer_size
+        self._max_buffered = max(max_buffered, buffer_size)
+        self._flush_interval = flush_interval
+        self._journal_dir = journal_dir
+        self._journal_sync_interval = journal_sync_interval
+        self._journal_syncer: Optional[asyncio.Task] = None
 
         self._message_storage = message_storage
 
+    def _buffer(self, shard_id: int) -> ShardMessageBuffer:
+        buffer = self._buffers.get(shard_id)
+        if buffer is None:
+            buffer = self._buffers[shard_id] = ShardMessageBuffer(shard_id)
+            if self._journal_dir:
+                buffer.journal = ShardJournal(self._journal_dir, shard_id)
+            buffer.flusher = asyncio.create_task(self._flush_periodically(buffer))
+        return buffer
+
     async def log_message(self, message: discord.Message):
-        self._buffer.append(message)
-        if len(self._buffer) >= self._buffer_size:
-            await self.flush_buffer()
+        shard_id = message.guild.shard_id if message.guild else 0
+        buffer = self._buffer(shard_id)
+        record = MessageRecord.from_message(message)
+        buffer.messages.append(record)
+        if buffer.journal:
+            buffer.journal.append(record)
+        buffer.rate.add()
+        self._buffered(buffer)
+
+    async def log_revisions(self, shard_id: int, revisions: List[MessageRevision]):
+        """Buffers edits or deletions; a bulk delete goes in as one list so
+        it is stored in a single write."""
+        if not revisions:
+            return
+        buffer = self._buffer(shard_id)
+        buffer.revisions.extend(revisions)
+        if buffer.journal:
+            buffer.journal.append_revisions(revisions)
+        self._buffered(buffer)
+
+    def _buffered(self, buffer: ShardMessageBuffer) -> None:
+        excess = len(buffer.messages) + len(buffer.revisions) - self._max_buffered
+        if excess > 0:
+            dropped = min(excess, len(buffer.messages))
+            del buffer.messages[:dropped]
+            del buffer.revisions[: excess - dropped]
+            if not buffer.dropped:
+                print(f"Message buffer of shard {buffer.shard_id} is full, dropping")
+            buffer.dropped += excess
+        if len(buffer.messages) + len(buffer.revisions) >= self._buffer_size and (
+            buffer.flushing is None or buffer.flushing.done()
+        ):
+            # not awaited, the event handler must not wait on (or fail
+            # with) the storage
+            buffer.flushing = asyncio.create_task(self._flush_logged(buffer))
 
     async def flush_buffer(self):
-        if self._buffer:
-            await self._message_storage.bulk_log_message(self._buffer)
-            self._buffer.clear()
+        await asyncio.gather(*(self._flush(b) for b in self._buffers.values()))
+
+    async def start(self):
+        await self._message_storage.start()
+        if self._journal_dir:
+            os.makedirs(self._journal_dir, exist_ok=True)
+            await self._replay_journals()
+            self._journal_syncer = asyncio.create_task(self._sync_journals())
+
+    async def _replay_journals(self):
+        records, revisions, paths = read_journals(self._journal_dir)
+        if records or revisions:
+            await self._message_storage.log_batch(records, revisions)
+            print(
+                f"Replayed {len(records)} journaled messages and "
+                f"{len(revisions)} revisions from {len(paths)} files"
+            )
+        for path in paths:
+            path.unlink()
+
+    async def close(self):
+        if self._journal_syncer is not None:
+            self._journal_syncer.cancel()
+        flushers = [b.flusher for b in self._buffers.values() if b.flusher]
+        for flusher in flushers:
+            flusher.cancel()
+        # a cancelled flusher puts its batch back into the buffer once its
+        # write has unwound, so wait for that before the final flush
+        await asyncio.gather(
+            *flushers,
+            *(b.flushing for b in self._buffers.values() if b.flushing),
+            return_exceptions=True,
+        )
+        await self.flush_buffer()
+        for buffer in self._buffers.values():
+            if buffer.journal:
+                await buffer.journal.close()
+        await self._message_storage.close()
+
+    async def _flush(self, buffer: ShardMessageBuffer):
+        async with buffer.lock:
+            await self._flush_locked(buffer)
+
+    async def _flush_locked(self, buffer: ShardMessageBuffer):
+        if not buffer.messages and not buffer.revisions:
+            return
+        # swap the lists out first so messages arriving during the write
+        # land in the next batch instead of being cleared with this one;
+        # the journal switches segments at the same point
+        messages, buffer.messages = buffer.messages, []
+        revisions, buffer.revisions = buffer.revisions, []
+        try:
+            segment = await buffer.journal.rotate() if buffer.journal else None
+            await self._message_storage.log_batch(messages, revisions)
+        except BaseException:
+            # cancellation too, or closing would drop the swapped-out batch
+            buffer.messages[:0] = messages
+            buffer.revisions[:0] = revisions
+            raise
+        if buffer.journal:
+            # a failed flush keeps its segment until a later flush succeeds
+            buffer.journal.discard(segment)
+        buffer.flushed += len(messages) + len(revisions)
+
+    async def _flush_logged(self, buffer: ShardMessageBuffer):
+        try:
+            await self._flush(buffer)
+        except Exception as e:
+            print(f"Error flushing messages for shard {buffer.shard_id}: {e}")
+
+    async def _flush_periodically(self, buffer: ShardMessageBuffer):
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self._flush_logged(buffer)
+
+    async def _sync_journals(self):
+        while True:
+            await asyncio.sleep(self._journal_sync_interval)
+            for buffer in list(self._buffers.values()):
+                try:
+                    await buffer.journal.sync()
+                except OSError as e:
+                    print(f"Error syncing journal for shard {buffer.shard_id}: {e}")
+
+    def stats(self) -> Dict[int, dict]:
+        return {
+            shard_id: {
+                "buffered": len(buffer.messages) + len(buffer.revisions),
+                "flushed": buffer.flushed,
+                "dropped": buffer.dropped,
+                "messages_per_second": buffer.rate.rate(),
+            }
+            for shard_id, buffer in sorted(self._buffers.items())
+        }
+
+    def storage_stats(self) -> dict:
+        return self._message_storage.stats()
@@ -1,5 +1,14 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import aiohttp
 import discord
-from minecraft import hypixel
+from minecraft import mojang
+from services.hypixel import HypixelService
+from services.rest import RateLimiter
 from storage import MinecraftLinkStorage
 
 
@@ -14,31 +23,301 @@ class DiscordTagMismatch(Exception):
         super().__init__(f"Expected: {expected}, Got: {actual}")
 
 
+class ImportStatus(str, Enum):
+    LINKED = "linked"
+    INVALID_ROW = "invalid row"
+    DUPLICATE = "duplicate"
+    MEMBER_NOT_FOUND = "member not found"
+    ALREADY_LINKED = "already linked"
+    IGN_NOT_FOUND = "ign not found"
+    TAG_NOT_FOUND = "no discord tag on hypixel"
+    TAG_MISMATCH = "discord tag mismatch"
+    ERROR = "error"
+
+
+@dataclass(slots=True)
+class ImportRow:
+    """One line of a link import. Rows start without a status and get one
+    as soon as they fail a check or are linked."""
+
+    line: int
+    discord_id: str
+    ign: str
+    member: Optional[discord.Member] = None
+    minecraft_uuid: Optional[str] = None
+    canonical_ign: Optional[str] = None
+    status: Optional[ImportStatus] = None
+    detail: str = ""
+
+
+# (minecraft_uuid, canonical_ign)
+Link = Tuple[str, str]
+_MISSING = object()
+
+
+class LinkCache:
+    """Bounded LRU of account links, in both directions.
+
+    ``None`` entries remember users known not to be linked. While the cache
+    holds every link (``complete``), users without an entry are not linked
+    either, so lookups never have to go to storage.
+    """
+
+    def __init__(self, max_size: int = 50000):
+        self._max_size = max_size
+        self._links: "OrderedDict[int, Optional[Link]]" = OrderedDict()
+        self._user_ids: Dict[str, int] = {}
+        self.complete = False
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._links)
+
+    def get(self, discord_user_id: int):
+        """The cached link, ``None`` if not linked, or ``_MISSING``."""
+        link = self._links.get(discord_user_id, _MISSING)
+        if link is _MISSING:
+            if self.complete:
+                self.hits += 1
+                return None
+            self.misses += 1
+            return _MISSING
+        self._links.move_to_end(discord_user_id)
+        self.hits += 1
+        return link
+
+    def get_user_id(self, minecraft_uuid: str):
+        user_id = self._user_ids.get(minecraft_uuid)
+        if user_id is not None:
+            self._links.move_to_end(user_id)
+            self.hits += 1
+            return user_id
+        if self.complete:
+            self.hits += 1
+            return None
+        self.misses += 1
+        return _MISSING
+
+    def put(self, discord_user_id: int, link: Optional[Link]) -> None:
+        old = self._links.get(discord_user_id)
+        if old:
+            self._user_ids.pop(old[0], None)
+        if link:
+            # a uuid belongs to one user; linking it elsewhere unlinks the old one
+            previous_owner = self._user_ids.get(link[0])
+            if previous_owner is not None and previous_owner != discord_user_id:
+                self._links[previous_owner] = None
+            self._user_ids[link[0]] = discord_user_id
+        self._links[discord_user_id] = link
+        self._links.move_to_end(discord_user_id)
+
+        while len(self._links) > self._max_size:
+            _, evicted = self._links.popitem(last=False)
+            if evicted:
+                self._user_ids.pop(evicted[0], None)
+            self.complete = False
+
+    def rename(self, discord_user_id: int, canonical_ign: str) -> None:
+        link = self._links.get(discord_user_id)
+        if link:
+            self._links[discord_user_id] = (link[0], canonical_ign)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._links),
+            "max_size": self._max_size,
+            "complete": self.complete,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
 class MinecraftLinkService:
-    def __init__(self, minecraft_link_storage: MinecraftLinkStorage):
+    """Account links, served from a ``LinkCache`` that every write here
+    goes through."""
+
+    def __init__(
+        self,
+        minecraft_link_storage: MinecraftLinkStorage,
+        hypixel_service: HypixelService,
+        cache_size: int = 50000,
+        recheck_after: timedelta = timedelta(minutes=1),
+    ):
         self._minecraft_link_storage = minecraft_link_storage
+        self._hypixel_service = hypixel_service
+        self._recheck_after = recheck_after
+        self.cache = LinkCache(cache_size)
+
+    async def warm_cache(self) -> None:
+        links = await self._minecraft_link_storage.get_links(self.cache._max_size + 1)
+        for discord_user_id, minecraft_uuid, canonical_ign in links:
+            self.cache.put(discord_user_id, (minecraft_uuid, canonical_ign))
+        self.cache.complete = len(links) <= self.cache._max_size
 
     async def link_account(
         self, member: discord.Member, minecraft_uuid: str, canonical_ign: str
     ) -> None:
-        fetched_discord_tag = await hypixel.fetch_hypixel_discord_tag(minecraft_uuid)
-        if fetched_discord_tag is None:
-            raise DiscordTagNotFound()
+        await self._check_discord_tag(member, minecraft_uuid)
+        await self._minecraft_link_storage.link_account(
+            member.id, minecraft_uuid, canonical_ign
+        )
+        self.cache.put(member.id, (minecraft_uuid, canonical_ign))
+
+    async def unlink_account(self, member: discord.abc.Snowflake) -> None:
+        await self._minecraft_link_storage.unlink_account(member.id)
+        self.cache.put(member.id, None)
 
+    async def _check_discord_tag(
+        self,
+        member: discord.Member,
+        minecraft_uuid: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> None:
         if member.discriminator == "0":
             expected_tag = member.name
         else:
             expected_tag = f"{member.name}#{member.discriminator}"
 
+        fetched_discord_tag = await self._hypixel_service.get_discord_tag(
+            minecraft_uuid, session, limiter=limiter
+        )
+        if (
+            fetched_discord_tag is None
+            or fetched_discord_tag.lower() != expected_tag.lower()
+        ):
+            # the player may have just fixed the link in game, so a cached
+            # failure is only trusted for a short while
+            fetched_discord_tag = await self._hypixel_service.get_discord_tag(
+                minecraft_uuid, session, self._recheck_after, limiter
+            )
+        if fetched_discord_tag is None:
+            raise DiscordTagNotFound()
+
         if fetched_discord_tag.lower() != expected_tag.lower():
             raise DiscordTagMismatch(expected=expected_tag, actual=fetched_discord_tag)
 
-        await self._minecraft_link_storage.link_account(
-            member.id, minecraft_uuid, canonical_ign
+    async def import_links(
+        self,
+        rows: List[ImportRow],
+        concurrency: int = 8,
+        max_per_second: float = 10.0,
+    ) -> None:
+        """Links every row that has a member and no status yet. IGNs are
+        resolved in Mojang bulk requests, Hypixel tags are checked
+        concurrently, and all links are written in one transaction. Sets
+        a status on every row it processes."""
+        pending = [r for r in rows if r.status is None]
+        for row in pending:
+            if await self.get_minecraft_uuid(row.member):
+                row.status = ImportStatus.ALREADY_LINKED
+        pending = [r for r in pending if r.status is None]
+
+        semaphore = asyncio.Semaphore(concurrency)
+        mojang_limiter = RateLimiter(max_per_second)
+        hypixel_limiter = RateLimiter(max_per_second)
+
+        async def resolve(batch: List[ImportRow]) -> None:
+            async with semaphore:
+                await mojang_limiter.wait()
+                try:
+                    profiles = await mojang.fetch_mojang_profiles(
+                        [r.ign for r in batch], session
+                    )
+                except Exception as e:
+                    for row in batch:
+                        row.status, row.detail = ImportStatus.ERROR, str(e)
+                    return
+            for row in batch:
+                profile = profiles.get(row.ign.lower())
+                if profile is None:
+                    row.status = ImportStatus.IGN_NOT_FOUND
+                else:
+                    row.minecraft_uuid, row.canonical_ign = profile
+
+        async def check(row: ImportRow) -> None:
+            async with semaphore:
+                try:
+                    await self._check_discord_tag(
+                        row.member, row.minecraft_uuid, session, hypixel_limiter
+                    )
+                except DiscordTagNotFound:
+                    row.status = ImportStatus.TAG_NOT_FOUND
+                except DiscordTagMismatch as e:
+                    row.status, row.detail = ImportStatus.TAG_MISMATCH, e.actual
+                except Exception as e:
+                    row.status, row.detail = ImportStatus.ERROR, str(e)
+
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            step = mojang.MOJANG_BULK_LIMIT
+            await asyncio.gather(
+                *(resolve(pending[i : i + step]) for i in range(0, len(pending), step))
+            )
+            pending = [r for r in pending if r.status is None]
+            await asyncio.gather(*(check(row) for row in pending))
+
+        verified = [r for r in pending if r.status is None]
+        await self._minecraft_link_storage.bulk_link_accounts(
+            [(r.member.id, r.minecraft_uuid, r.canonical_ign) for r in verified]
         )
+        for row in verified:
+            self.cache.put(row.member.id, (row.minecraft_uuid, row.canonical_ign))
+            row.status = ImportStatus.LINKED
+
+    async def _get_link(self, discord_user_id: int) -> Optional[Link]:
+        link = self.cache.get(discord_user_id)
+        if link is _MISSING:
+            # one read fills both fields of the cache entry
+            minecraft_uuid = await self._minecraft_link_storage.get_minecraft_uuid(
+                discord_user_id
+            )
+            link = None
+            if minecraft_uuid is not None:
+                ign = await self._minecraft_link_storage.get_minecraft_username(
+                    discord_user_id
+                )
+                link = (minecraft_uuid, ign)
+            self.cache.put(discord_user_id, link)
+        return link
+
+    async def get_minecraft_uuid(self, member: discord.abc.Snowflake) -> str | None:
+        link = await self._get_link(member.id)
+        return link[0] if link else None
+
+    async def get_minecraft_username(
+        self, member: discord.abc.Snowflake
+    ) -> str | None:
+        link = await self._get_link(member.id)
+        return link[1] if link else None
+
+    async def get_discord_user_id(self, minecraft_uuid: str) -> int | None:
+        user_id = self.cache.get_user_id(minecraft_uuid)
+        if user_id is _MISSING:
+            user_id = await self._minecraft_link_storage.get_discord_user_id(
+                minecraft_uuid
+            )
+            if user_id is not None:
+                await self._get_link(user_id)
+        return user_id
+
+    async def get_links_to_refresh(
+        self, after_user_id: Optional[int], limit: int, refreshed_before: datetime
+    ) -> List[tuple[int, str, str]]:
+        return await self._minecraft_link_storage.get_links_to_refresh(
+            after_user_id, limit, refreshed_before
+        )
+
+    async def set_refreshed_usernames(
+        self, usernames: List[tuple[int, str]], refreshed_at: datetime
+    ) -> None:
+        await self._minecraft_link_storage.bulk_set_usernames(usernames, refreshed_at)
+        for discord_user_id, ign in usernames:
+            self.cache.rename(discord_user_id, ign)
 
-    async def get_minecraft_uuid(self, member: discord.Member) -> str | None:
-        return await self._minecraft_link_storage.get_minecraft_uuid(member.id)
+    async def load_refresh_cursor(self) -> Optional[int]:
+        return await self._minecraft_link_storage.load_refresh_cursor()
 
-    async def get_minecraft_username(self, member: discord.Member) -> str | None:
-        return await self._minecraft_link_storage.get_minecraft_username(member.id)
+    async def save_refresh_cursor(self, after_user_id: Optional[int]) -> None:
+        await self._minecraft_link_storage.save_refresh_cursor(after_user_id)
@@ -0,0 +1,62 @@
+import json
+import time
+from typing import IO, Optional
+
+# events replayed by benchmarks/replay.py; READY and GUILD_CREATE rebuild
+# the cache the others refer to
+RECORDED_EVENTS = frozenset(
+    {
+        "READY",
+        "GUILD_CREATE",
+        "MESSAGE_CREATE",
+        "MESSAGE_REACTION_ADD",
+        "MESSAGE_REACTION_REMOVE",
+        "INTERACTION_CREATE",
+    }
+)
+
+
+class GatewayRecorder:
+    """Appends selected gateway dispatches to a JSON lines file.
+
+    Each line is ``{"t": <ms since start>, "e": <event>, "d": <data>}``.
+    For READY only the bot user is kept; the rest of it is replaced by the
+    GUILD_CREATE events that follow.
+    """
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self._flush_every = flush_every
+        self._file: Optional[IO[str]] = None
+        self._started = time.monotonic()
+        self._unflushed = 0
+        self.recorded = 0
+
+    def record(self, raw: str | dict) -> None:
+        payload = json.loads(raw) if isinstance(raw, str) else raw
+        event = payload.get("t")
+        if payload.get("op") != 0 or event not in RECORDED_EVENTS:
+            return
+
+        data = payload["d"]
+        if event == "READY":
+            data = {"user": data["user"]}
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+
+        line = {
+            "t": round((time.monotonic() - self._started) * 1000),
+            "e": event,
+            "d": data,
+        }
+        self._file.write(json.dumps(line, separators=(",", ":")) + "\n")
+        self.recorded += 1
+        self._unflushed += 1
+        if self._unflushed >= self._flush_every:
+            self._file.flush()
+            self._unflushed = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,202 @@
+import asyncio
+from collections import deque
+from enum import IntEnum
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from services.stats import WaitStats
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    INTERACTION = 0
+    UPDATE = 1
+    DM = 2
+
+
+class RestQueueClosed(Exception):
+    """Raised to callers whose job was queued or running when the queue
+    closed, or that submitted one afterwards."""
+
+
+class RateLimiter:
+    """Spaces out operations so no more than ``max_per_second`` start
+    per second."""
+
+    def __init__(self, max_per_second: float):
+        self._interval = 1 / max_per_second
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_start - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = loop.time() + self._interval
+
+
+class _Job:
+    __slots__ = ("call", "future", "route", "enqueued_at")
+
+    def __init__(
+        self,
+        call: Callable[[], Awaitable],
+        future: asyncio.Future,
+        route: str,
+        enqueued_at: float,
+    ):
+        self.call = call
+        self.future = future
+        self.route = route
+        self.enqueued_at = enqueued_at
+
+
+class RestQueue:
+    """Runs Discord REST calls through a fixed pool of workers.
+
+    Jobs are picked by priority class (interaction follow-ups, then message
+    and role updates, then DMs) and FIFO within a class, skipping routes
+    that already use up their concurrency budget so one slow route cannot
+    occupy every worker.
+
+    discord.py already waits out per-route buckets and 429s, but firing
+    hundreds of calls at once still trips the global limit, so request
+    starts are spaced out. Interaction follow-ups are exempt from the
+    global limit and skip that spacing.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        max_per_second: float = 40.0,
+        route_budgets: Optional[Dict[str, int]] = None,
+    ):
+        self._concurrency = concurrency
+        self._limiter = RateLimiter(max_per_second)
+        self._route_budgets = route_budgets or {}
+
+        self._queues: Dict[Priority, Dict[str, Deque[_Job]]] = {
+            priority: {} for priority in Priority
+        }
+        self._route_in_flight: Dict[str, int] = {}
+        self._class_in_flight: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._class_stats: Dict[Priority, WaitStats] = {
+            p: WaitStats() for p in Priority
+        }
+        self._wakeup = asyncio.Event()
+
+        self._workers: List[asyncio.Task] = []
+        self._closed = False
+
+    @property
+    def depth(self) -> int:
+        return sum(self._queued(priority) for priority in Priority)
+
+    def _queued(self, priority: Priority) -> int:
+        return sum(len(jobs) for jobs in self._queues[priority].values())
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._work()) for _ in range(self._concurrency)
+            ]
+
+    async def close(self) -> None:
+        """Stops the workers and fails every job that has not completed, so
+        nothing waits on the queue forever."""
+        self._closed = True
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for routes in self._queues.values():
+            for jobs in routes.values():
+                for job in jobs:
+                    self._fail(job)
+            routes.clear()
+
+    @staticmethod
+    def _fail(job: _Job) -> None:
+        if not job.future.done():
+            job.future.set_exception(RestQueueClosed("The REST queue is closed."))
+
+    def submit(
+        self,
+        call: Callable[[], Awaitable[T]],
+        priority: Priority = Priority.UPDATE,
+        route: str = "default",
+    ) -> "asyncio.Future[T]":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job = _Job(call, future, route, loop.time())
+        if self._closed:
+            self._fail(job)
+            return future
+        self._queues[priority].setdefault(route, deque()).append(job)
+        self._wakeup.set()
+        return future
+
+    def _has_budget(self, route: str) -> bool:
+        budget = self._route_budgets.get(route, self._concurrency)
+        return self._route_in_flight.get(route, 0) < budget
+
+    def _take(self) -> Optional[Tuple[Priority, _Job]]:
+        for priority in Priority:
+            oldest: Optional[Deque[_Job]] = None
+            for route, jobs in self._queues[priority].items():
+                if jobs and self._has_budget(route):
+                    if oldest is None or jobs[0].enqueued_at < oldest[0].enqueued_at:
+                        oldest = jobs
+            if oldest is not None:
+                return priority, oldest.popleft()
+        return None
+
+    async def _work(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            taken = self._take()
+            if taken is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            priority, job = taken
+            if job.future.cancelled():
+                continue
+
+            self._route_in_flight[job.route] = (
+                self._route_in_flight.get(job.route, 0) + 1
+            )
+            self._class_in_flight[priority] += 1
+            try:
+                if priority != Priority.INTERACTION:
+                    await self._limiter.wait()
+                stats = self._class_stats[priority]
+                stats.waits.append(loop.time() - job.enqueued_at)
+                try:
+                    result = await job.call()
+                except Exception as e:
+                    if not job.future.cancelled():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.cancelled():
+                        job.future.set_result(result)
+                stats.completed += 1
+            except asyncio.CancelledError:
+                # closed while the job was waiting on the limiter or running
+                self._fail(job)
+                raise
+            finally:
+                self._route_in_flight[job.route] -= 1
+                self._class_in_flight[priority] -= 1
+                # a freed route budget may unblock a job another worker skipped
+                self._wakeup.set()
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            priority.name.lower(): self._class_stats[priority].summary(
+                self._queued(priority), self._class_in_flight[priority]
+            )
+            for priority in Priority
+        }
@@ -1,54 +1,266 @@
-from datetime import datetime
-from typing import AsyncGenerator
+import asyncio
+from datetime import datetime, timedelta
+from typing import AsyncGenerator, Callable, Dict, Iterable, List, Optional, Set
 import discord
 
-from hbp_types.team import Team
+from hbp_types.team import Team, TeamStatus
 from hbp_types.tournament import Tournament
+from services.minecraft import MinecraftLinkService
+from services.substitutes import SubstituteQueue
 from storage import SignupStorage
 
 
+class TeamSnapshot:
+    """In-memory view of all teams and their members' IGNs. It is updated
+    in place by every SignupService mutation; ``version`` changes whenever
+    its content does so readers can cache anything derived from it."""
+
+    def __init__(self):
+        self.teams: Dict[str, Team] = {}
+        self.igns: Dict[int, str] = {}
+        self.version = 0
+
+    def put(self, team: Team) -> None:
+        self.teams[team.canonical_name] = team
+        self.version += 1
+
+    def clear(self) -> None:
+        self.teams.clear()
+        self.version += 1
+
+    def teams_with_status(self, status: Optional[TeamStatus] = None) -> List[Team]:
+        if status is None:
+            return list(self.teams.values())
+        return [t for t in self.teams.values() if t.status == status]
+
+
 class SignupService:
-    def __init__(self, storage: SignupStorage):
+    """Signups for the active tournament. Teams of earlier tournaments stay
+    in storage and can still be read by passing their ``tournament_id``."""
+
+    def __init__(
+        self,
+        storage: SignupStorage,
+        minecraft_link_service: MinecraftLinkService,
+        on_promoted: Optional[Callable[[List[Team]], None]] = None,
+    ):
         self._storage = storage
+        self._minecraft_link_service = minecraft_link_service
+        self._on_promoted = on_promoted
+        self.snapshot = TeamSnapshot()
+        self.substitutes = SubstituteQueue()
+        self.tournament_id = 0
+        self._closed_guilds: Set[int] = set()
+        # approvals count the approved teams before writing and denials
+        # promote the substitutes approvals queue, so neither may interleave
+        # (two concurrent approvals would both take the last main spot)
+        self._status_lock = asyncio.Lock()
+
+    async def switch_tournament(self, tournament_id: int) -> None:
+        """Makes ``tournament_id`` the active tournament and loads its teams.
+        Nothing is copied or deleted, so for a new tournament this only
+        empties the snapshot."""
+        if tournament_id:
+            claimed = await self._storage.claim_unassigned_teams(tournament_id)
+            if claimed:
+                print(f"Assigned {claimed} existing teams to tournament {tournament_id}")
+        self.tournament_id = tournament_id
+        await self.load_snapshot()
+
+    async def load_snapshot(self) -> None:
+        self.snapshot.clear()
+        async for team in self._storage.all_teams_generator(self.tournament_id):
+            await self._remember_igns(team)
+            self.snapshot.put(team)
+        self.substitutes.load(await self._storage.get_substitutes(self.tournament_id))
+
+    async def _remember_igns(self, team: Team) -> None:
+        for member_id in team.members:
+            if member_id not in self.snapshot.igns:
+                ign = await self._minecraft_link_service.get_minecraft_username(
+                    discord.Object(id=member_id)
+                )
+                if ign:
+                    self.snapshot.igns[member_id] = ign
+
+    async def load_signups_closed(self, guild_ids: Iterable[int]) -> None:
+        self._closed_guilds = {
+            guild_id
+            for guild_id in guild_ids
+            if await self._storage.load_signups_closed(guild_id)
+        }
+
+    def signups_closed(self, guild_id: int) -> bool:
+        return guild_id in self._closed_guilds
+
+    async def set_signups_closed(self, guild_id: int, closed: bool) -> None:
+        await self._storage.set_signups_closed(guild_id, closed)
+        if closed:
+            self._closed_guilds.add(guild_id)
+        else:
+            self._closed_guilds.discard(guild_id)
+
+    def update_igns(self, igns: Dict[int, str]) -> None:
+        """Refreshes names already in the snapshot, e.g. after a rename."""
+        changed = {
+            member_id: ign
+            for member_id, ign in igns.items()
+            if member_id in self.snapshot.igns and self.snapshot.igns[member_id] != ign
+        }
+        if changed:
+            self.snapshot.igns.update(changed)
+            self.snapshot.version += 1
 
-    async def all_teams_generator(self) -> AsyncGenerator[Team, None]:
-        async for team in self._storage.all_teams_generator():
+    async def all_teams_generator(
+        self,
+        status: Optional[TeamStatus] = None,
+        approved_after: Optional[datetime] = None,
+        tournament_id: Optional[int] = None,
+    ) -> AsyncGenerator[Team, None]:
+        async for team in self._storage.all_teams_generator(
+            self._tournament(tournament_id), status, approved_after
+        ):
             yield team
 
+    async def count_teams(
+        self,
+        status: Optional[TeamStatus] = None,
+        approved_after: Optional[datetime] = None,
+        tournament_id: Optional[int] = None,
+    ) -> int:
+        return await self._storage.count_teams(
+            self._tournament(tournament_id), status, approved_after
+        )
+
+    def _tournament(self, tournament_id: Optional[int]) -> int:
+        return self.tournament_id if tournament_id is None else tournament_id
+
+    async def get_team(
+        self, team_name: str, tournament_id: Optional[int] = None
+    ) -> Team | None:
+        return await self._storage.get_team(
+            self._tournament(tournament_id), self.normalize_team_name(team_name)
+        )
+
     async def add_team(self, team: Team) -> None:
         # Optional: Normalize name before storing
         team.canonical_name = self.normalize_team_name(team.team_name)
+        team.tournament_id = self.tournament_id
         await self._storage.add_team(team)
+        await self._remember_igns(team)
+        self.snapshot.put(team)
 
     async def get_team_for_member(self, member: discord.Member) -> Team | None:
-        return await self._storage.get_team_for_member(member.id)
+        return await self._storage.get_team_for_member(self.tournament_id, member.id)
 
     async def get_team_for_signup_message(
         self, message: discord.Message
     ) -> Team | None:
-        return await self._storage.get_team_for_signup_message(message.id)
+        return await self._storage.get_team_for_signup_message(
+            self.tournament_id, message.id
+        )
+
+    async def deny_team(self, team: Team, user: discord.User) -> bool:
+        """Returns False if the team was already denied."""
+        return (await self.bulk_deny_teams([team], user))[0]
+
+    async def bulk_deny_teams(
+        self, teams: List[Team], user: discord.User
+    ) -> List[bool]:
+        """Every main team that is denied hands its spot to the next
+        substitute; promoted teams are passed to ``on_promoted``."""
+        async with self._status_lock:
+            return await self._bulk_deny_teams(teams, user)
+
+    async def _bulk_deny_teams(
+        self, teams: List[Team], user: discord.User
+    ) -> List[bool]:
+        applied = await self._storage.bulk_set_team_denied(teams, user.id)
+        dequeued: List[str] = []
+        freed = 0
+        for team, was_denied in zip(teams, applied):
+            if not was_denied:
+                continue
+            if self.substitutes.remove(team.canonical_name):
+                dequeued.append(team.canonical_name)
+            elif team.status == TeamStatus.APPROVED:
+                freed += 1
+            team.denied_by = user.id
+            self.snapshot.put(team)
 
-    async def deny_team(self, team: Team, user: discord.User) -> None:
-        await self._storage.set_team_denied(team, user.id)
+        promoted = []
+        while len(promoted) < freed and (name := self.substitutes.pop()):
+            promoted.append(self.snapshot.teams[name])
+        await self._storage.remove_substitutes(
+            self.tournament_id, dequeued + [team.canonical_name for team in promoted]
+        )
+        if promoted and self._on_promoted:
+            self._on_promoted(promoted)
+        return applied
 
     async def approve_team(
-        self, tournament: Tournament, team: Team, role: discord.Role
-    ) -> bool:
-        await self._storage.set_pending(team, False)
-        await self._storage.set_team_role(team, role.id)
-        await self._storage.set_approved_at(team, datetime.now())
-
-        approved_team_count = 0
-        async for t in self._storage.all_teams_generator():
-            if not t.signup_pending:
-                approved_team_count += 1
-            if approved_team_count >= tournament.team_count:
-                return True
-        return False
-
-    async def clear_and_backup(self) -> None:
-        await self._storage.backup()
-        await self._storage.clear()
+        self, tournament: Tournament | None, team: Team
+    ) -> Optional[bool]:
+        return (await self.bulk_approve_teams(tournament, [team]))[0]
+
+    async def bulk_approve_teams(
+        self, tournament: Tournament | None, teams: List[Team]
+    ) -> List[Optional[bool]]:
+        """Approves all teams in one transaction and returns, per team,
+        whether it ended up as a substitute, or None if it was no longer
+        pending (e.g. approved concurrently)."""
+        async with self._status_lock:
+            return await self._bulk_approve_teams(tournament, teams)
+
+    async def _bulk_approve_teams(
+        self, tournament: Tournament | None, teams: List[Team]
+    ) -> List[Optional[bool]]:
+        approved_at = datetime.now()
+        approved_before = await self._storage.count_teams(
+            self.tournament_id, TeamStatus.APPROVED
+        )
+        applied = await self._storage.bulk_set_approved(teams, approved_at)
+
+        results: List[Optional[bool]] = []
+        queued = []
+        for team, was_approved in zip(teams, applied):
+            if not was_approved:
+                results.append(None)
+                continue
+            team.signup_pending = False
+            team.approved_at = approved_at
+            self.snapshot.put(team)
+            approved_before += 1
+            is_substitute = (
+                tournament is not None and approved_before > tournament.team_count
+            )
+            if is_substitute:
+                # keeps the order of ``teams`` among this batch
+                queued.append(
+                    (
+                        team.canonical_name,
+                        approved_at + timedelta(microseconds=len(queued)),
+                    )
+                )
+            results.append(is_substitute)
+
+        await self._storage.add_substitutes(self.tournament_id, queued)
+        for canonical_name, at in queued:
+            self.substitutes.push(canonical_name, at)
+        return results
+
+    async def set_team_role(self, team: Team, role: discord.Role) -> None:
+        await self.bulk_set_team_roles([(team, role)])
+
+    async def bulk_set_team_roles(self, roles: List[tuple[Team, discord.Role]]) -> None:
+        if not roles:
+            return
+        await self._storage.bulk_set_team_roles(
+            [(team, role.id) for team, role in roles]
+        )
+        for team, role in roles:
+            team.team_role_id = role.id
+            self.snapshot.put(team)
 
     def normalize_team_name(self, team_name: str) -> str:
         return team_name.lower().replace(" ", "_").replace("-", "_")
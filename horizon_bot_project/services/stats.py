@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+
+def rss_bytes() -> int:
+    """Current resident set size, falling back to the peak where /proc is
+    unavailable and to 0 where neither is (Windows)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RateCounter:
+    """Counts events per second over a sliding window of one-second buckets."""
+
+    def __init__(self, window: int = 60):
+        self._window = window
+        self._buckets: Deque[Tuple[int, int]] = deque()
+        self.total = 0
+
+    def add(self, count: int = 1) -> None:
+        now = int(time.monotonic())
+        if self._buckets and self._buckets[-1][0] == now:
+            self._buckets[-1] = (now, self._buckets[-1][1] + count)
+        else:
+            self._buckets.append((now, count))
+            self._trim(now)
+        self.total += count
+
+    def rate(self) -> float:
+        now = int(time.monotonic())
+        self._trim(now)
+        if not self._buckets:
+            return 0.0
+        elapsed = max(1, now - self._buckets[0][0] + 1)
+        return sum(count for _, count in self._buckets) / elapsed
+
+    def _trim(self, now: int) -> None:
+        while self._buckets and self._buckets[0][0] <= now - self._window:
+            self._buckets.popleft()
+
+
+class WaitStats:
+    """Queue wait times of the most recent ``samples`` jobs of one kind."""
+
+    def __init__(self, samples: int = 200):
+        self.waits: Deque[float] = deque(maxlen=samples)
+        self.completed = 0
+
+    def summary(self, queued: int, in_flight: int) -> dict:
+        waits = sorted(self.waits)
+        return {
+            "queued": queued,
+            "in_flight": in_flight,
+            "completed": self.completed,
+            "avg_wait_ms": sum(waits) / len(waits) * 1000 if waits else 0.0,
+            "p95_wait_ms": waits[int(len(waits) * 0.95)] * 1000 if waits else 0.0,
+        }
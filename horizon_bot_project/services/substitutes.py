@@ -0,0 +1,51 @@
+import heapq
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SubstituteQueue:
+    """Substitute teams ordered by approval time, earliest first.
+
+    A heap of ``(approved_at, canonical_name)`` with lazy removal: removed
+    teams stay in the heap until they reach the top, so ``push``, ``remove``
+    and ``pop`` are all O(log n) or better.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, str]] = []
+        self._queued: Dict[str, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def __contains__(self, canonical_name: str) -> bool:
+        return canonical_name in self._queued
+
+    def load(self, substitutes: Iterable[Tuple[str, datetime]]) -> None:
+        self._queued = dict(substitutes)
+        self._heap = [(at, name) for name, at in self._queued.items()]
+        heapq.heapify(self._heap)
+
+    def push(self, canonical_name: str, approved_at: datetime) -> None:
+        self._queued[canonical_name] = approved_at
+        heapq.heappush(self._heap, (approved_at, canonical_name))
+
+    def remove(self, canonical_name: str) -> bool:
+        if self._queued.pop(canonical_name, None) is None:
+            return False
+        if len(self._heap) > 2 * len(self._queued) + 64:
+            # too many stale entries, rebuild from the live ones
+            self.load(list(self._queued.items()))
+        return True
+
+    def pop(self) -> Optional[str]:
+        """Removes and returns the next team to promote, if any."""
+        while self._heap:
+            approved_at, canonical_name = heapq.heappop(self._heap)
+            if self._queued.get(canonical_name) == approved_at:
+                del self._queued[canonical_name]
+                return canonical_name
+        return None
+
+    def ordered(self) -> List[str]:
+        return sorted(self._queued, key=lambda name: (self._queued[name], name))
@@ -0,0 +1,121 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+from hbp_types.team import Team
+from services.rest import RestQueue
+from services.signups import SignupService
+
+
+class TeamRoleRegistry:
+    """Finds team roles by their stored ``team_role_id`` instead of by name.
+
+    Roles that were renamed are renamed back, deleted roles are recreated
+    and their new ids stored. All role requests go through the rest queue's
+    ``roles`` route, so provisioning many teams at once is rate limited.
+
+    ``Guild.create_role`` does not cache the new role; it only shows up in
+    ``guild.get_role`` once the gateway's GUILD_ROLE_CREATE arrives, so
+    created roles are kept here until then (see ``forget``).
+    """
+
+    def __init__(self, rest_queue: RestQueue, signup_service: SignupService):
+        self._rest_queue = rest_queue
+        self._signup_service = signup_service
+        # (guild id, canonical name) -> role being created
+        self._creating: Dict[Tuple[int, str], asyncio.Future] = {}
+        # role id -> created role the guild cache may not have yet
+        self._created: Dict[int, discord.Role] = {}
+        self.created = 0
+        self.repaired = 0
+
+    @staticmethod
+    def role_name(team: Team) -> str:
+        return f"Team: {team.team_name}"
+
+    def get(self, guild: discord.Guild, team: Team) -> Optional[discord.Role]:
+        """The team's role if it exists, without creating it."""
+        if not team.team_role_id:
+            return None
+        role = guild.get_role(team.team_role_id)
+        if role is not None:
+            # the gateway caught up
+            self._created.pop(team.team_role_id, None)
+            return role
+        return self._created.get(team.team_role_id)
+
+    def forget(self, role_id: int) -> None:
+        """Called when the gateway reports a role created or deleted, after
+        which the guild cache is authoritative for it."""
+        self._created.pop(role_id, None)
+
+    async def resolve(self, guild: discord.Guild, team: Team) -> Optional[discord.Role]:
+        """The team's role, created or repaired if needed."""
+        return (await self.provision(guild, [team])).get(team.canonical_name)
+
+    async def provision(
+        self, guild: discord.Guild, teams: List[Team]
+    ) -> Dict[str, discord.Role]:
+        """Makes sure every team has a usable role and returns them by
+        canonical name. New role ids are stored in one write; teams whose
+        role could not be created are left out."""
+        roles: Dict[str, discord.Role] = {}
+        renames = []
+        missing = []
+        for team in teams:
+            role = self.get(guild, team)
+            if role is None:
+                missing.append(team)
+                continue
+            roles[team.canonical_name] = role
+            if role.name != self.role_name(team):
+                renames.append((team, role))
+
+        results = await asyncio.gather(
+            *(self._rename(team, role) for team, role in renames),
+            *(self._create(guild, team) for team in missing),
+            return_exceptions=True,
+        )
+        for result in results[: len(renames)]:
+            if isinstance(result, Exception):
+                # a wrongly named role still works, try again next time
+                print("Error renaming team role:", result)
+
+        created = []
+        for team, result in zip(missing, results[len(renames) :]):
+            if isinstance(result, Exception):
+                print(f"Error creating role for {team.team_name}:", result)
+                continue
+            roles[team.canonical_name] = result
+            created.append((team, result))
+        await self._signup_service.bulk_set_team_roles(created)
+        return roles
+
+    async def _rename(self, team: Team, role: discord.Role) -> None:
+        await self._rest_queue.submit(
+            lambda: role.edit(name=self.role_name(team)), route="roles"
+        )
+        self.repaired += 1
+
+    async def _create(self, guild: discord.Guild, team: Team) -> discord.Role:
+        # approvals and a bulk provision may ask for the same role at once
+        key = (guild.id, team.canonical_name)
+        creating = self._creating.get(key)
+        if creating is not None:
+            return await asyncio.shield(creating)
+
+        creating = self._creating[key] = self._rest_queue.submit(
+            lambda: guild.create_role(name=self.role_name(team), mentionable=True),
+            route="roles",
+        )
+        try:
+            role = await creating
+        finally:
+            del self._creating[key]
+        self._created[role.id] = role
+        self.created += 1
+        return role
+
+    def stats(self) -> dict:
+        return {"created": self.created, "repaired": self.repaired}
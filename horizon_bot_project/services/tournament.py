@@ -4,14 +4,24 @@ from storage import TournamentStorage
 
 
 class TournamentService:
+    """Keeps the current tournament in memory; it only changes through
+    ``create_tournament``, so reads never touch storage."""
+
     def __init__(self, storage: TournamentStorage):
         self._storage = storage
+        self._current: Tournament | None = None
+
+    async def load(self) -> None:
+        self._current = await self._storage.get_current_tournament()
 
     async def get_current_tournament(self) -> Tournament | None:
-        return await self._storage.get_current_tournament()
+        return self._current
 
-    async def is_signups_open(self) -> bool:
-        return await self._storage.is_signups_open()
+    def is_signups_open(self) -> bool:
+        return (
+            self._current is not None
+            and datetime.now() < self._current.signups_close_date
+        )
 
     async def create_tournament(self, tournament: Tournament) -> bool:
         if (
@@ -24,8 +34,9 @@ class TournamentService:
             raise ValueError("Signups must close before the tournament starts")
 
         existing = await self.get_current_tournament()
-        if existing:
+        if existing and existing.tournament_start_date > datetime.now():
             raise RuntimeError("There is already an ongoing tournament")
 
-        await self._storage.insert_tournament(tournament)
+        tournament.tournament_id = await self._storage.insert_tournament(tournament)
+        await self.load()
         return True
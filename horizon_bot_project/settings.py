@@ -1,7 +1,9 @@
 import json
+from enum import Enum
 import discord
 from pydantic import (
     BaseModel,
+    Field,
     ValidationError,
     model_validator,
 )
@@ -40,6 +42,22 @@ class Channels(BaseModel):
     subs_channel_id: int
 
 
+class CommandLimit(BaseModel):
+    """Admission limits of one command, see ``services.admission``."""
+
+    concurrency: int = 8
+    cooldown: float = 0.0
+    max_queue: int = 50
+    # waiting happens before the command defers, which it must within 3s
+    max_wait: float = Field(default=2.0, ge=0, le=2.5)
+
+
+class MemoryProfile(str, Enum):
+    FULL = "full"
+    BALANCED = "balanced"
+    LOW = "low"
+
+
 class Settings(BaseSettings):
     discord_token: str
     hypixel_api_key: str
@@ -48,28 +66,105 @@ class Settings(BaseSettings):
     allowed_guilds: list[int] = []
     colors: Colors = Colors()
     channels: Channels
+    # given to substitute teams and swapped out when they are promoted
+    substitute_role_id: int | None = None
     icon_url: str
 
+    auto_sharded: bool = False
+    shard_count: int | None = None
+    message_buffer_size: int = 20
+    message_flush_interval: float = 5.0
+    # buffered messages kept per shard while storage is failing
+    message_buffer_limit: int = 10000
+    message_writer_process: bool = False
+    # batches (one per buffer flush) the writer process may fall behind by
+    message_writer_queue_size: int = 1000
+    # zlib dictionary compression of stored message content; messages are
+    # stored plain until enough are stored to train the dictionary on
+    message_compression: bool = False
+    message_compression_dictionary_size: int = 32768
+    message_compression_training_samples: int = 5000
+    command_limits: dict[str, CommandLimit] = {
+        "verify": CommandLimit(concurrency=8, cooldown=5.0),
+        "signup": CommandLimit(concurrency=4, cooldown=5.0),
+        "verify_import": CommandLimit(concurrency=1, max_queue=0),
+    }
+    # write-ahead journal for buffered messages, off when unset
+    message_journal_dir: str | None = None
+    message_journal_sync_interval: float = 0.2
+
+    rest_concurrency: int = 4
+    rest_max_per_second: float = 40.0
+    # max concurrent calls per route; unlisted routes may use every worker
+    rest_route_budgets: dict[str, int] = {
+        "reactions": 1,
+        "roles": 2,
+        "dm": 2,
+        "members": 2,
+    }
+    embed_edit_window: float = 0.5
+    reaction_debounce: float = 0.75
+
+    # Mojang/Hypixel lookups for /verify_import
+    link_import_concurrency: int = 8
+    link_import_max_per_second: float = 10.0
+
+    mojang_api_url: str = "https://api.mojang.com"
+    mojang_session_url: str = "https://sessionserver.mojang.com"
+    hypixel_api_url: str = "https://api.hypixel.net"
+    hypixel_cache_ttl_hours: float = 24.0
+    # how long an expired entry is still served while it is refetched
+    hypixel_cache_stale_hours: float = 144.0
+    hypixel_cache_max_entries: int = 50000
+    # background refetches of stale entries
+    hypixel_revalidate_concurrency: int = 2
+    hypixel_revalidate_max_per_second: float = 2.0
+    hypixel_revalidate_max_pending: int = 500
+    # a failed tag check is retried against Hypixel after this many seconds
+    hypixel_recheck_seconds: float = 60.0
+
+    link_refresh_interval: float = 60.0
+    link_refresh_batch_size: int = 200
+    link_refresh_max_per_second: float = 2.0
+    link_refresh_min_age_hours: float = 24.0
+
+    memory_profile: MemoryProfile = MemoryProfile.FULL
+    member_lru_size: int = 512
+    link_cache_size: int = 50000
+
+    # JSON lines file to record gateway events to (see benchmarks/replay.py)
+    gateway_record_path: str | None = None
+
+    config_poll_interval: float = 1.0
+    config_reload_debounce: float = 2.0
+
     class Config:
         env_file = ".env"
         frozen = True
 
 
+CONFIG_PATH = "config.json"
+
 settings = None
 
 
-def reload_config():
-    with open("config.json") as f:
+def load_settings(path: str = CONFIG_PATH) -> Settings:
+    with open(path) as f:
         data = json.load(f)
+    return Settings(**data)
+
+
+def reload_config(path: str = CONFIG_PATH) -> Settings | None:
     try:
-        new_settings = Settings(**data)
-    except ValidationError as e:
+        new_settings = load_settings(path)
+    except (OSError, json.JSONDecodeError, ValidationError) as e:
         print("Invalid config update, keeping old settings.")
         print(e)
-        return
+        return None
     global settings
     settings = new_settings
     print("✅ Reloaded config!")
+    return new_settings
 
 
 reload_config()
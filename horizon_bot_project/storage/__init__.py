@@ -1,10 +1,9 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import AsyncGenerator, List, Optional
+from typing import AsyncGenerator, Dict, List, Optional
 
-import discord
-
-from hbp_types.team import Team
+from hbp_types.message import MessageRecord, MessageRevision
+from hbp_types.team import Team, TeamStatus
 from hbp_types.tournament import Tournament
 
 
@@ -12,16 +11,54 @@ class MessageStorage(ABC):
     @abstractmethod
     async def log_message(
         self,
-        message: discord.Message,
+        message: MessageRecord,
     ) -> None: ...
 
     async def bulk_log_message(
         self,
-        messages: List[discord.Message],
+        messages: List[MessageRecord],
     ) -> None:
         for msg in messages:
             await self.log_message(msg)
 
+    @abstractmethod
+    async def log_revisions(
+        self,
+        revisions: List[MessageRevision],
+    ) -> None: ...
+
+    async def log_batch(
+        self,
+        messages: List[MessageRecord],
+        revisions: List[MessageRevision],
+    ) -> None:
+        """Stores messages and then revisions, in one transaction where the
+        storage supports it."""
+        await self.bulk_log_message(messages)
+        await self.log_revisions(revisions)
+
+    @abstractmethod
+    async def get_messages(
+        self,
+        author_id: Optional[int] = None,
+        containing: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[MessageRecord]:
+        """Newest messages first, with their content decompressed."""
+
+    @abstractmethod
+    async def get_message_history(self, message_id: int) -> List[MessageRevision]:
+        """Edits and the deletion of a message, oldest first."""
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
 
 class MinecraftLinkStorage(ABC):
     @abstractmethod
@@ -29,6 +66,9 @@ class MinecraftLinkStorage(ABC):
         self, discord_user_id: int, minecraft_uuid: str, canonical_ign: str
     ) -> None: ...
 
+    @abstractmethod
+    async def bulk_link_accounts(self, links: List[tuple[int, str, str]]) -> None: ...
+
     @abstractmethod
     async def unlink_account(self, discord_user_id: int) -> None: ...
 
@@ -41,8 +81,50 @@ class MinecraftLinkStorage(ABC):
     @abstractmethod
     async def get_discord_user_id(self, minecraft_uuid: str) -> int | None: ...
 
+    @abstractmethod
+    async def get_links(self, limit: int) -> List[tuple[int, str, str]]: ...
+
+    @abstractmethod
+    async def get_links_to_refresh(
+        self, after_user_id: Optional[int], limit: int, refreshed_before: datetime
+    ) -> List[tuple[int, str, str]]: ...
+
+    @abstractmethod
+    async def bulk_set_usernames(
+        self, usernames: List[tuple[int, str]], refreshed_at: datetime
+    ) -> None: ...
+
+    @abstractmethod
+    async def load_refresh_cursor(self) -> Optional[int]: ...
+
+    @abstractmethod
+    async def save_refresh_cursor(self, after_user_id: Optional[int]) -> None: ...
+
+
+class HypixelCacheStorage(ABC):
+    @abstractmethod
+    async def get_player(
+        self, minecraft_uuid: str, used_at: datetime
+    ) -> Optional[tuple[Dict[str, str], datetime]]:
+        """Cached social links and their fetch time; marks the entry as
+        used at ``used_at``."""
+
+    @abstractmethod
+    async def put_player(
+        self,
+        minecraft_uuid: str,
+        links: Dict[str, str],
+        fetched_at: datetime,
+        max_entries: int,
+    ) -> None:
+        """Stores the entry, then evicts the least recently used entries
+        above ``max_entries``."""
+
 
 class SignupStorage(ABC):
+    """Teams are partitioned by ``tournament_id``; lookups take the
+    tournament to search and mutations use ``team.tournament_id``."""
+
     @abstractmethod
     async def load_signups_closed(self, guild_id: int) -> bool: ...
 
@@ -50,17 +132,37 @@ class SignupStorage(ABC):
     async def set_signups_closed(self, guild_id: int, closed: bool) -> None: ...
 
     @abstractmethod
-    async def all_teams_generator(self) -> AsyncGenerator[Team, None]: ...
+    async def all_teams_generator(
+        self,
+        tournament_id: int,
+        status: Optional[TeamStatus] = None,
+        approved_after: Optional[datetime] = None,
+    ) -> AsyncGenerator[Team, None]: ...
+
+    @abstractmethod
+    async def count_teams(
+        self,
+        tournament_id: int,
+        status: Optional[TeamStatus] = None,
+        approved_after: Optional[datetime] = None,
+    ) -> int: ...
+
+    @abstractmethod
+    async def get_team(
+        self, tournament_id: int, canonical_name: str
+    ) -> Optional[Team]: ...
 
     @abstractmethod
     async def add_team(self, team: Team) -> None: ...
 
     @abstractmethod
-    async def get_team_for_member(self, member_id: int) -> Optional[Team]: ...
+    async def get_team_for_member(
+        self, tournament_id: int, member_id: int
+    ) -> Optional[Team]: ...
 
     @abstractmethod
     async def get_team_for_signup_message(
-        self, message: discord.Message
+        self, tournament_id: int, message_id: int
     ) -> Optional[Team]: ...
 
     @abstractmethod
@@ -76,10 +178,36 @@ class SignupStorage(ABC):
     async def set_approved_at(self, team: Team, date: datetime) -> None: ...
 
     @abstractmethod
-    async def backup(self) -> None: ...
+    async def bulk_set_approved(
+        self, teams: List[Team], date: datetime
+    ) -> List[bool]:
+        """Approves teams that are still pending; returns which were."""
 
     @abstractmethod
-    async def clear(self) -> None: ...
+    async def bulk_set_team_denied(self, teams: List[Team], user: int) -> List[bool]:
+        """Denies teams not denied yet; returns which were."""
+
+    @abstractmethod
+    async def bulk_set_team_roles(self, roles: List[tuple[Team, int]]) -> None: ...
+
+    @abstractmethod
+    async def get_substitutes(self, tournament_id: int) -> List[tuple[str, datetime]]:
+        """Queued substitutes as ``(canonical_name, approved_at)``."""
+
+    @abstractmethod
+    async def add_substitutes(
+        self, tournament_id: int, substitutes: List[tuple[str, datetime]]
+    ) -> None: ...
+
+    @abstractmethod
+    async def remove_substitutes(
+        self, tournament_id: int, canonical_names: List[str]
+    ) -> None: ...
+
+    @abstractmethod
+    async def claim_unassigned_teams(self, tournament_id: int) -> int:
+        """Moves teams stored before tournaments were tracked (tournament 0)
+        to ``tournament_id``; returns how many there were."""
 
 
 class TournamentStorage(ABC):
@@ -90,7 +218,8 @@ class TournamentStorage(ABC):
     async def is_signups_open(self) -> bool: ...
 
     @abstractmethod
-    async def insert_tournament(self, tournament: Tournament) -> None: ...
+    async def insert_tournament(self, tournament: Tournament) -> int:
+        """Stores the tournament and returns its new ``tournament_id``."""
 
 
 class Storage:
@@ -100,11 +229,13 @@ class Storage:
         minecraft_link_storage: MinecraftLinkStorage,
         signup_storage: SignupStorage,
         tournament_storage: TournamentStorage,
+        hypixel_cache_storage: HypixelCacheStorage,
     ):
         self._message_storage = message_storage
         self._minecraft_link_storage = minecraft_link_storage
         self._signup_storage = signup_storage
         self._tournament_storage = tournament_storage
+        self._hypixel_cache_storage = hypixel_cache_storage
 
     @property
     def message_storage(self):
@@ -121,3 +252,7 @@ class Storage:
     @property
     def tournament_storage(self):
         return self._tournament_storage
+
+    @property
+    def hypixel_cache_storage(self):
+        return self._hypixel_cache_storage
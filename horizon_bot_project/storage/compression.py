@@ -0,0 +1,144 @@
+import re
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from hbp_types.message import MessageRecord, MessageRevision
+
+# zlib only looks back 32 KiB, a larger dictionary is never referenced
+MAX_DICTIONARY_SIZE = 32768
+# fewer sample messages than this give a dictionary that mostly hurts
+MIN_TRAINING_MESSAGES = 200
+
+CREATE_DICTIONARIES_SQL = """
+    CREATE TABLE IF NOT EXISTS message_dictionaries (
+        dict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dictionary BLOB NOT NULL,
+        sample_size INTEGER NOT NULL,
+        created_at TEXT NOT NULL
+    )
+"""
+INSERT_DICTIONARY_SQL = """
+    INSERT INTO message_dictionaries (dictionary, sample_size, created_at)
+    VALUES (?, ?, ?)
+"""
+SELECT_DICTIONARIES_SQL = """
+    SELECT dict_id, dictionary FROM message_dictionaries WHERE dict_id > ?
+"""
+# newest plain messages, the ones a dictionary is trained on
+SELECT_TRAINING_SQL = """
+    SELECT content FROM messages WHERE content_dict IS NULL ORDER BY id DESC LIMIT ?
+"""
+
+_WORDS = re.compile(r"\S+\s*")
+
+
+def train_dictionary(samples: Iterable[str], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """A zlib preset dictionary of the phrases that save the most bytes
+    across ``samples``. zlib has no trainer like zstd's, so this keeps word
+    1- to 4-grams (and whole short messages) weighted by how many messages
+    contain them, with the best ones last, where matches are cheapest."""
+    size = min(size, MAX_DICTIONARY_SIZE)
+    frequency: Counter = Counter()
+    for sample in samples:
+        words = _WORDS.findall(sample)
+        grams = {sample} if len(sample) <= 64 else set()
+        for n in range(1, 5):
+            for i in range(len(words) - n + 1):
+                grams.add("".join(words[i : i + n]))
+        frequency.update(grams)
+
+    # a match costs about 3 bytes, shorter phrases save nothing
+    scored = sorted(
+        (
+            ((count - 1) * (len(gram) - 3), gram)
+            for gram, count in frequency.items()
+            if count > 1 and len(gram) > 3
+        ),
+        reverse=True,
+    )
+    chosen: List[bytes] = []
+    used = 0
+    seen = ""
+    for _, gram in scored:
+        if gram in seen:
+            continue
+        encoded = gram.encode()
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+        seen += gram
+        if size - used < 8:
+            break
+    return b"".join(reversed(chosen))
+
+
+class MessageCompressor:
+    """Compresses message content with the newest dictionary and
+    decompresses it with whichever dictionary a row was written with.
+
+    Shared by the SQLite storage, the writer process and the migration
+    tool, so it only deals in rows and bytes, never in connections.
+    """
+
+    def __init__(self, dictionaries: Iterable[Tuple[int, bytes]] = ()):
+        self._dictionaries: Dict[int, bytes] = {}
+        self.dict_id: Optional[int] = None
+        self._template = None
+        self.add_dictionaries(dictionaries)
+
+    @property
+    def newest_dict_id(self) -> int:
+        return max(self._dictionaries, default=0)
+
+    def add_dictionaries(self, dictionaries: Iterable[Tuple[int, bytes]]) -> None:
+        for dict_id, dictionary in dictionaries:
+            self._dictionaries[dict_id] = dictionary
+        if self._dictionaries and self.newest_dict_id != self.dict_id:
+            self.dict_id = self.newest_dict_id
+            # priming a compressor with the dictionary is the expensive
+            # part, copies of a primed one are cheap
+            self._template = zlib.compressobj(
+                6,
+                zlib.DEFLATED,
+                -15,
+                9,
+                zlib.Z_DEFAULT_STRATEGY,
+                self._dictionaries[self.dict_id],
+            )
+
+    def compress(self, content: Optional[str]) -> Tuple[object, Optional[int]]:
+        """``(content, content_dict)`` as stored; text that does not get
+        smaller is kept as is with no dictionary."""
+        if self._template is None or content is None:
+            return content, None
+        raw = content.encode()
+        compressor = self._template.copy()
+        compressed = compressor.compress(raw) + compressor.flush()
+        if len(compressed) >= len(raw):
+            return content, None
+        return compressed, self.dict_id
+
+    def decompress(self, content, content_dict: Optional[int]) -> Optional[str]:
+        if content_dict is None:
+            return content
+        decompressor = zlib.decompressobj(-15, zdict=self._dictionaries[content_dict])
+        return (decompressor.decompress(content) + decompressor.flush()).decode()
+
+    def rows(
+        self, records: Iterable[Union[MessageRecord, MessageRevision]]
+    ) -> List[tuple]:
+        """``INSERT_MESSAGE_SQL`` or ``INSERT_REVISION_SQL`` parameters for
+        ``records``; both kinds of record keep their content third."""
+        rows = []
+        for message_id, field, content, timestamp in records:
+            content, content_dict = self.compress(content)
+            rows.append((message_id, field, content, timestamp, content_dict))
+        return rows
+
+
+def plain_rows(
+    records: Iterable[Union[MessageRecord, MessageRevision]],
+) -> List[tuple]:
+    return [(*record, None) for record in records]
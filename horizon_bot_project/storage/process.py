@@ -0,0 +1,322 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import sqlite3
+import threading
+from datetime import datetime
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Tuple
+
+from hbp_types.message import MessageRecord, MessageRevision
+
+from . import MessageStorage
+from .compression import (
+    INSERT_DICTIONARY_SQL,
+    MIN_TRAINING_MESSAGES,
+    SELECT_DICTIONARIES_SQL,
+    SELECT_TRAINING_SQL,
+    MessageCompressor,
+    plain_rows,
+    train_dictionary,
+)
+from .sqlite import INSERT_MESSAGE_SQL, INSERT_REVISION_SQL, SQLiteMessageStorage
+
+# upper bound of rows merged into one transaction by the writer
+_MAX_TRANSACTION_ROWS = 5000
+
+
+def _train_dictionary(
+    db: sqlite3.Connection,
+    compressor: MessageCompressor,
+    dictionary_size: int,
+    training_samples: int,
+) -> None:
+    samples = [
+        row[0] for row in db.execute(SELECT_TRAINING_SQL, (training_samples,))
+    ]
+    if len(samples) < MIN_TRAINING_MESSAGES:
+        return
+    dictionary = train_dictionary(samples, dictionary_size)
+    with db:
+        db.execute(
+            INSERT_DICTIONARY_SQL,
+            (dictionary, len(samples), datetime.now().isoformat()),
+        )
+    compressor.add_dictionaries(
+        db.execute(SELECT_DICTIONARIES_SQL, (compressor.newest_dict_id,))
+    )
+    print(
+        f"Trained a {len(dictionary)} byte message dictionary "
+        f"on {len(samples)} messages."
+    )
+
+
+def run_message_writer(
+    db_path: str,
+    conn: Connection,
+    compression: bool,
+    dictionary_size: int = 32768,
+    training_samples: int = 5000,
+) -> None:
+    """Entry point of the writer process. Owns the messages database, commits
+    every ``(batch_id, messages, revisions)`` it receives and acknowledges
+    the batch ids until it is sent ``None``."""
+    # Ctrl+C reaches the whole process group; the parent decides when we stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    db = sqlite3.connect(db_path)
+    compressor = None
+    if compression:
+        # the parent trained a dictionary before starting us, if it could;
+        # otherwise we train one once enough messages are stored
+        compressor = MessageCompressor(db.execute(SELECT_DICTIONARIES_SQL, (0,)))
+    untrained = 0
+    stopping = False
+    while not stopping:
+        try:
+            item = conn.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+
+        batch_ids = [item[0]]
+        messages = list(item[1])
+        revisions = list(item[2])
+        while len(messages) + len(revisions) < _MAX_TRANSACTION_ROWS and conn.poll():
+            item = conn.recv()
+            if item is None:
+                stopping = True
+                break
+            batch_ids.append(item[0])
+            messages.extend(item[1])
+            revisions.extend(item[2])
+
+        rows = compressor.rows if compressor else plain_rows
+        with db:
+            db.executemany(INSERT_MESSAGE_SQL, rows(messages))
+            db.executemany(INSERT_REVISION_SQL, rows(revisions))
+        conn.send(batch_ids)
+
+        if compressor and compressor.dict_id is None:
+            untrained += len(messages)
+            if untrained >= MIN_TRAINING_MESSAGES:
+                untrained = 0
+                _train_dictionary(db, compressor, dictionary_size, training_samples)
+    db.close()
+    conn.close()
+
+
+class ProcessMessageStorage(MessageStorage):
+    """Hands message batches to a dedicated writer process, keeping SQLite
+    work off the bot's event loop and GIL.
+
+    Batches stay in ``_pending`` until the writer acknowledges the commit,
+    which bounds memory (callers wait once ``max_pending_batches`` batches,
+    of however many messages each, are in flight) and lets a restarted
+    writer pick up where the old one died. A batch the old writer committed
+    but did not acknowledge is resent; unique indexes make the writer skip
+    its rows the second time.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "messages.db",
+        max_pending_batches: int = 1000,
+        supervise_interval: float = 1.0,
+        shutdown_timeout: float = 30.0,
+        compression: bool = False,
+        dictionary_size: int = 32768,
+        training_samples: int = 5000,
+    ):
+        self.db_path = db_path
+        self.compression = compression
+        self._dictionary_size = dictionary_size
+        self._training_samples = training_samples
+        # sets up the database and serves reads, writes go to the writer
+        self._reader = SQLiteMessageStorage(
+            db_path, compression, dictionary_size, training_samples
+        )
+        self._context = multiprocessing.get_context("spawn")
+        self._max_pending_batches = max_pending_batches
+        self._supervise_interval = supervise_interval
+        self._shutdown_timeout = shutdown_timeout
+
+        # batch id -> (messages, revisions)
+        self._pending: Dict[int, Tuple[list, list]] = {}
+        self._next_batch_id = 0
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self._send_lock = asyncio.Lock()
+
+        self._conn: Optional[Connection] = None
+        self._ack_reader: Optional[threading.Thread] = None
+        self._process: Optional[multiprocessing.Process] = None
+        self._supervisor: Optional[asyncio.Task] = None
+        self.restarts = 0
+        self.backpressure_waits = 0
+
+    async def _initialize_database(self):
+        await self._reader._initialize_database()
+
+    async def start(self) -> None:
+        self._spawn()
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    def _spawn(self) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=run_message_writer,
+            args=(
+                os.path.abspath(self.db_path),
+                child_conn,
+                self.compression,
+                self._dictionary_size,
+                self._training_samples,
+            ),
+            name="message-writer",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+
+        self._conn = parent_conn
+        # a thread rather than loop.add_reader, which the proactor event
+        # loop used on Windows does not implement
+        self._ack_reader = threading.Thread(
+            target=self._read_acks,
+            args=(parent_conn, asyncio.get_running_loop()),
+            name="message-writer-acks",
+            daemon=True,
+        )
+        self._ack_reader.start()
+
+    async def _detach(self) -> None:
+        if self._conn is None:
+            return
+        # the reader stops once the writer has exited and closed its end;
+        # closing the connection under a blocked recv instead would race
+        await asyncio.to_thread(self._ack_reader.join)
+        self._conn.close()
+        self._conn = None
+        self._ack_reader = None
+
+    def _read_acks(self, conn: Connection, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            while True:
+                loop.call_soon_threadsafe(self._acknowledge, conn.recv())
+        except (EOFError, OSError):
+            # the writer is gone, the supervisor restarts it
+            pass
+        except RuntimeError:
+            # the event loop was closed without closing the storage
+            pass
+
+    def _acknowledge(self, batch_ids: List[int]) -> None:
+        for batch_id in batch_ids:
+            self._pending.pop(batch_id, None)
+        if len(self._pending) < self._max_pending_batches:
+            self._has_space.set()
+
+    async def _restart(self) -> None:
+        async with self._send_lock:
+            await self._detach()
+            self._spawn()
+            for batch_id, (messages, revisions) in list(self._pending.items()):
+                await self._send((batch_id, messages, revisions))
+
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(self._supervise_interval)
+            if not self._process.is_alive():
+                print(
+                    f"Message writer exited with code {self._process.exitcode}, "
+                    f"restarting with {len(self._pending)} unacknowledged batches."
+                )
+                self.restarts += 1
+                await self._restart()
+
+    async def _send(self, item) -> None:
+        conn = self._conn
+        if conn is None:
+            return
+        try:
+            await asyncio.to_thread(conn.send, item)
+        except OSError:
+            # unacknowledged batches are resent once the writer is restarted
+            pass
+
+    async def log_message(self, message: MessageRecord) -> None:
+        await self.bulk_log_message([message])
+
+    async def bulk_log_message(self, messages: List[MessageRecord]) -> None:
+        if messages:
+            await self._submit(list(messages), [])
+
+    async def log_revisions(self, revisions: List[MessageRevision]) -> None:
+        if revisions:
+            await self._submit([], list(revisions))
+
+    async def log_batch(
+        self, messages: List[MessageRecord], revisions: List[MessageRevision]
+    ) -> None:
+        if messages or revisions:
+            await self._submit(list(messages), list(revisions))
+
+    async def _submit(self, messages: list, revisions: list) -> None:
+        while len(self._pending) >= self._max_pending_batches:
+            self.backpressure_waits += 1
+            self._has_space.clear()
+            await self._has_space.wait()
+
+        async with self._send_lock:
+            batch_id = self._next_batch_id
+            self._next_batch_id += 1
+            self._pending[batch_id] = (messages, revisions)
+            await self._send((batch_id, messages, revisions))
+
+    async def get_messages(
+        self,
+        author_id: Optional[int] = None,
+        containing: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[MessageRecord]:
+        return await self._reader.get_messages(author_id, containing, limit)
+
+    async def get_message_history(self, message_id: int) -> List[MessageRevision]:
+        return await self._reader.get_message_history(message_id)
+
+    async def close(self) -> None:
+        if self._supervisor is not None:
+            # under the send lock, so a restart in progress finishes first
+            async with self._send_lock:
+                self._supervisor.cancel()
+            self._supervisor = None
+        if self._process is None:
+            return
+
+        if not self._process.is_alive():
+            await self._restart()
+        async with self._send_lock:
+            await self._send(None)
+        await asyncio.to_thread(self._process.join, self._shutdown_timeout)
+        if self._process.is_alive():
+            print("Message writer did not drain in time, terminating it.")
+            self._process.terminate()
+        # delivers the acknowledgements of everything the writer committed
+        await self._detach()
+        self._process = None
+
+        if self._pending:
+            print(
+                f"Message writer stopped with {len(self._pending)} batches unwritten."
+            )
+
+    def stats(self) -> dict:
+        return {
+            "writer_alive": self._process is not None and self._process.is_alive(),
+            "pending_batches": len(self._pending),
+            "restarts": self.restarts,
+            "backpressure_waits": self.backpressure_waits,
+        }
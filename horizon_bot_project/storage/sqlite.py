@@ -1,15 +1,25 @@
+import asyncio
 from datetime import datetime
 import json
-import os
 import aiosqlite
-from typing import AsyncGenerator, List, Optional
+from typing import AsyncGenerator, Dict, List, Optional
 
-import discord
-
-from hbp_types.team import Team
+from hbp_types.message import MessageRecord, MessageRevision
+from hbp_types.team import Team, TeamStatus
 from hbp_types.tournament import Tournament
 
+from .compression import (
+    CREATE_DICTIONARIES_SQL,
+    INSERT_DICTIONARY_SQL,
+    MIN_TRAINING_MESSAGES,
+    SELECT_DICTIONARIES_SQL,
+    SELECT_TRAINING_SQL,
+    MessageCompressor,
+    plain_rows,
+    train_dictionary,
+)
 from . import (
+    HypixelCacheStorage,
     MessageStorage,
     MinecraftLinkStorage,
     SignupStorage,
@@ -18,25 +28,84 @@ from . import (
 )
 
 
+# rows already stored (a resent or replayed batch) are skipped
+INSERT_MESSAGE_SQL = """
+    INSERT OR IGNORE INTO messages (message_id, author_id, content, timestamp, content_dict)
+    VALUES (?, ?, ?, ?, ?)
+"""
+INSERT_REVISION_SQL = """
+    INSERT OR IGNORE INTO message_revisions (message_id, kind, content, timestamp, content_dict)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
 class SQLiteStorage(Storage):
-    def __init__(self):
+    def __init__(
+        self,
+        message_writer_process: bool = False,
+        writer_queue_batches: int = 1000,
+        message_compression: bool = False,
+        dictionary_size: int = 32768,
+        training_samples: int = 5000,
+    ):
+        compression = dict(
+            compression=message_compression,
+            dictionary_size=dictionary_size,
+            training_samples=training_samples,
+        )
+        if message_writer_process:
+            from .process import ProcessMessageStorage
+
+            message_storage = ProcessMessageStorage(
+                max_pending_batches=writer_queue_batches, **compression
+            )
+        else:
+            message_storage = SQLiteMessageStorage(**compression)
+
         super().__init__(
-            SQLiteMessageStorage(),
+            message_storage,
             SQLiteMinecraftLinkStorage(),
             SQLiteSignupsStorage(),
             SQLiteTournamentStorage(),
+            SQLiteHypixelCacheStorage(),
         )
 
     async def setup(self):
         await self.message_storage._initialize_database()
         await self.minecraft_link_storage._initialize_database()
-        await self.signup_storage._initialize_database()
         await self.tournament_storage._initialize_database()
+        await self.signup_storage._initialize_database(
+            await self.tournament_storage._team_counts()
+        )
+        await self.hypixel_cache_storage._initialize_database()
 
 
 class SQLiteMessageStorage(MessageStorage):
-    def __init__(self, db_path: str = "messages.db"):
+    """Messages, optionally with their content compressed.
+
+    With ``compression`` on, a zlib dictionary is trained on the newest
+    ``training_samples`` stored messages once there are enough of them (on
+    startup, or after a write once the bot has stored enough), and
+    content is compressed with it from then on (``content_dict`` names the
+    dictionary, ``NULL`` means plain text). Reads decompress any row,
+    whether or not compression is currently enabled.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "messages.db",
+        compression: bool = False,
+        dictionary_size: int = 32768,
+        training_samples: int = 5000,
+    ):
         self.db_path = db_path
+        self.compression = compression
+        self._dictionary_size = dictionary_size
+        self._training_samples = training_samples
+        self._compressor = MessageCompressor()
+        # messages stored since training was last attempted
+        self._untrained = 0
+        self._training = False
 
     async def _initialize_database(self):
         async with aiosqlite.connect(self.db_path) as db:
@@ -46,49 +115,192 @@ class SQLiteMessageStorage(MessageStorage):
                     message_id TEXT NOT NULL,
                     author_id TEXT NOT NULL,
                     content TEXT NOT NULL,
-                    timestamp TEXT NOT NULL
+                    timestamp TEXT NOT NULL,
+                    content_dict INTEGER
+                )
+            """)
+            async with db.execute("PRAGMA table_info(messages)") as cursor:
+                if "content_dict" not in [row[1] for row in await cursor.fetchall()]:
+                    await db.execute(
+                        "ALTER TABLE messages ADD COLUMN content_dict INTEGER"
+                    )
+            # edits and deletion tombstones, looked up by message
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS message_revisions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    message_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    content TEXT,
+                    timestamp TEXT NOT NULL,
+                    content_dict INTEGER
                 )
             """)
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_message_revisions_message_id
+                ON message_revisions (message_id, id)
+            """)
+            await self._create_unique_index(
+                db, "idx_messages_message_id", "messages", "message_id"
+            )
+            await self._create_unique_index(
+                db,
+                "idx_message_revisions_unique",
+                "message_revisions",
+                "message_id, kind, timestamp",
+            )
+            await db.execute(CREATE_DICTIONARIES_SQL)
             await db.commit()
 
-    async def log_message(self, message: discord.Message) -> None:
+            await self._load_dictionaries(db)
+            if self.compression and self._compressor.dict_id is None:
+                await self._train_dictionary(db)
+
+    async def _create_unique_index(
+        self, db: aiosqlite.Connection, name: str, table: str, columns: str
+    ) -> None:
+        async with db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+        ) as cursor:
+            if await cursor.fetchone():
+                return
+        # older databases may hold rows stored twice, keep the first copy
+        cursor = await db.execute(f"""
+            DELETE FROM {table} WHERE id NOT IN (
+                SELECT MIN(id) FROM {table} GROUP BY {columns}
+            )
+        """)
+        if cursor.rowcount:
+            print(f"Removed {cursor.rowcount} duplicate rows from {table}.")
+        await db.execute(f"CREATE UNIQUE INDEX {name} ON {table} ({columns})")
+
+    async def _load_dictionaries(self, db: aiosqlite.Connection) -> None:
+        async with db.execute(
+            SELECT_DICTIONARIES_SQL, (self._compressor.newest_dict_id,)
+        ) as cursor:
+            self._compressor.add_dictionaries(await cursor.fetchall())
+
+    async def _train_dictionary(self, db: aiosqlite.Connection) -> None:
+        async with db.execute(
+            SELECT_TRAINING_SQL, (self._training_samples,)
+        ) as cursor:
+            samples = [row[0] for row in await cursor.fetchall()]
+        if len(samples) < MIN_TRAINING_MESSAGES:
+            print(
+                f"Storing messages uncompressed until {MIN_TRAINING_MESSAGES} "
+                f"are stored to train a dictionary on ({len(samples)} so far)."
+            )
+            return
+        dictionary = await asyncio.to_thread(
+            train_dictionary, samples, self._dictionary_size
+        )
+        await db.execute(
+            INSERT_DICTIONARY_SQL,
+            (dictionary, len(samples), datetime.now().isoformat()),
+        )
+        await db.commit()
+        await self._load_dictionaries(db)
+        print(
+            f"Trained a {len(dictionary)} byte message dictionary "
+            f"on {len(samples)} messages."
+        )
+
+    async def _train_after_write(self, db: aiosqlite.Connection, stored: int) -> None:
+        if not self.compression or self._compressor.dict_id is not None:
+            return
+        self._untrained += stored
+        if self._untrained < MIN_TRAINING_MESSAGES or self._training:
+            return
+        self._untrained = 0
+        self._training = True
+        try:
+            await self._train_dictionary(db)
+        finally:
+            self._training = False
+
+    def _rows(self, records: list) -> List[tuple]:
+        if self.compression:
+            return self._compressor.rows(records)
+        return plain_rows(records)
+
+    async def _read(self, sql: str, params: tuple) -> list:
+        """Runs a query that may use ``message_content(content, content_dict)``
+        to get decompressed content."""
         async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                """
-                INSERT INTO messages (message_id, author_id, content, timestamp)
-                VALUES (?, ?, ?, ?)
-            """,
-                (
-                    str(message.id),
-                    str(message.author.id),
-                    message.content,
-                    message.created_at.isoformat(),
-                ),
+            # dictionaries may have been added by the migration tool
+            await self._load_dictionaries(db)
+            await db.create_function(
+                "message_content", 2, self._compressor.decompress, deterministic=True
             )
-            await db.commit()
+            async with db.execute(sql, params) as cursor:
+                return await cursor.fetchall()
 
-    async def bulk_log_messages(self, messages: List[discord.Message]) -> None:
+    async def log_message(self, message: MessageRecord) -> None:
+        await self.bulk_log_message([message])
+
+    async def bulk_log_message(self, messages: List[MessageRecord]) -> None:
         if not messages:
             return
-        data = [
-            (
-                str(m.id),
-                str(m.author.id),
-                m.content,
-                m.created_at.isoformat(),
-            )
-            for m in messages
-        ]
         async with aiosqlite.connect(self.db_path) as db:
-            await db.executemany(
-                """
-                INSERT INTO messages (message_id, author_id, content, timestamp)
-                VALUES (?, ?, ?, ?)
-            """,
-                data,
-            )
+            await db.executemany(INSERT_MESSAGE_SQL, self._rows(messages))
+            await db.commit()
+            await self._train_after_write(db, len(messages))
+
+    async def log_revisions(self, revisions: List[MessageRevision]) -> None:
+        if not revisions:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(INSERT_REVISION_SQL, self._rows(revisions))
             await db.commit()
 
+    async def log_batch(
+        self, messages: List[MessageRecord], revisions: List[MessageRevision]
+    ) -> None:
+        if not messages and not revisions:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(INSERT_MESSAGE_SQL, self._rows(messages))
+            await db.executemany(INSERT_REVISION_SQL, self._rows(revisions))
+            await db.commit()
+            await self._train_after_write(db, len(messages))
+
+    async def get_messages(
+        self,
+        author_id: Optional[int] = None,
+        containing: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[MessageRecord]:
+        conditions = []
+        params: list = []
+        if author_id is not None:
+            conditions.append("author_id = ?")
+            params.append(str(author_id))
+        if containing is not None:
+            conditions.append("instr(message_content(content, content_dict), ?) > 0")
+            params.append(containing)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = await self._read(
+            f"""
+            SELECT message_id, author_id, message_content(content, content_dict), timestamp
+            FROM messages {where}
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (*params, limit),
+        )
+        return [MessageRecord(*row) for row in rows]
+
+    async def get_message_history(self, message_id: int) -> List[MessageRevision]:
+        rows = await self._read(
+            """
+            SELECT message_id, kind, message_content(content, content_dict), timestamp
+            FROM message_revisions
+            WHERE message_id = ?
+            ORDER BY id
+            """,
+            (str(message_id),),
+        )
+        return [MessageRevision(*row) for row in rows]
+
 
 class SQLiteMinecraftLinkStorage(MinecraftLinkStorage):
     def __init__(self, db_path: str = "messages.db"):
@@ -102,7 +314,19 @@ class SQLiteMinecraftLinkStorage(MinecraftLinkStorage):
                 CREATE TABLE IF NOT EXISTS account_links (
                     discord_user_id TEXT PRIMARY KEY,
                     minecraft_uuid TEXT UNIQUE NOT NULL,
-                    minecraft_username TEXT NOT NULL
+                    minecraft_username TEXT NOT NULL,
+                    refreshed_at TEXT
+                )
+            """)
+            await cursor.execute("PRAGMA table_info(account_links)")
+            if "refreshed_at" not in [row[1] for row in await cursor.fetchall()]:
+                await cursor.execute(
+                    "ALTER TABLE account_links ADD COLUMN refreshed_at TEXT"
+                )
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS link_refresh_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    after_user_id TEXT
                 )
             """)
             await conn.commit()
@@ -115,10 +339,32 @@ class SQLiteMinecraftLinkStorage(MinecraftLinkStorage):
             cursor = await conn.cursor()
             await cursor.execute(
                 """
-                INSERT OR REPLACE INTO account_links (discord_user_id, minecraft_uuid, minecraft_username)
-                VALUES (?, ?, ?)
+                INSERT OR REPLACE INTO account_links (discord_user_id, minecraft_uuid, minecraft_username, refreshed_at)
+                VALUES (?, ?, ?, ?)
+            """,
+                (
+                    str(discord_user_id),
+                    minecraft_uuid,
+                    canonical_ign,
+                    datetime.now().isoformat(),
+                ),
+            )
+            await conn.commit()
+
+    async def bulk_link_accounts(self, links: List[tuple[int, str, str]]) -> None:
+        if not links:
+            return
+        now = datetime.now().isoformat()
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.executemany(
+                """
+                INSERT OR REPLACE INTO account_links (discord_user_id, minecraft_uuid, minecraft_username, refreshed_at)
+                VALUES (?, ?, ?, ?)
             """,
-                (str(discord_user_id), minecraft_uuid, canonical_ign),
+                [
+                    (str(user_id), uuid, ign, now)
+                    for user_id, uuid, ign in links
+                ],
             )
             await conn.commit()
 
@@ -173,12 +419,231 @@ class SQLiteMinecraftLinkStorage(MinecraftLinkStorage):
             row = await cursor.fetchone()
             return int(row[0]) if row else None
 
+    async def get_links(self, limit: int) -> List[tuple[int, str, str]]:
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute(
+                """
+                SELECT discord_user_id, minecraft_uuid, minecraft_username
+                FROM account_links
+                LIMIT ?
+            """,
+                (limit,),
+            )
+            return [
+                (int(user_id), uuid, username)
+                for user_id, uuid, username in await cursor.fetchall()
+            ]
+
+    async def get_links_to_refresh(
+        self, after_user_id: Optional[int], limit: int, refreshed_before: datetime
+    ) -> List[tuple[int, str, str]]:
+        """Next ``limit`` links after the cursor (in primary key order) that
+        were not refreshed since ``refreshed_before``."""
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute(
+                """
+                SELECT discord_user_id, minecraft_uuid, minecraft_username
+                FROM account_links
+                WHERE discord_user_id > ?
+                  AND (refreshed_at IS NULL OR refreshed_at < ?)
+                ORDER BY discord_user_id
+                LIMIT ?
+            """,
+                (
+                    "" if after_user_id is None else str(after_user_id),
+                    refreshed_before.isoformat(),
+                    limit,
+                ),
+            )
+            return [
+                (int(user_id), uuid, username)
+                for user_id, uuid, username in await cursor.fetchall()
+            ]
 
-class SQLiteSignupsStorage(SignupStorage):
-    def __init__(self, db_path: str = "signups.db"):
+    async def bulk_set_usernames(
+        self, usernames: List[tuple[int, str]], refreshed_at: datetime
+    ) -> None:
+        if not usernames:
+            return
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.executemany(
+                """
+                UPDATE account_links SET minecraft_username = ?, refreshed_at = ?
+                WHERE discord_user_id = ?
+            """,
+                [
+                    (username, refreshed_at.isoformat(), str(user_id))
+                    for user_id, username in usernames
+                ],
+            )
+            await conn.commit()
+
+    async def load_refresh_cursor(self) -> Optional[int]:
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute(
+                "SELECT after_user_id FROM link_refresh_state WHERE id = 1"
+            )
+            row = await cursor.fetchone()
+            return int(row[0]) if row and row[0] else None
+
+    async def save_refresh_cursor(self, after_user_id: Optional[int]) -> None:
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.execute(
+                "INSERT OR REPLACE INTO link_refresh_state (id, after_user_id) VALUES (1, ?)",
+                (None if after_user_id is None else str(after_user_id),),
+            )
+            await conn.commit()
+
+
+class SQLiteHypixelCacheStorage(HypixelCacheStorage):
+    """Only a cache, so it lives in its own file that can be deleted."""
+
+    def __init__(self, db_path: str = "hypixel_cache.db"):
         self.db_path = db_path
 
     async def _initialize_database(self):
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS hypixel_players (
+                    minecraft_uuid TEXT PRIMARY KEY,
+                    social_links TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    used_at TEXT NOT NULL
+                )
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_hypixel_players_used_at
+                ON hypixel_players (used_at)
+            """)
+            await conn.commit()
+
+    async def get_player(
+        self, minecraft_uuid: str, used_at: datetime
+    ) -> Optional[tuple[Dict[str, str], datetime]]:
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute(
+                """
+                UPDATE hypixel_players SET used_at = ?
+                WHERE minecraft_uuid = ?
+                RETURNING social_links, fetched_at
+            """,
+                (used_at.isoformat(), minecraft_uuid),
+            )
+            row = await cursor.fetchone()
+            await conn.commit()
+            if row is None:
+                return None
+            return json.loads(row[0]), datetime.fromisoformat(row[1])
+
+    async def put_player(
+        self,
+        minecraft_uuid: str,
+        links: Dict[str, str],
+        fetched_at: datetime,
+        max_entries: int,
+    ) -> None:
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.execute(
+                """
+                INSERT OR REPLACE INTO hypixel_players (minecraft_uuid, social_links, fetched_at, used_at)
+                VALUES (?, ?, ?, ?)
+            """,
+                (
+                    minecraft_uuid,
+                    json.dumps(links),
+                    fetched_at.isoformat(),
+                    fetched_at.isoformat(),
+                ),
+            )
+            await conn.execute(
+                """
+                DELETE FROM hypixel_players WHERE minecraft_uuid IN (
+                    SELECT minecraft_uuid FROM hypixel_players
+                    ORDER BY used_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """,
+                (max_entries,),
+            )
+            await conn.commit()
+
+
+TEAM_COLUMNS = (
+    "canonical_name, team_name, member_ids, signup_message_id, "
+    "denied_by, approved_at, signup_pending, team_role_id, tournament_id"
+)
+
+
+def team_row_factory(cursor, row: tuple) -> Team:
+    """Decodes a row selected with ``TEAM_COLUMNS``. Used as the row factory
+    of every team query so all of them produce identical, complete teams."""
+    (
+        canonical_name,
+        team_name,
+        member_ids,
+        signup_message_id,
+        denied_by,
+        approved_at,
+        signup_pending,
+        team_role_id,
+        tournament_id,
+    ) = row
+    return Team(
+        canonical_name,
+        team_name,
+        tuple(json.loads(member_ids)),
+        signup_message_id,
+        denied_by,
+        datetime.fromisoformat(approved_at) if approved_at else None,
+        bool(signup_pending),
+        team_role_id,
+        tournament_id,
+    )
+
+
+def _team_filters(
+    tournament_id: int,
+    status: Optional[TeamStatus],
+    approved_after: Optional[datetime],
+) -> tuple[list[str], list]:
+    conditions = ["tournament_id = ?"]
+    params: list = [tournament_id]
+    if status == TeamStatus.PENDING:
+        conditions.append("denied_by IS NULL AND signup_pending = 1")
+    elif status == TeamStatus.APPROVED:
+        conditions.append("denied_by IS NULL AND signup_pending = 0")
+    elif status == TeamStatus.DENIED:
+        conditions.append("denied_by IS NOT NULL")
+    if approved_after is not None:
+        conditions.append("approved_at > ?")
+        params.append(approved_after.isoformat())
+    return conditions, params
+
+
+CREATE_TEAMS_SQL = """
+    CREATE TABLE IF NOT EXISTS teams (
+        tournament_id INTEGER NOT NULL DEFAULT 0,
+        canonical_name TEXT NOT NULL,
+        team_name TEXT NOT NULL,
+        member_ids TEXT NOT NULL,
+        signup_pending INTEGER NOT NULL DEFAULT 1,
+        signup_message_id INTEGER NOT NULL,
+        denied_by INTEGER,
+        team_role_id INTEGER,
+        approved_at TEXT,
+        PRIMARY KEY (tournament_id, canonical_name)
+    )
+"""
+
+
+class SQLiteSignupsStorage(SignupStorage):
+    def __init__(self, db_path: str = "signups.db", arraysize: int = 256):
+        self.db_path = db_path
+        self.arraysize = arraysize
+
+    async def _initialize_database(self, team_counts: Optional[Dict[int, int]] = None):
+        """``team_counts`` (tournament id -> team count) is used to fill the
+        substitutes table of databases that predate it."""
         async with aiosqlite.connect(self.db_path) as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute("""
@@ -187,18 +652,64 @@ class SQLiteSignupsStorage(SignupStorage):
                         signups_closed INTEGER NOT NULL DEFAULT 0
                     )
                 """)
+                await cursor.execute("PRAGMA table_info(teams)")
+                columns = [row[1] for row in await cursor.fetchall()]
+                if columns and "tournament_id" not in columns:
+                    # the primary key changes, so the table has to be rebuilt;
+                    # existing teams go to tournament 0 until claimed
+                    await cursor.execute("ALTER TABLE teams RENAME TO teams_unscoped")
+                await cursor.execute(CREATE_TEAMS_SQL)
+                if columns and "tournament_id" not in columns:
+                    await cursor.execute("""
+                        INSERT INTO teams (canonical_name, team_name, member_ids,
+                            signup_pending, signup_message_id, denied_by,
+                            team_role_id, approved_at, tournament_id)
+                        SELECT canonical_name, team_name, member_ids,
+                            signup_pending, signup_message_id, denied_by,
+                            team_role_id, approved_at, 0
+                        FROM teams_unscoped
+                    """)
+                    await cursor.execute("DROP TABLE teams_unscoped")
+                await cursor.execute(
+                    "SELECT 1 FROM sqlite_master "
+                    "WHERE type = 'table' AND name = 'substitutes'"
+                )
+                backfill = await cursor.fetchone() is None
                 await cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS teams (
-                        canonical_name TEXT PRIMARY KEY,
-                        team_name TEXT NOT NULL,
-                        member_ids TEXT NOT NULL,
-                        signup_pending INTEGER NOT NULL DEFAULT 1,
-                        signup_message_id INTEGER NOT NULL,
-                        denied_by INTEGER,
-                        team_role_id INTEGER,
-                        approved_at TEXT
+                    CREATE TABLE IF NOT EXISTS substitutes (
+                        tournament_id INTEGER NOT NULL,
+                        canonical_name TEXT NOT NULL,
+                        approved_at TEXT NOT NULL,
+                        PRIMARY KEY (tournament_id, canonical_name)
                     )
                 """)
+                if backfill:
+                    # teams approved past the team count before substitutes
+                    # were tracked are substitutes, in order of approval
+                    for tournament_id, team_count in (team_counts or {}).items():
+                        await cursor.execute(
+                            """
+                            INSERT INTO substitutes (tournament_id, canonical_name, approved_at)
+                            SELECT tournament_id, canonical_name, approved_at FROM teams
+                            WHERE tournament_id = ? AND signup_pending = 0
+                              AND denied_by IS NULL AND approved_at IS NOT NULL
+                            ORDER BY approved_at, canonical_name
+                            LIMIT -1 OFFSET ?
+                            """,
+                            (tournament_id, team_count),
+                        )
+                await cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_teams_tournament_status
+                    ON teams (tournament_id, denied_by, signup_pending)
+                """)
+                await cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_teams_tournament_approved_at
+                    ON teams (tournament_id, approved_at)
+                """)
+                await cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_teams_tournament_signup_message
+                    ON teams (tournament_id, signup_message_id)
+                """)
                 await conn.commit()
 
     async def load_signups_closed(self, guild_id: int) -> bool:
@@ -224,38 +735,57 @@ class SQLiteSignupsStorage(SignupStorage):
                 )
                 await conn.commit()
 
-    async def all_teams_generator(self) -> AsyncGenerator[Team, None]:
+    async def all_teams_generator(
+        self,
+        tournament_id: int,
+        status: Optional[TeamStatus] = None,
+        approved_after: Optional[datetime] = None,
+    ) -> AsyncGenerator[Team, None]:
+        conditions, params = _team_filters(tournament_id, status, approved_after)
+        query = f"SELECT {TEAM_COLUMNS} FROM teams WHERE " + " AND ".join(conditions)
+
         async with aiosqlite.connect(self.db_path) as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute(
-                    "SELECT canonical_name, team_name, member_ids, signup_message_id, denied_by FROM teams"
-                )
-                rows = await cursor.fetchall()
-                for (
-                    canonical_name,
-                    team_name,
-                    member_ids_json,
-                    signup_message_id,
-                    denied_by,
-                ) in rows:
-                    member_ids = json.loads(member_ids_json)
-                    yield Team(
-                        canonical_name=canonical_name,
-                        team_name=team_name,
-                        members=member_ids,
-                        signup_message_id=signup_message_id,
-                        denied_by=denied_by,
-                    )
+            conn.row_factory = team_row_factory
+            async with conn.execute(query, params) as cursor:
+                while True:
+                    teams = await cursor.fetchmany(self.arraysize)
+                    if not teams:
+                        break
+                    for team in teams:
+                        yield team
+
+    async def count_teams(
+        self,
+        tournament_id: int,
+        status: Optional[TeamStatus] = None,
+        approved_after: Optional[datetime] = None,
+    ) -> int:
+        conditions, params = _team_filters(tournament_id, status, approved_after)
+        query = "SELECT COUNT(*) FROM teams WHERE " + " AND ".join(conditions)
+
+        async with aiosqlite.connect(self.db_path) as conn:
+            async with conn.execute(query, params) as cursor:
+                (count,) = await cursor.fetchone()
+                return count
+
+    async def get_team(
+        self, tournament_id: int, canonical_name: str
+    ) -> Optional[Team]:
+        return next(
+            iter(await self._get_teams(tournament_id, canonical_name=canonical_name)),
+            None,
+        )
 
     async def add_team(self, team: Team) -> None:
         async with aiosqlite.connect(self.db_path) as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
                     """
-                    INSERT OR REPLACE INTO teams (canonical_name, team_name, signup_message_id, member_ids)
-                    VALUES (?, ?, ?, ?)
+                    INSERT OR REPLACE INTO teams (tournament_id, canonical_name, team_name, signup_message_id, member_ids)
+                    VALUES (?, ?, ?, ?, ?)
                 """,
                     (
+                        team.tournament_id,
                         team.canonical_name,
                         team.team_name,
                         team.signup_message_id,
@@ -264,42 +794,38 @@ class SQLiteSignupsStorage(SignupStorage):
                 )
                 await conn.commit()
 
-    async def get_team_for_member(self, member_id: int) -> Optional[Team]:
+    async def get_team_for_member(
+        self, tournament_id: int, member_id: int
+    ) -> Optional[Team]:
         async with aiosqlite.connect(self.db_path) as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute(
-                    "SELECT canonical_name, team_name, member_ids, signup_message_id, denied_by FROM teams"
-                )
-                async for (
-                    canonical_name,
-                    team_name,
-                    member_ids_json,
-                    signup_message_id,
-                    denied_by,
-                ) in cursor:
-                    member_ids = json.loads(member_ids_json)
-                    if member_id in member_ids:
-                        return Team(
-                            canonical_name=canonical_name,
-                            team_name=team_name,
-                            members=member_ids,
-                            signup_message_id=signup_message_id,
-                            denied_by=denied_by,
-                        )
+            conn.row_factory = team_row_factory
+            async with conn.execute(
+                f"SELECT {TEAM_COLUMNS} FROM teams WHERE tournament_id = ?",
+                (tournament_id,),
+            ) as cursor:
+                async for team in cursor:
+                    if member_id in team.members:
+                        return team
         return None
 
-    async def get_team_for_signup_message(self, message_id: int) -> Optional[Team]:
-        return next(iter((await self._get_teams(signup_message_id=message_id))), None)
+    async def get_team_for_signup_message(
+        self, tournament_id: int, message_id: int
+    ) -> Optional[Team]:
+        return next(
+            iter(await self._get_teams(tournament_id, signup_message_id=message_id)),
+            None,
+        )
 
     async def _get_teams(
         self,
+        tournament_id: int,
         canonical_name: Optional[str] = None,
         signup_pending: Optional[bool] = None,
         signup_message_id: Optional[int] = None,
     ) -> list[Team]:
-        query = "SELECT canonical_name, team_name, member_ids, signup_pending, signup_message_id, denied_by FROM teams"
-        conditions = []
-        params = []
+        query = f"SELECT {TEAM_COLUMNS} FROM teams"
+        conditions = ["tournament_id = ?"]
+        params: list = [tournament_id]
 
         if canonical_name is not None:
             conditions.append("canonical_name = ?")
@@ -311,26 +837,12 @@ class SQLiteSignupsStorage(SignupStorage):
             conditions.append("signup_message_id = ?")
             params.append(signup_message_id)
 
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
+        query += " WHERE " + " AND ".join(conditions)
 
         async with aiosqlite.connect(self.db_path) as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute(query, params)
-                rows = await cursor.fetchall()
-
-                teams = [
-                    Team(
-                        canonical_name=row[0],
-                        team_name=row[1],
-                        members=list(map(int, row[2][1:-1].split(","))),
-                        signup_pending=bool(row[3]),
-                        signup_message_id=row[4],
-                        denied_by=int(row[5]) if row[5] else None,
-                    )
-                    for row in rows
-                ]
-                return teams
+            conn.row_factory = team_row_factory
+            async with conn.execute(query, params) as cursor:
+                return await cursor.fetchall()
 
     async def set_team_denied(self, team: Team, user: int) -> None:
         async with aiosqlite.connect(self.db_path) as conn:
@@ -339,9 +851,9 @@ class SQLiteSignupsStorage(SignupStorage):
                     """
                     UPDATE teams
                     SET denied_by = ?
-                    WHERE canonical_name = ?
+                    WHERE tournament_id = ? AND canonical_name = ?
                     """,
-                    (user, team.canonical_name),
+                    (user, team.tournament_id, team.canonical_name),
                 )
                 await conn.commit()
 
@@ -349,8 +861,9 @@ class SQLiteSignupsStorage(SignupStorage):
         async with aiosqlite.connect(self.db_path) as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    "UPDATE teams SET signup_pending = ? WHERE canonical_name = ?",
-                    (int(pending), team.canonical_name),
+                    "UPDATE teams SET signup_pending = ? "
+                    "WHERE tournament_id = ? AND canonical_name = ?",
+                    (int(pending), team.tournament_id, team.canonical_name),
                 )
                 await conn.commit()
 
@@ -358,8 +871,9 @@ class SQLiteSignupsStorage(SignupStorage):
         async with aiosqlite.connect(self.db_path) as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    "UPDATE teams SET team_role_id = ? WHERE canonical_name = ?",
-                    (role_id, team.canonical_name),
+                    "UPDATE teams SET team_role_id = ? "
+                    "WHERE tournament_id = ? AND canonical_name = ?",
+                    (role_id, team.tournament_id, team.canonical_name),
                 )
                 await conn.commit()
 
@@ -367,28 +881,129 @@ class SQLiteSignupsStorage(SignupStorage):
         async with aiosqlite.connect(self.db_path) as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    "UPDATE teams SET approved_at = ? WHERE canonical_name = ?",
-                    (date.isoformat(), team.canonical_name),
+                    "UPDATE teams SET approved_at = ? "
+                    "WHERE tournament_id = ? AND canonical_name = ?",
+                    (date.isoformat(), team.tournament_id, team.canonical_name),
                 )
                 await conn.commit()
 
-    async def backup(self) -> None:
+    async def bulk_set_approved(
+        self, teams: List[Team], date: datetime
+    ) -> List[bool]:
+        # the status condition makes approval idempotent, rowcount tells
+        # which call actually approved the team
         async with aiosqlite.connect(self.db_path) as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute("SELECT * FROM teams")
-                rows = await cursor.fetchall()
-                os.makedirs("backup", exist_ok=True)
-                with open(
-                    f"backup/backup-{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json",
-                    "w",
-                ) as f:
-                    json.dump(rows, f)
+            applied = []
+            for team in teams:
+                cursor = await conn.execute(
+                    """
+                    UPDATE teams SET signup_pending = 0, approved_at = ?
+                    WHERE tournament_id = ? AND canonical_name = ?
+                      AND signup_pending = 1 AND denied_by IS NULL
+                    """,
+                    (date.isoformat(), team.tournament_id, team.canonical_name),
+                )
+                applied.append(cursor.rowcount == 1)
+            await conn.commit()
+            return applied
 
-    async def clear(self) -> None:
+    async def bulk_set_team_denied(self, teams: List[Team], user: int) -> List[bool]:
         async with aiosqlite.connect(self.db_path) as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute("DELETE FROM teams")
-                await conn.commit()
+            applied = []
+            for team in teams:
+                cursor = await conn.execute(
+                    """
+                    UPDATE teams SET denied_by = ?
+                    WHERE tournament_id = ? AND canonical_name = ? AND denied_by IS NULL
+                    """,
+                    (user, team.tournament_id, team.canonical_name),
+                )
+                applied.append(cursor.rowcount == 1)
+            await conn.commit()
+            return applied
+
+    async def bulk_set_team_roles(self, roles: List[tuple[Team, int]]) -> None:
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.executemany(
+                "UPDATE teams SET team_role_id = ? "
+                "WHERE tournament_id = ? AND canonical_name = ?",
+                [
+                    (role_id, team.tournament_id, team.canonical_name)
+                    for team, role_id in roles
+                ],
+            )
+            await conn.commit()
+
+    async def get_substitutes(self, tournament_id: int) -> List[tuple[str, datetime]]:
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute(
+                "SELECT canonical_name, approved_at FROM substitutes WHERE tournament_id = ?",
+                (tournament_id,),
+            )
+            return [
+                (name, datetime.fromisoformat(approved_at))
+                for name, approved_at in await cursor.fetchall()
+            ]
+
+    async def add_substitutes(
+        self, tournament_id: int, substitutes: List[tuple[str, datetime]]
+    ) -> None:
+        if not substitutes:
+            return
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.executemany(
+                """
+                INSERT OR REPLACE INTO substitutes (tournament_id, canonical_name, approved_at)
+                VALUES (?, ?, ?)
+            """,
+                [
+                    (tournament_id, name, approved_at.isoformat())
+                    for name, approved_at in substitutes
+                ],
+            )
+            await conn.commit()
+
+    async def remove_substitutes(
+        self, tournament_id: int, canonical_names: List[str]
+    ) -> None:
+        if not canonical_names:
+            return
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.executemany(
+                "DELETE FROM substitutes WHERE tournament_id = ? AND canonical_name = ?",
+                [(tournament_id, name) for name in canonical_names],
+            )
+            await conn.commit()
+
+    async def claim_unassigned_teams(self, tournament_id: int) -> int:
+        async with aiosqlite.connect(self.db_path) as conn:
+            cursor = await conn.execute(
+                "UPDATE teams SET tournament_id = ? WHERE tournament_id = 0",
+                (tournament_id,),
+            )
+            await conn.execute(
+                "UPDATE substitutes SET tournament_id = ? WHERE tournament_id = 0",
+                (tournament_id,),
+            )
+            await conn.commit()
+            return cursor.rowcount
+
+
+TOURNAMENT_COLUMNS = (
+    "tournament_id, tournament_name, signups_close_date, "
+    "tournament_start_date, team_count, team_size"
+)
+
+
+def tournament_row_factory(cursor, row: tuple) -> Tournament:
+    return Tournament(
+        row[0],
+        row[1],
+        datetime.fromisoformat(row[2]),
+        datetime.fromisoformat(row[3]),
+        row[4],
+        row[5],
+    )
 
 
 class SQLiteTournamentStorage(TournamentStorage):
@@ -409,9 +1024,9 @@ class SQLiteTournamentStorage(TournamentStorage):
             """)
             await db.commit()
 
-    async def insert_tournament(self, tournament: Tournament) -> None:
+    async def insert_tournament(self, tournament: Tournament) -> int:
         async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
+            cursor = await db.execute(
                 """
                 INSERT INTO tournaments (tournament_name, signups_close_date, tournament_start_date, team_count, team_size)
                 VALUES (?, ?, ?, ?, ?)
@@ -425,30 +1040,34 @@ class SQLiteTournamentStorage(TournamentStorage):
                 ),
             )
             await db.commit()
+            return cursor.lastrowid
+
+    async def _team_counts(self) -> Dict[int, int]:
+        """Team count per tournament id; unassigned teams (tournament 0)
+        count against the current tournament, which will claim them."""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT tournament_id, team_count FROM tournaments"
+            ) as cursor:
+                team_counts = dict(await cursor.fetchall())
+        current = await self.get_current_tournament()
+        if current is not None:
+            team_counts[0] = current.team_count
+        return team_counts
 
     async def get_current_tournament(self) -> Optional[Tournament]:
         async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("""
-                SELECT tournament_id, tournament_name, signups_close_date,
-                       tournament_start_date, team_count, team_size
+            db.row_factory = tournament_row_factory
+            async with db.execute(f"""
+                SELECT {TOURNAMENT_COLUMNS}
                 FROM tournaments
-                ORDER BY tournament_start_date DESC
+                ORDER BY tournament_start_date DESC, tournament_id DESC
                 LIMIT 1
             """) as cursor:
-                row = await cursor.fetchone()
-                if row:
-                    return Tournament(
-                        tournament_id=row[0],
-                        tournament_name=row[1],
-                        signups_close_date=datetime.fromisoformat(row[2]),
-                        tournament_start_date=datetime.fromisoformat(row[3]),
-                        team_count=row[4],
-                        team_size=row[5],
-                    )
-        return None
+                return await cursor.fetchone()
 
     async def is_signups_open(self) -> bool:
         tournament = await self.get_current_tournament()
         if not tournament:
             return False
-        return datetime.utcnow() < tournament.signups_close_date
+        return datetime.now() < tournament.signups_close_date
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the bot imports its modules relative to horizon_bot_project
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "horizon_bot_project"))
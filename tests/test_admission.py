@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from services.admission import AdmissionController, AdmissionRejected
+from settings import CommandLimit
+
+
+def controller(**limit) -> AdmissionController:
+    limits = {"verify": CommandLimit(**limit)}
+    return AdmissionController(lambda: limits)
+
+
+def test_waiters_are_admitted_in_order():
+    async def run():
+        admission = controller(concurrency=1, max_wait=1.0)
+        order = []
+
+        async def invoke(user_id: int):
+            async with admission.admit("verify", user_id):
+                order.append(user_id)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(invoke(user_id) for user_id in range(4)))
+        assert order == [0, 1, 2, 3]
+        stats = admission.stats()["verify"]
+        assert stats["completed"] == 4 and stats["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+def test_full_queue_rejects_as_busy():
+    async def run():
+        admission = controller(concurrency=1, max_queue=1, max_wait=1.0)
+        release = asyncio.Event()
+
+        async def invoke(user_id: int):
+            async with admission.admit("verify", user_id):
+                await release.wait()
+
+        running = asyncio.ensure_future(invoke(1))
+        waiting = asyncio.ensure_future(invoke(2))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected, match="busy"):
+            async with admission.admit("verify", 3):
+                pass
+        release.set()
+        await asyncio.gather(running, waiting)
+        assert admission.stats()["verify"]["rejected"]["busy"] == 1
+
+    asyncio.run(run())
+
+
+def test_wait_runs_out():
+    async def run():
+        admission = controller(concurrency=1, max_wait=0.01)
+        async with admission.admit("verify", 1):
+            with pytest.raises(AdmissionRejected, match="busy"):
+                async with admission.admit("verify", 2):
+                    pass
+        # the slot was not leaked by the timed out waiter
+        async with admission.admit("verify", 2):
+            pass
+
+    asyncio.run(run())
+
+
+def test_duplicates_and_cooldown_are_rejected():
+    async def run():
+        admission = controller(cooldown=60.0)
+        async with admission.admit("verify", 1):
+            with pytest.raises(AdmissionRejected, match="still running"):
+                async with admission.admit("verify", 1):
+                    pass
+        with pytest.raises(AdmissionRejected, match="Please wait"):
+            async with admission.admit("verify", 1):
+                pass
+        # other commands are not limited
+        async with admission.admit("signup", 1):
+            pass
+
+    asyncio.run(run())
+
+
+def test_max_wait_leaves_time_to_defer():
+    with pytest.raises(ValidationError):
+        CommandLimit(max_wait=5.0)
@@ -0,0 +1,93 @@
+import asyncio
+import multiprocessing
+import sqlite3
+
+from hbp_types.message import MessageRecord, MessageRevision
+from storage.compression import (
+    MIN_TRAINING_MESSAGES,
+    MessageCompressor,
+    train_dictionary,
+)
+from storage.process import run_message_writer
+from storage.sqlite import SQLiteMessageStorage
+
+CHAT = [
+    f"gg wp everyone, see you in round {i % 7} of the tournament"
+    for i in range(300)
+] + ["ok", "ünïcödé ✅", ""]
+
+
+def records(start: int, count: int):
+    return [
+        MessageRecord(str(i), "1", CHAT[i % len(CHAT)], "2025-05-01T18:00:00")
+        for i in range(start, start + count)
+    ]
+
+
+def test_round_trip():
+    compressor = MessageCompressor([(1, train_dictionary(CHAT))])
+    for content in CHAT + [None]:
+        stored, content_dict = compressor.compress(content)
+        assert compressor.decompress(stored, content_dict) == content
+    compressed, content_dict = compressor.compress(CHAT[0])
+    assert content_dict == 1 and len(compressed) < len(CHAT[0].encode())
+    # too short to get any smaller
+    assert compressor.compress("ok") == ("ok", None)
+
+
+def test_rows_keep_older_dictionaries_readable():
+    old = MessageCompressor([(1, train_dictionary(CHAT))])
+    (row,) = old.rows([MessageRevision("1", "edit", CHAT[0], "t")])
+    new = MessageCompressor([(1, train_dictionary(CHAT)), (2, b"round")])
+    assert new.dict_id == 2
+    assert new.decompress(row[2], row[4]) == CHAT[0]
+
+
+def test_without_dictionary_content_is_plain():
+    compressor = MessageCompressor()
+    assert compressor.compress(CHAT[0]) == (CHAT[0], None)
+
+
+def test_dictionary_is_trained_once_enough_messages_are_stored(tmp_path):
+    db_path = str(tmp_path / "messages.db")
+
+    async def run():
+        storage = SQLiteMessageStorage(db_path, compression=True)
+        await storage._initialize_database()
+        await storage.bulk_log_message(records(0, MIN_TRAINING_MESSAGES - 1))
+        assert storage._compressor.dict_id is None
+        await storage.bulk_log_message(records(MIN_TRAINING_MESSAGES, 1))
+        assert storage._compressor.dict_id == 1
+        await storage.bulk_log_message(records(1000, 10))
+        return await storage.get_messages(limit=10)
+
+    stored = asyncio.run(run())
+    assert stored == records(1000, 10)[::-1]
+    with sqlite3.connect(db_path) as db:
+        assert db.execute(
+            "SELECT COUNT(*) FROM messages WHERE content_dict = 1"
+        ).fetchone()[0] > 0
+
+
+def test_writer_trains_once_enough_messages_are_stored(tmp_path):
+    db_path = str(tmp_path / "messages.db")
+    asyncio.run(SQLiteMessageStorage(db_path, compression=True)._initialize_database())
+
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe()
+    writer = context.Process(target=run_message_writer, args=(db_path, child, True))
+    writer.start()
+    for batch_id, start in enumerate((0, MIN_TRAINING_MESSAGES, 1000)):
+        parent.send((batch_id, records(start, MIN_TRAINING_MESSAGES), []))
+        assert parent.poll(30)
+        parent.recv()
+    parent.send(None)
+    writer.join(30)
+
+    with sqlite3.connect(db_path) as db:
+        (first_compressed,) = db.execute("""
+            SELECT MIN(CAST(message_id AS INTEGER)) FROM messages
+            WHERE content_dict = 1
+        """).fetchone()
+    # the dictionary was trained right after the first batch
+    assert first_compressed == MIN_TRAINING_MESSAGES
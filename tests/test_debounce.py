@@ -0,0 +1,67 @@
+import asyncio
+
+from services.debounce import KeyedBatcher
+
+
+def test_bursts_are_handled_together_per_key():
+    async def run():
+        batches = []
+
+        async def handler(key, items):
+            batches.append((key, items))
+
+        batcher = KeyedBatcher(handler, window=0.01)
+        for item in range(3):
+            batcher.add("a", item)
+        batcher.add("b", 0)
+        await batcher.close()
+
+        assert sorted(batches) == [("a", [0, 1, 2]), ("b", [0])]
+        assert batcher.received == 4 and batcher.handled == 2
+
+    asyncio.run(run())
+
+
+def test_items_arriving_during_the_handler_form_the_next_burst():
+    async def run():
+        batches = []
+        running = 0
+
+        async def handler(key, items):
+            nonlocal running
+            running += 1
+            # handlers of one key never overlap
+            assert running == 1
+            batches.append(items)
+            if items == [0]:
+                batcher.add(key, 1)
+                batcher.add(key, 2)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        batcher = KeyedBatcher(handler, window=0.01)
+        batcher.add("a", 0)
+        await batcher.close()
+
+        assert batches == [[0], [1, 2]]
+
+    asyncio.run(run())
+
+
+def test_failing_handler_does_not_stop_the_key():
+    async def run():
+        batches = []
+
+        async def handler(key, items):
+            batches.append(items)
+            if len(batches) == 1:
+                batcher.add(key, "next")
+                raise RuntimeError("boom")
+
+        batcher = KeyedBatcher(handler, window=0.01)
+        batcher.add("a", "first")
+        await batcher.close()
+
+        assert batches == [["first"], ["next"]]
+
+    asyncio.run(run())
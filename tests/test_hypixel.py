@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from minecraft import hypixel
+from services.hypixel import HypixelService
+from storage import HypixelCacheStorage
+
+
+class StaleCache(HypixelCacheStorage):
+    """Every player is cached, but past the TTL."""
+
+    async def get_player(self, minecraft_uuid, used_at):
+        return {"DISCORD": "stale"}, datetime.now() - timedelta(hours=25)
+
+    async def put_player(self, minecraft_uuid, links, fetched_at, max_entries):
+        pass
+
+
+def test_revalidations_are_capped(monkeypatch):
+    in_flight = 0
+    most_in_flight = 0
+    sessions = set()
+
+    async def fetch(uuid, session=None):
+        nonlocal in_flight, most_in_flight
+        sessions.add(session)
+        in_flight += 1
+        most_in_flight = max(most_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"DISCORD": "fresh"}
+
+    monkeypatch.setattr(hypixel, "fetch_hypixel_social_links", fetch)
+
+    async def run():
+        service = HypixelService(
+            StaleCache(),
+            revalidate_concurrency=2,
+            revalidate_max_per_second=1000,
+            revalidate_max_pending=5,
+        )
+        for i in range(20):
+            assert await service.get_discord_tag(f"uuid{i}") == "stale"
+        assert service.stats()["revalidations"] == 5
+        while service.stats()["revalidations"]:
+            await asyncio.sleep(0.01)
+        assert service.fetches == 5
+        await service.close()
+
+    asyncio.run(run())
+    assert most_in_flight == 2
+    # one shared session, not one per request
+    assert len(sessions) == 1 and None not in sessions
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import time
+
+from hbp_types.message import MessageRecord, MessageRevision
+from services.journal import ShardJournal, read_journals
+
+
+def record(i: int) -> MessageRecord:
+    return MessageRecord(str(i), "1", f"message {i}", "2025-05-01T18:00:00+00:00")
+
+
+def test_unflushed_segments_are_replayed_in_order(tmp_path):
+    async def run():
+        journal = ShardJournal(str(tmp_path), 0)
+        other_shard = ShardJournal(str(tmp_path), 1)
+        journal.append(record(0))
+        sealed = await journal.rotate()
+        journal.append(record(1))
+        journal.append_revisions([MessageRevision("1", "delete", None, "t")])
+        other_shard.append(record(2))
+        await journal.sync()
+        await other_shard.sync()
+
+        records, revisions, paths = read_journals(str(tmp_path))
+        assert records == [record(0), record(1), record(2)]
+        assert revisions == [MessageRevision("1", "delete", None, "t")]
+        assert len(paths) == 3
+
+        # the first batch was stored
+        journal.discard(sealed)
+        records, _, paths = read_journals(str(tmp_path))
+        assert records == [record(1), record(2)]
+        assert len(paths) == 2
+        await journal.close()
+        await other_shard.close()
+
+    asyncio.run(run())
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    async def run():
+        journal = ShardJournal(str(tmp_path), 0)
+        journal.append(record(0))
+        await journal.close()
+
+    asyncio.run(run())
+    path = next(tmp_path.iterdir())
+    with open(path, "a") as f:
+        f.write('["1", "1", "mess')
+    records, _, _ = read_journals(str(tmp_path))
+    assert records == [record(0)]
+
+
+def test_sync_and_rotate_do_not_race(tmp_path, monkeypatch):
+    fsync = os.fsync
+
+    def slow_fsync(fd):
+        time.sleep(0.005)
+        fsync(fd)
+
+    # an fsync still running when rotate closes its fd raises EBADF
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+
+    async def run():
+        journal = ShardJournal(str(tmp_path), 0)
+
+        async def syncs():
+            for i in range(20):
+                journal.append(record(i))
+                await journal.sync()
+
+        async def rotations():
+            for _ in range(20):
+                journal.discard(await journal.rotate())
+                await asyncio.sleep(0.002)
+
+        await asyncio.gather(syncs(), rotations())
+        await journal.close()
+
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+from services.minecraft import _MISSING, LinkCache
+
+
+def test_lookups_in_both_directions():
+    cache = LinkCache()
+    cache.put(1, ("uuid1", "Steve"))
+    cache.put(2, None)
+
+    assert cache.get(1) == ("uuid1", "Steve")
+    assert cache.get_user_id("uuid1") == 1
+    # known not to be linked
+    assert cache.get(2) is None
+    assert cache.get(3) is _MISSING
+    assert cache.get_user_id("uuid3") is _MISSING
+
+
+def test_complete_cache_answers_misses():
+    cache = LinkCache()
+    cache.put(1, ("uuid1", "Steve"))
+    cache.complete = True
+
+    assert cache.get(3) is None
+    assert cache.get_user_id("uuid3") is None
+    assert cache.stats()["hit_rate"] == 1.0
+
+
+def test_relinking_a_uuid_unlinks_its_previous_owner():
+    cache = LinkCache()
+    cache.put(1, ("uuid1", "Steve"))
+    cache.put(2, ("uuid1", "Steve"))
+
+    assert cache.get(1) is None
+    assert cache.get_user_id("uuid1") == 2
+
+
+def test_least_recently_used_is_evicted():
+    cache = LinkCache(max_size=2)
+    cache.complete = True
+    cache.put(1, ("uuid1", "Steve"))
+    cache.put(2, ("uuid2", "Alex"))
+    cache.get(1)
+    cache.put(3, ("uuid3", "Herobrine"))
+
+    assert len(cache) == 2
+    assert cache.get(2) is _MISSING
+    assert cache.get_user_id("uuid2") is _MISSING
+    assert cache.get(1) == ("uuid1", "Steve")
+    # after an eviction, a missing entry no longer means not linked
+    assert not cache.complete
+
+
+def test_rename_keeps_the_uuid():
+    cache = LinkCache()
+    cache.put(1, ("uuid1", "Steve"))
+    cache.rename(1, "Steve2")
+    cache.rename(2, "Nobody")
+
+    assert cache.get(1) == ("uuid1", "Steve2")
+    assert cache.get(2) is _MISSING
@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import discord
+
+from hbp_types.message import MessageRevision
+
+EDITED = "2025-05-01T18:05:00.000000+00:00"
+
+
+def update(content: str, edited_timestamp=None, cached=None):
+    data = {"id": "7", "channel_id": "1", "content": content}
+    if edited_timestamp is not None:
+        data["edited_timestamp"] = edited_timestamp
+    message = SimpleNamespace(
+        id=7, channel=SimpleNamespace(id=1), guild=None, content=content
+    )
+    payload = discord.RawMessageUpdateEvent(data, message)
+    payload.cached_message = cached
+    return payload
+
+
+def cached(content: str, edited_at=None):
+    return SimpleNamespace(content=content, edited_at=edited_at)
+
+
+def test_edit_is_recorded():
+    revision = MessageRevision.from_edit(update("new", EDITED, cached("old")))
+    assert revision == MessageRevision(
+        "7", "edit", "new", "2025-05-01T18:05:00+00:00"
+    )
+
+
+def test_update_without_edit_is_skipped():
+    assert MessageRevision.from_edit(update("gg")) is None
+    assert MessageRevision.from_edit(update("gg", None, cached("gg"))) is None
+
+
+def test_unfurl_of_edited_message_is_skipped():
+    edited_at = datetime(2025, 5, 1, 18, 5, tzinfo=timezone.utc)
+    payload = update("new", EDITED, cached("new", edited_at))
+    assert MessageRevision.from_edit(payload) is None
+
+
+def test_unfurl_of_uncached_edited_message_repeats_the_edit():
+    # same timestamp as the stored edit, so storage skips it
+    first = MessageRevision.from_edit(update("new", EDITED))
+    again = MessageRevision.from_edit(update("new", EDITED))
+    assert first == again
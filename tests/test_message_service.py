@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from hbp_types.message import MessageRevision
+from services.message import MessageService
+from storage import MessageStorage
+
+
+class FakeMessageStorage(MessageStorage):
+    def __init__(self):
+        self.messages = []
+        self.revisions = []
+        self.failing = False
+        self.delay = 0
+
+    async def log_message(self, message):
+        await self.bulk_log_message([message])
+
+    async def bulk_log_message(self, messages):
+        await asyncio.sleep(self.delay)
+        if self.failing:
+            raise OSError("disk full")
+        self.messages.extend(messages)
+
+    async def log_revisions(self, revisions):
+        self.revisions.extend(revisions)
+
+    async def get_messages(self, author_id=None, containing=None, limit=100):
+        return []
+
+    async def get_message_history(self, message_id):
+        return []
+
+
+def message(i: int):
+    return SimpleNamespace(
+        id=i,
+        guild=None,
+        author=SimpleNamespace(id=1),
+        content=f"message {i}",
+        created_at=datetime(2025, 5, 1, tzinfo=timezone.utc),
+    )
+
+
+def test_full_buffer_is_flushed_in_the_background():
+    async def run():
+        storage = FakeMessageStorage()
+        service = MessageService(storage, buffer_size=3, flush_interval=60)
+        for i in range(3):
+            await service.log_message(message(i))
+        # the handler returned before the write
+        assert storage.messages == []
+        await asyncio.sleep(0.01)
+        assert [m.message_id for m in storage.messages] == ["0", "1", "2"]
+        assert service.stats()[0]["flushed"] == 3
+        await service.close()
+
+    asyncio.run(run())
+
+
+def test_failed_flush_does_not_reach_the_handler():
+    async def run():
+        storage = FakeMessageStorage()
+        storage.failing = True
+        service = MessageService(storage, buffer_size=2, flush_interval=60)
+        for i in range(4):
+            await service.log_message(message(i))
+            await asyncio.sleep(0.01)
+        assert service.stats()[0]["buffered"] == 4
+
+        storage.failing = False
+        await service.log_message(message(4))
+        await asyncio.sleep(0.01)
+        assert [m.message_id for m in storage.messages] == ["0", "1", "2", "3", "4"]
+        await service.close()
+
+    asyncio.run(run())
+
+
+def test_buffer_drops_oldest_past_the_limit():
+    async def run():
+        storage = FakeMessageStorage()
+        storage.failing = True
+        service = MessageService(
+            storage, buffer_size=2, flush_interval=60, max_buffered=5
+        )
+        for i in range(8):
+            await service.log_message(message(i))
+        await service.log_revisions(
+            0, [MessageRevision("7", "edit", "edited", "2025-05-01T00:00:00")]
+        )
+        await asyncio.sleep(0.01)
+        stats = service.stats()[0]
+        assert stats["buffered"] == 5
+        assert stats["dropped"] == 4
+
+        storage.failing = False
+        await service.close()
+        assert [m.message_id for m in storage.messages] == ["4", "5", "6", "7"]
+        assert len(storage.revisions) == 1
+
+    asyncio.run(run())
+
+
+def test_close_during_a_periodic_flush_keeps_its_batch():
+    async def run():
+        storage = FakeMessageStorage()
+        storage.delay = 0.05
+        service = MessageService(storage, buffer_size=100, flush_interval=0.01)
+        for i in range(3):
+            await service.log_message(message(i))
+        # the periodic flush is still writing when close cancels it
+        await asyncio.sleep(0.03)
+        assert storage.messages == []
+        await service.close()
+        assert [m.message_id for m in storage.messages] == ["0", "1", "2"]
+
+    asyncio.run(run())
@@ -0,0 +1,97 @@
+import asyncio
+import multiprocessing
+import sqlite3
+
+from hbp_types.message import MessageRecord, MessageRevision
+from storage.process import ProcessMessageStorage, run_message_writer
+from storage.sqlite import SQLiteMessageStorage
+
+MESSAGES = [
+    MessageRecord(str(i), "1", f"message {i}", "2025-05-01T18:00:00+00:00")
+    for i in range(3)
+]
+REVISIONS = [MessageRevision("1", "edit", "edited", "2025-05-01T18:01:00+00:00")]
+
+
+def count(db_path, table: str) -> int:
+    with sqlite3.connect(db_path) as db:
+        return db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_resent_batch_is_stored_once(tmp_path):
+    db_path = str(tmp_path / "messages.db")
+    asyncio.run(SQLiteMessageStorage(db_path)._initialize_database())
+
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe()
+    writer = context.Process(target=run_message_writer, args=(db_path, child, False))
+    writer.start()
+    # the same batch again, as after a writer that died before acknowledging
+    for _ in range(2):
+        parent.send((0, MESSAGES, REVISIONS))
+        assert parent.poll(30)
+        assert parent.recv() == [0]
+    parent.send(None)
+    writer.join(30)
+
+    assert count(db_path, "messages") == 3
+    assert count(db_path, "message_revisions") == 1
+
+
+def test_duplicates_are_removed_when_upgrading(tmp_path):
+    db_path = str(tmp_path / "messages.db")
+    with sqlite3.connect(db_path) as db:
+        db.execute("""
+            CREATE TABLE messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                message_id TEXT NOT NULL,
+                author_id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp TEXT NOT NULL
+            )
+        """)
+        db.executemany(
+            "INSERT INTO messages (message_id, author_id, content, timestamp) "
+            "VALUES (?, ?, ?, ?)",
+            MESSAGES + MESSAGES[:2],
+        )
+
+    storage = SQLiteMessageStorage(db_path)
+    asyncio.run(storage._initialize_database())
+    assert count(db_path, "messages") == 3
+
+    asyncio.run(storage.bulk_log_message(MESSAGES))
+    stored = asyncio.run(storage.get_messages())
+    assert [m.message_id for m in stored] == ["2", "1", "0"]
+
+
+def test_batch_stores_messages_and_revisions(tmp_path):
+    storage = SQLiteMessageStorage(str(tmp_path / "messages.db"))
+    asyncio.run(storage._initialize_database())
+    asyncio.run(storage.log_batch(MESSAGES, REVISIONS))
+    # a repeated edit (an unfurl of an uncached message) is skipped
+    asyncio.run(storage.log_batch([], REVISIONS))
+
+    assert len(asyncio.run(storage.get_messages())) == 3
+    assert asyncio.run(storage.get_message_history(1)) == REVISIONS
+
+
+def test_writer_process_is_restarted_without_losing_batches(tmp_path):
+    db_path = str(tmp_path / "messages.db")
+
+    async def run():
+        storage = ProcessMessageStorage(db_path, supervise_interval=0.05)
+        await storage._initialize_database()
+        await storage.start()
+        await storage.log_batch(MESSAGES[:2], [])
+        storage._process.kill()
+        await storage.log_batch(MESSAGES[2:], REVISIONS)
+        while not storage.restarts:
+            await asyncio.sleep(0.05)
+        await storage.close()
+        return storage.stats()
+
+    stats = asyncio.run(run())
+    assert stats["pending_batches"] == 0 and stats["restarts"] == 1
+    assert count(db_path, "messages") == 3
+    assert count(db_path, "message_revisions") == 1
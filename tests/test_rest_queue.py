@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from services.rest import Priority, RestQueue, RestQueueClosed
+
+
+def test_higher_priority_classes_go_first():
+    async def run():
+        queue = RestQueue(concurrency=1, max_per_second=1000)
+        order = []
+
+        def call(name):
+            async def job():
+                order.append(name)
+
+            return job
+
+        # queued before the worker starts, so the order is the queue's
+        futures = [
+            queue.submit(call("dm"), Priority.DM),
+            queue.submit(call("update 1"), Priority.UPDATE),
+            queue.submit(call("interaction"), Priority.INTERACTION),
+            queue.submit(call("update 2"), Priority.UPDATE),
+        ]
+        queue.start()
+        await asyncio.gather(*futures)
+        await queue.close()
+
+        assert order == ["interaction", "update 1", "update 2", "dm"]
+        stats = queue.stats()
+        assert stats["update"]["completed"] == 2
+        assert stats["dm"]["queued"] == 0
+
+    asyncio.run(run())
+
+
+def test_route_budget_leaves_workers_for_other_routes():
+    async def run():
+        queue = RestQueue(
+            concurrency=3, max_per_second=1000, route_budgets={"roles": 1}
+        )
+        running = {"roles": 0, "dm": 0}
+        most = {"roles": 0, "dm": 0}
+
+        def call(route):
+            async def job():
+                running[route] += 1
+                most[route] = max(most[route], running[route])
+                await asyncio.sleep(0.01)
+                running[route] -= 1
+                return route
+
+            return job
+
+        futures = [queue.submit(call("roles"), route="roles") for _ in range(4)]
+        futures += [queue.submit(call("dm"), route="dm") for _ in range(4)]
+        queue.start()
+        results = await asyncio.gather(*futures)
+        await queue.close()
+
+        assert results == ["roles"] * 4 + ["dm"] * 4
+        assert most == {"roles": 1, "dm": 2}
+
+    asyncio.run(run())
+
+
+def test_errors_reach_the_caller():
+    async def run():
+        queue = RestQueue(concurrency=1, max_per_second=1000)
+        queue.start()
+
+        async def fail():
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError, match="bad request"):
+            await queue.submit(fail)
+        # the worker survived
+        assert await queue.submit(lambda: asyncio.sleep(0, "ok")) == "ok"
+        await queue.close()
+
+    asyncio.run(run())
+
+
+def test_close_fails_unfinished_jobs():
+    async def run():
+        queue = RestQueue(concurrency=1, max_per_second=1000)
+        queue.start()
+        blocked = asyncio.Event()
+
+        running = queue.submit(blocked.wait)
+        queued = queue.submit(lambda: asyncio.sleep(0))
+        await asyncio.sleep(0.01)
+        await queue.close()
+
+        for future in (running, queued):
+            with pytest.raises(RestQueueClosed):
+                await future
+        with pytest.raises(RestQueueClosed):
+            await queue.submit(lambda: asyncio.sleep(0))
+        assert queue.depth == 0
+
+    asyncio.run(run())
@@ -0,0 +1,37 @@
+import asyncio
+from datetime import datetime
+
+from hbp_types.team import Team, TeamStatus
+from hbp_types.tournament import Tournament
+from services.signups import SignupService
+from storage.sqlite import SQLiteSignupsStorage
+
+
+class FakeLinkService:
+    async def get_minecraft_username(self, user_id: int):
+        return None
+
+
+def test_concurrent_approvals_respect_team_count(tmp_path):
+    tournament = Tournament(1, "Cup", datetime(2025, 5, 1), datetime(2025, 5, 2), 1, 4)
+
+    async def run():
+        storage = SQLiteSignupsStorage(str(tmp_path / "signups.db"))
+        await storage._initialize_database()
+        service = SignupService(storage, FakeLinkService())
+        await service.switch_tournament(1)
+        teams = [Team(f"t{i}", f"T{i}", (i,), i) for i in range(3)]
+        for team in teams:
+            await service.add_team(team)
+
+        results = await asyncio.gather(
+            *(service.approve_team(tournament, team) for team in teams)
+        )
+        approved = await storage.count_teams(1, TeamStatus.APPROVED)
+        return results, approved, service.substitutes.ordered()
+
+    results, approved, substitutes = asyncio.run(run())
+    # only one team fits; the others wait in approval order
+    assert sorted(results) == [False, True, True]
+    assert approved == 3
+    assert substitutes == [t for t, sub in zip(["t0", "t1", "t2"], results) if sub]
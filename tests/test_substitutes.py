@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from services.substitutes import SubstituteQueue
+
+START = datetime(2025, 5, 1, 18, 0)
+
+
+def at(seconds: float) -> datetime:
+    return START + timedelta(seconds=seconds)
+
+
+def test_pops_in_approval_order():
+    queue = SubstituteQueue()
+    queue.push("c", at(3))
+    queue.push("a", at(1))
+    queue.push("b", at(2))
+
+    assert queue.ordered() == ["a", "b", "c"]
+    assert [queue.pop(), queue.pop(), queue.pop()] == ["a", "b", "c"]
+    assert queue.pop() is None
+    assert len(queue) == 0
+
+
+def test_ties_are_broken_by_name():
+    queue = SubstituteQueue()
+    queue.push("zeta", at(1))
+    queue.push("alpha", at(1))
+
+    assert queue.ordered() == ["alpha", "zeta"]
+    assert queue.pop() == "alpha"
+
+
+def test_removed_teams_are_skipped():
+    queue = SubstituteQueue()
+    for i, name in enumerate("abc"):
+        queue.push(name, at(i))
+
+    assert queue.remove("a")
+    assert not queue.remove("a")
+    assert "a" not in queue
+    assert len(queue) == 2
+    assert queue.pop() == "b"
+
+
+def test_requeued_team_uses_its_new_time():
+    queue = SubstituteQueue()
+    queue.push("a", at(1))
+    queue.push("b", at(2))
+    queue.remove("a")
+    queue.push("a", at(3))
+
+    # the stale heap entry for "a" at 1s must not be popped
+    assert [queue.pop(), queue.pop(), queue.pop()] == ["b", "a", None]
+
+
+def test_rebuilds_when_mostly_stale():
+    queue = SubstituteQueue()
+    for i in range(200):
+        queue.push(f"t{i:03}", at(i))
+    for i in range(190):
+        queue.remove(f"t{i:03}")
+
+    assert len(queue._heap) <= 2 * len(queue) + 64
+    assert queue.ordered() == [f"t{i:03}" for i in range(190, 200)]
+    assert queue.pop() == "t190"
+
+
+def test_load_replaces_contents():
+    queue = SubstituteQueue()
+    queue.push("old", at(0))
+    queue.load([("b", at(2)), ("a", at(1))])
+
+    assert "old" not in queue
+    assert queue.ordered() == ["a", "b"]